@@ -0,0 +1,95 @@
+"""
+Forward passes saved by coarse-to-fine adaptive analysis on long transcripts.
+
+Scores each video exhaustively and adaptively, and compares time, windows that
+went through the model, and agreement of the detected sponsored regions. With
+--synthetic, it builds a temporary store of generated transcripts with sponsor
+reads. --lexical-scorer swaps the transformer for a logistic regression trained
+on generated fine and coarse windows, for checkpoints too small to find
+sponsor reads. Adaptive mode relies on the model scoring coarse windows with
+sponsor reads above the trigger threshold, so it should see long windows in
+training too.
+
+Usage:
+    python benchmarks/adaptive_windows.py --model-path models/saved_models/best_model
+    python benchmarks/adaptive_windows.py --model-path models/saved_models/best_model --synthetic 20 --segments 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.prefilter_cascade import labeled_windows, make_video, overlap, sponsored_seconds
+from src.analyzer import VideoAnalyzer
+from src.prefilter import LexicalPrefilter
+from src.video_store import VideoStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-path', type=str, default=None)
+    parser.add_argument('--store', type=str, default='data/videos.db')
+    parser.add_argument('--videos', type=int, default=50)
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many videos instead of using --store")
+    parser.add_argument('--segments', type=int, default=2000, help="Segments per synthetic video")
+    parser.add_argument('--coarse-window', type=int, default=32)
+    parser.add_argument('--trigger-threshold', type=float, default=0.2)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--lexical-scorer', action='store_true', help="Score windows with a stand-in lexical model")
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            store = VideoStore(os.path.join(tmp, 'videos.db'))
+            store.put_videos([
+                (f"synthetic{i:04d}", {'title': '', 'description': ''}, make_video(args.segments)[0])
+                for i in range(args.synthetic)
+            ])
+        else:
+            store = VideoStore(args.store)
+        video_ids = list(store.iter_video_ids(with_transcript=True))[:args.videos or None]
+
+        analyzer = VideoAnalyzer(model_path=args.model_path, scores_dir=os.path.join(tmp, 'scores'), store=store,
+                                 coarse_window_size=args.coarse_window, trigger_threshold=args.trigger_threshold)
+        if args.lexical_scorer:
+            scorer = LexicalPrefilter()
+            scorer.fit(labeled_windows(20000) + labeled_windows(5000, args.coarse_window, args.coarse_window))
+            analyzer.engine.score_windows = lambda windows: scorer.score(
+                [window['processed_text'] for window in windows]
+            ).tolist()
+
+        totals = {'exhaustive': 0.0, 'adaptive': 0.0}
+        passes = {'exhaustive': 0, 'adaptive': 0}
+        exhaustive_seconds = adaptive_seconds = shared_seconds = 0.0
+        identical = 0
+        for video_id in video_ids:
+            results = {}
+            for mode in ('exhaustive', 'adaptive'):
+                started = time.perf_counter()
+                results[mode] = analyzer.analyze_video(video_id, args.threshold, refresh=True, mode=mode)
+                totals[mode] += time.perf_counter() - started
+                passes[mode] += analyzer.load_scores(video_id, mode)['windows_scored']
+            exhaustive_regions = sponsored_seconds(results['exhaustive'])
+            adaptive_regions = sponsored_seconds(results['adaptive'])
+            identical += exhaustive_regions == adaptive_regions
+            exhaustive_seconds += overlap(exhaustive_regions, exhaustive_regions)
+            adaptive_seconds += overlap(adaptive_regions, adaptive_regions)
+            shared_seconds += overlap(exhaustive_regions, adaptive_regions)
+
+    print(f"videos: {len(video_ids)}, coarse window: {args.coarse_window}, trigger: {args.trigger_threshold}")
+    print(f"forward passes: exhaustive {passes['exhaustive']}, adaptive {passes['adaptive']} "
+          f"({1 - passes['adaptive'] / max(passes['exhaustive'], 1):.1%} saved)")
+    print(f"exhaustive: {totals['exhaustive']:.2f}s, adaptive: {totals['adaptive']:.2f}s, "
+          f"speedup: {totals['exhaustive'] / max(totals['adaptive'], 1e-9):.2f}x")
+    print(f"videos with identical regions: {identical}/{len(video_ids)}")
+    print(f"sponsored seconds found by both / exhaustive: {shared_seconds / max(exhaustive_seconds, 1e-9):.1%}, "
+          f"/ adaptive: {shared_seconds / max(adaptive_seconds, 1e-9):.1%}")
+
+
+if __name__ == '__main__':
+    main()
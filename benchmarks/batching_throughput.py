@@ -0,0 +1,87 @@
+"""
+Throughput vs latency of predict_segments with and without cross-request batching.
+
+Usage:
+    python benchmarks/batching_throughput.py --model-path models/saved_models/best_model_X
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.model import InferenceEngine
+
+WORDS = ("today's video is sponsored by our friends who make a great product use code "
+         "for a discount link in the description back to the video we were talking about").split()
+
+
+def make_windows(count: int, rng: random.Random):
+    windows = []
+    for i in range(count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 120)))
+        windows.append({'processed_text': text, 'start_time': float(i), 'end_time': float(i + 1)})
+    return windows
+
+
+def run(engine: InferenceEngine, concurrency: int, videos_per_worker: int, windows_per_video: int):
+    rng = random.Random(0)
+    workloads = [[make_windows(windows_per_video, rng) for _ in range(videos_per_worker)] for _ in range(concurrency)]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(videos):
+        for windows in videos:
+            started = time.perf_counter()
+            engine.predict_segments(windows)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(videos,)) for videos in workloads]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total_windows = concurrency * videos_per_worker * windows_per_video
+    return {
+        'windows_per_sec': total_windows / elapsed,
+        'p50_ms': 1000 * statistics.median(latencies),
+        'p95_ms': 1000 * latencies[int(0.95 * (len(latencies) - 1))]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-path', default=os.getenv('MODEL_PATH'))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--videos-per-worker', type=int, default=4)
+    parser.add_argument('--windows-per-video', type=int, default=20)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    engines = {
+        'per-request': InferenceEngine(args.model_path, batch_size=8),
+        'batched': InferenceEngine(args.model_path, batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    }
+    print(f"{'mode':<12} {'conc':>5} {'win/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for concurrency in args.concurrency:
+        for name, engine in engines.items():
+            result = run(engine, concurrency, args.videos_per_worker, args.windows_per_video)
+            print(f"{name:<12} {concurrency:>5} {result['windows_per_sec']:>10.1f} "
+                  f"{result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f}")
+    print(f"batcher stats: {engines['batched'].batcher.stats()}")
+    for engine in engines.values():
+        engine.close()
+
+
+if __name__ == '__main__':
+    main()
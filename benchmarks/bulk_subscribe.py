@@ -0,0 +1,194 @@
+"""
+Bulk PubSubHubbub subscription: a session per channel vs one pooled session.
+
+Subscribes --channels channels against a local stand-in hub with simulated
+latency. Some requests get a 503 on their first attempt, some stall past the
+request timeout on their first attempt, and some channel IDs are rejected with
+a 400. The per-channel run matches the old behaviour: one request at a time,
+each on a new session, no retries. Finally the bulk-subscribe CLI command
+runs against the hub end to end.
+
+Usage:
+    python benchmarks/bulk_subscribe.py --channels 500 --latency-ms 50 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import aiohttp
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, REPO_ROOT)
+
+from src.pubsubhubbub import PubSubHubbub
+
+
+class StandInHub:
+    """
+    Local stand-in for a PubSubHubbub hub. Which channels fail, and how, is
+    derived from a hash of the channel ID so every run sees the same ones.
+    """
+
+    def __init__(self, latency_ms: float, flaky_fraction: float = 0.0, stall_fraction: float = 0.0,
+                 invalid_fraction: float = 0.0, stall_seconds: float = 2.0):
+        self.latency = latency_ms / 1000.0
+        self.flaky_fraction = flaky_fraction
+        self.stall_fraction = stall_fraction
+        self.invalid_fraction = invalid_fraction
+        self.stall_seconds = stall_seconds
+        self.requests = 0
+        self.connections = 0
+        self.attempts = {}
+        self._lock = threading.Lock()
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with hub._lock:
+                    hub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                status, delay = hub._respond(parse_qs(body))
+                time.sleep(delay)
+                message = b'' if status == 202 else f"{status}".encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(message)))
+                self.end_headers()
+                try:
+                    self.wfile.write(message)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on a stalled response
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/subscribe"
+
+    def _bucket(self, channel_id: str) -> float:
+        return zlib.crc32(channel_id.encode()) / 2 ** 32
+
+    def _respond(self, params):
+        topic = params.get('hub.topic', [''])[0]
+        channel_id = topic.rsplit('channel_id=', 1)[-1]
+        with self._lock:
+            self.requests += 1
+            attempt = self.attempts[channel_id] = self.attempts.get(channel_id, 0) + 1
+        bucket = self._bucket(channel_id)
+        if bucket < self.invalid_fraction:
+            return 400, self.latency
+        bucket -= self.invalid_fraction
+        if attempt == 1 and bucket < self.flaky_fraction:
+            return 503, self.latency
+        bucket -= self.flaky_fraction
+        if attempt == 1 and bucket < self.stall_fraction:
+            return 202, self.stall_seconds
+        return 202, self.latency
+
+    def start(self) -> 'StandInHub':
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+async def per_channel(pubsub: PubSubHubbub, channel_ids):
+    """One request at a time, each on its own session"""
+    results = {}
+    for channel_id in channel_ids:
+        async with aiohttp.ClientSession() as session:
+            outcome = await pubsub._send_hub_request(session, channel_id, 'subscribe')
+        results[channel_id] = outcome['ok']
+    return results
+
+
+async def bulk(pubsub: PubSubHubbub, channel_ids, **kwargs):
+    try:
+        return await pubsub.bulk_subscribe(channel_ids, **kwargs)
+    finally:
+        await pubsub.close()
+
+
+def run_cli(hub: StandInHub, channel_ids, concurrency: int, timeout: float) -> subprocess.CompletedProcess:
+    """python -m src.cli bulk-subscribe on a file of the channel IDs"""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write("# stand-in channels\n" + "\n".join(channel_ids) + "\n")
+    try:
+        env = dict(os.environ, PUBSUB_HUB_URL=hub.url)
+        return subprocess.run([sys.executable, '-m', 'src.cli', 'bulk-subscribe', f.name,
+                               '--concurrency', str(concurrency), '--timeout', str(timeout)],
+                              cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    finally:
+        os.unlink(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--channels', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--flaky-fraction', type=float, default=0.05, help="Channels whose first attempt gets a 503")
+    parser.add_argument('--stall-fraction', type=float, default=0.01, help="Channels whose first attempt times out")
+    parser.add_argument('--invalid-fraction', type=float, default=0.01, help="Channels the hub rejects with a 400")
+    parser.add_argument('--timeout', type=float, default=1.0, help="Request timeout in seconds")
+    parser.add_argument('--backoff', type=float, default=0.1, help="Base retry delay in seconds")
+    args = parser.parse_args()
+    logging.getLogger('src.pubsubhubbub').setLevel(logging.CRITICAL)
+
+    os.environ.setdefault('CALLBACK_URL', 'https://example.com/webhook')
+    channel_ids = [f"UC{i:022d}" for i in range(args.channels)]
+    print(f"{'mode':<12} {'seconds':>8} {'channels/s':>11} {'ok':>6} {'failed':>7} {'requests':>9} "
+          f"{'connections':>12}")
+    for mode in ('per-channel', 'bulk'):
+        hub = StandInHub(args.latency_ms, args.flaky_fraction, args.stall_fraction, args.invalid_fraction,
+                         stall_seconds=args.timeout * 2).start()
+        os.environ['PUBSUB_HUB_URL'] = hub.url
+        pubsub = PubSubHubbub(max_connections=args.concurrency)
+        started = time.perf_counter()
+        if mode == 'per-channel':
+            results = asyncio.run(per_channel(pubsub, channel_ids))
+        else:
+            outcomes = asyncio.run(bulk(pubsub, channel_ids, backoff_base=args.backoff,
+                                        request_timeout=args.timeout))
+            results = {channel_id: outcome['ok'] for channel_id, outcome in outcomes.items()}
+        elapsed = time.perf_counter() - started
+        ok = sum(results.values())
+        print(f"{mode:<12} {elapsed:>8.2f} {len(channel_ids) / elapsed:>11.1f} {ok:>6} {len(results) - ok:>7} "
+              f"{hub.requests:>9} {hub.connections:>12}")
+        hub.shutdown()
+
+    failures = {}
+    for outcome in outcomes.values():
+        if not outcome['ok']:
+            failures[outcome['error']] = failures.get(outcome['error'], 0) + 1
+    retried = sum(1 for outcome in outcomes.values() if outcome['ok'] and outcome['attempts'] > 1)
+    print(f"bulk: {retried} channels succeeded after a retry; failures by error: {failures}")
+
+    hub = StandInHub(args.latency_ms, args.flaky_fraction, args.stall_fraction, args.invalid_fraction,
+                     stall_seconds=args.timeout * 2).start()
+    result = run_cli(hub, channel_ids, args.concurrency, args.timeout)
+    summary = [line for line in result.stdout.splitlines() if line.startswith('[SUCCESS]')]
+    print(f"cli: exit status {result.returncode}, {summary[0] if summary else result.stderr.strip()[-500:]} "
+          f"({hub.requests} requests, {hub.connections} connections)")
+    hub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Wall time of a pipelined channel backfill vs running its stages one after another.
+
+Backfills a channel from a local stand-in YouTube API with simulated latency,
+once with fetch, windowing and inference run in sequence for each page and
+once with ChannelBackfill's overlapping stages. Then it checks resuming: a
+run stopped after --resume-after videos continues from its saved page token.
+
+Usage:
+    python benchmarks/channel_backfill.py --model-path models/saved_models/best_model --videos 300 --latency-ms 100
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.transcript_fetching import stand_in_fetch
+from benchmarks.youtube_stand_in import StandInYouTube
+
+CHANNEL_ID = 'UCstandinchannel'
+
+
+def make_backfill(server: StandInYouTube, tmp: str, model_path: str):
+    from src.analyzer import VideoAnalyzer
+    from src.channel_monitor import ChannelBackfill
+    from src.video_store import VideoStore
+    from src.youtube_api import YouTubeAPI
+
+    store = VideoStore(os.path.join(tmp, 'videos.db'))
+    api = YouTubeAPI(store=store)
+    api.transcript_fetcher._fetch_once = stand_in_fetch(api.transcript_fetcher, server)
+    analyzer = VideoAnalyzer(model_path=model_path, scores_dir=os.path.join(tmp, 'scores'), store=store)
+    return ChannelBackfill(api, analyzer, state_dir=os.path.join(tmp, 'backfill'),
+                           results_dir=os.path.join(tmp, 'results'))
+
+
+def sequential(backfill) -> int:
+    """Each page fetched, windowed and scored before the next is listed"""
+    api = backfill.youtube_api
+    playlist_id = api.get_uploads_playlist_id(CHANNEL_ID)
+    page_token = None
+    analyzed = 0
+    while True:
+        video_ids, page_token = api.get_playlist_page(playlist_id, page_token)
+        saved = api.save_video_data_many(video_ids)
+        for video_id in video_ids:
+            if not saved[video_id]:
+                continue
+            transcript, windows = backfill.analyzer.prepare_windows(video_id)
+            if windows:
+                scores = backfill.analyzer.score_prepared(video_id, transcript, windows)
+                backfill.analyzer.save_results(backfill.analyzer.apply_threshold(scores, backfill.threshold),
+                                               backfill.results_dir)
+                analyzed += 1
+        if page_token is None:
+            return analyzed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-path', type=str, default=None)
+    parser.add_argument('--videos', type=int, default=300, help="Uploads on the stand-in channel")
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--missing-fraction', type=float, default=0.05)
+    parser.add_argument('--resume-after', type=int, default=100)
+    args = parser.parse_args()
+    logging.getLogger('src.transcript_fetcher').setLevel(logging.ERROR)
+
+    server = StandInYouTube(args.latency_ms, args.missing_fraction, channel_videos=args.videos).start()
+    os.environ['YOUTUBE_API_KEY'] = 'stand-in'
+    os.environ['YOUTUBE_API_ENDPOINT'] = server.url
+
+    timings = {}
+    for mode in ('sequential', 'pipelined'):
+        with tempfile.TemporaryDirectory() as tmp:
+            backfill = make_backfill(server, tmp, args.model_path)
+            started = time.perf_counter()
+            if mode == 'sequential':
+                analyzed = sequential(backfill)
+            else:
+                analyzed = backfill.run(CHANNEL_ID)['analyzed']
+            timings[mode] = time.perf_counter() - started
+        print(f"{mode:<10} {analyzed} videos analyzed in {timings[mode]:.2f}s "
+              f"({analyzed / timings[mode]:.1f} videos/s)")
+    print(f"speedup: {timings['sequential'] / timings['pipelined']:.2f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backfill = make_backfill(server, tmp, args.model_path)
+        first = backfill.run(CHANNEL_ID, max_videos=args.resume_after)
+        state = backfill.load_state(CHANNEL_ID)
+        server.calls.clear()
+        second = backfill.run(CHANNEL_ID)
+        print(f"resume: first run listed {first['listed']} and saved page token {state['page_token']!r}; "
+              f"second run listed {second['listed']} ({server.calls.get('playlistItems', 0)} pages), "
+              f"analyzed {second['analyzed']}, skipped {second['skipped']}, "
+              f"completed: {backfill.load_state(CHANNEL_ID)['completed']}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Peak RSS and throughput of a full corpus pass: load_raw_data versus iter_raw_data.
+
+Builds a synthetic video store of each size, then runs each loader in a fresh
+subprocess so its peak RSS (parent plus worker processes) is measured alone.
+
+Usage:
+    python benchmarks/corpus_loader.py --videos 2000 8000 --segments 600 --workers 4
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.transcript_memory import make_transcript
+from src.video_store import VideoStore
+
+
+def build_store(db_path: str, videos: int, segments: int):
+    store = VideoStore(db_path)
+    batch = []
+    for i in range(videos):
+        details = {'title': f"Video {i}", 'description': "Check out our sponsor at https://example.com/deal"}
+        batch.append((f"vid{i:07d}", details, make_transcript(segments, 45)))
+        if len(batch) == 200:
+            store.put_videos(batch)
+            batch = []
+    if batch:
+        store.put_videos(batch)
+    store.close()
+
+
+def run_pass(db_path: str, mode: str, workers: int, chunk_size: int):
+    from src.data_processor import DataProcessor
+
+    processor = DataProcessor(store=VideoStore(db_path))
+    started = time.perf_counter()
+    if mode == 'list':
+        records = processor.load_raw_data()
+        for record in records:
+            processor.preprocess_text(record['transcript'])
+        count = len(records)
+    else:
+        count = 0
+        for chunk in processor.iter_raw_data(chunk_size=chunk_size, num_workers=workers):
+            count += len(chunk)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux; the children figure is the largest loader worker
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(f"{count} {elapsed:.3f} {peak}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--videos', type=int, nargs='+', default=[2000, 8000])
+    parser.add_argument('--segments', type=int, default=600)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--run', nargs=2, metavar=('DB_PATH', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_pass(args.run[0], args.run[1], args.workers, args.chunk_size)
+        return
+
+    print(f"{'videos':>7} {'loader':<12} {'videos/s':>9} {'peak RSS MiB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for videos in args.videos:
+            db_path = os.path.join(tmp, f"videos_{videos}.db")
+            build_store(db_path, videos, args.segments)
+            for mode in ('list', 'stream'):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--run', db_path, mode,
+                     '--workers', str(args.workers), '--chunk-size', str(args.chunk_size)],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                count, elapsed, peak = int(output[-3]), float(output[-2]), int(output[-1])
+                print(f"{videos:>7} {mode:<12} {count / elapsed:>9.0f} {peak / 1024:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
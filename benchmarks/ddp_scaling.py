@@ -0,0 +1,63 @@
+"""
+Training throughput of data-parallel CPU training from 1 to N processes.
+
+Every run trains one epoch on the same shards with the same global batch
+(--batch-size per process times the process count). The CPU cores are split
+evenly between the processes.
+
+Usage:
+    python benchmarks/ddp_scaling.py data/shards --max-nproc 4 --base-model distilbert-base-uncased
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.distributed import is_main_process, launch
+from src.model import ModelTrainer
+from src.shards import create_dataloader
+
+
+def run(shard_dir: str, base_model: str, batch_size: int, result_path: str):
+    with tempfile.TemporaryDirectory() as model_dir:
+        trainer = ModelTrainer(model_dir=model_dir, base_model=base_model)
+        train_loader = create_dataloader(os.path.join(shard_dir, 'train'), batch_size=batch_size, num_workers=0)
+        val_loader = create_dataloader(os.path.join(shard_dir, 'val'), batch_size=batch_size, shuffle=False,
+                                       num_workers=0, distributed_sampling=False)
+        history = trainer.train(train_loader, val_loader, epochs=1)
+    if is_main_process():
+        with open(result_path, 'w') as f:
+            json.dump(history[-1], f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('shard_dir', type=str, help="Directory with train/ and val/ shards")
+    parser.add_argument('--base-model', type=str, default='distilbert-base-uncased')
+    parser.add_argument('--max-nproc', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--global-batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{'processes':>9} {'threads each':>13} {'samples/s':>10} {'speedup':>8} {'efficiency':>11}")
+    baseline = None
+    nproc = 1
+    with tempfile.TemporaryDirectory() as tmp:
+        while nproc <= args.max_nproc:
+            result_path = os.path.join(tmp, f"result_{nproc}.json")
+            threads = max(1, cores // nproc)
+            launch(run, nproc, args=(args.shard_dir, args.base_model, args.global_batch_size // nproc, result_path),
+                   threads_per_process=threads)
+            with open(result_path) as f:
+                throughput = json.load(f)['samples_per_sec']
+            baseline = baseline or throughput
+            print(f"{nproc:>9} {threads:>13} {throughput:>10.1f} {throughput / baseline:>8.2f} "
+                  f"{throughput / baseline / nproc:>11.0%}")
+            nproc *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Outbound calls during a notification storm, with and without the fetch cache.
+
+Replays --notifications collect calls for --videos distinct videos in batches,
+as the ingestion collect stage does, against a local stand-in YouTube API.
+Some videos do not exist and some have transcripts disabled, so negative
+caching is exercised too.
+
+Usage:
+    python benchmarks/fetch_cache_storm.py --notifications 2000 --videos 200
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.transcript_fetching import stand_in_fetch
+from benchmarks.youtube_stand_in import StandInYouTube
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--notifications', type=int, default=2000)
+    parser.add_argument('--videos', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=10, help="Videos per collect batch")
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--missing-fraction', type=float, default=0.1)
+    args = parser.parse_args()
+    logging.getLogger('src.transcript_fetcher').setLevel(logging.ERROR)
+
+    os.environ['YOUTUBE_API_KEY'] = 'stand-in'
+    random.seed(0)
+    video_ids = [f"vid{i:08d}" for i in range(args.videos)]
+    storm = [random.choice(video_ids) for _ in range(args.notifications)]
+
+    print(f"{'mode':<9} {'details calls':>14} {'transcript calls':>17} {'calls/notification':>19} "
+          f"{'seconds':>8} {'hit rate':>9}")
+    for mode in ('uncached', 'cached'):
+        # Details for missing videos are not found, and their transcripts are disabled
+        server = StandInYouTube(args.latency_ms, args.missing_fraction).start()
+        os.environ['YOUTUBE_API_ENDPOINT'] = server.url
+        from src.fetch_cache import FetchCache
+        from src.video_store import VideoStore
+        from src.youtube_api import YouTubeAPI
+
+        with tempfile.TemporaryDirectory() as tmp:
+            fetch_cache = FetchCache(os.path.join(tmp, 'fetches.db')) if mode == 'cached' else None
+            api = YouTubeAPI(store=VideoStore(os.path.join(tmp, 'videos.db')), fetch_cache=fetch_cache)
+            api.transcript_fetcher._fetch_once = stand_in_fetch(api.transcript_fetcher, server)
+            started = time.perf_counter()
+            for i in range(0, len(storm), args.batch_size):
+                api.save_video_data_many(storm[i:i + args.batch_size])
+            elapsed = time.perf_counter() - started
+            hit_rate = f"{fetch_cache.stats()['hit_rate']:.1%}" if fetch_cache else '-'
+        details_calls = server.calls.get('videos', 0)
+        transcript_calls = server.calls.get('transcript', 0)
+        print(f"{mode:<9} {details_calls:>14} {transcript_calls:>17} "
+              f"{(details_calls + transcript_calls) / len(storm):>19.3f} {elapsed:>8.2f} {hit_rate:>9}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
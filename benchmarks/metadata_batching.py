@@ -0,0 +1,54 @@
+"""
+API calls per video and wall time of per-video vs batched metadata fetching.
+
+Runs against a local stand-in for the YouTube Data API with simulated network
+latency, so no key or quota is needed.
+
+Usage:
+    python benchmarks/metadata_batching.py --videos 500 --latency-ms 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.youtube_stand_in import StandInYouTube
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--videos', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Simulated latency per API call")
+    parser.add_argument('--missing-fraction', type=float, default=0.05, help="Fraction of IDs the API does not return")
+    args = parser.parse_args()
+
+    server = StandInYouTube(args.latency_ms, args.missing_fraction).start()
+    os.environ['YOUTUBE_API_KEY'] = 'stand-in'
+    os.environ['YOUTUBE_API_ENDPOINT'] = server.url
+    from src.video_store import VideoStore
+    from src.youtube_api import YouTubeAPI
+
+    video_ids = [f"vid{i:08d}" for i in range(args.videos)]
+    with tempfile.TemporaryDirectory() as tmp:
+        api = YouTubeAPI(store=VideoStore(os.path.join(tmp, 'videos.db')))
+        print(f"{'mode':<10} {'calls':>6} {'calls/video':>12} {'seconds':>8} {'videos/s':>9} {'missing':>8}")
+        for mode in ('per-video', 'batched'):
+            server.calls.clear()
+            started = time.perf_counter()
+            if mode == 'per-video':
+                details = {video_id: api.get_video_details(video_id) for video_id in video_ids}
+            else:
+                details = api.get_video_details_many(video_ids)
+            elapsed = time.perf_counter() - started
+            calls = server.calls.get('videos', 0)
+            missing = sum(value is None for value in details.values())
+            print(f"{mode:<10} {calls:>6} {calls / len(video_ids):>12.3f} {elapsed:>8.2f} "
+                  f"{len(video_ids) / elapsed:>9.1f} {missing:>8}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
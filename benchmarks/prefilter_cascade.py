@@ -0,0 +1,127 @@
+"""
+Windows skipped and end-to-end speedup of the lexical prefilter cascade.
+
+Scores each video twice, exhaustively and through the cascade, and compares
+time, the fraction of windows that skipped the transformer, and agreement of
+the detected sponsored regions. With --synthetic, it builds a temporary store
+of generated transcripts with sponsor reads and trains a prefilter on separate
+generated windows.
+
+Usage:
+    python benchmarks/prefilter_cascade.py --model-path models/saved_models/best_model --prefilter models/prefilter.joblib
+    python benchmarks/prefilter_cascade.py --model-path models/saved_models/best_model --synthetic 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.transcript_memory import make_transcript
+from src.analyzer import VideoAnalyzer
+from src.prefilter import LexicalPrefilter
+from src.video_store import VideoStore
+
+SPONSOR_READS = [
+    "today's video is sponsored by nordvpn use code tech for 20 percent off",
+    "thanks to squarespace for sponsoring this video head to the link in the description",
+    "this episode is brought to you by raid shadow legends download it free with my link",
+    "get your first month free at audible dot com slash creator that's audible dot com slash creator",
+]
+
+
+def make_video(segments: int):
+    """Transcript with one sponsor read of 4-8 segments; returns it with per-segment labels"""
+    transcript = make_transcript(segments, 45)
+    labels = [0] * segments
+    start = random.randrange(0, max(1, segments - 8))
+    for i in range(start, start + random.randint(4, 8)):
+        if i < segments:
+            transcript[i]['text'] = random.choice(SPONSOR_READS)
+            labels[i] = 1
+    return transcript, labels
+
+
+def labeled_windows(count: int, window_size: int = 5, stride: int = 2):
+    """Windows labeled sponsored when at least 3 of their segments are"""
+    examples = []
+    while len(examples) < count:
+        transcript, labels = make_video(200)
+        for i in range(0, len(transcript) - window_size + 1, stride):
+            examples.append({
+                'text': ' '.join(segment['text'] for segment in transcript[i:i + window_size]),
+                'is_sponsored': sum(labels[i:i + window_size]) >= 3
+            })
+    return examples
+
+
+def sponsored_seconds(result):
+    return [(region['start_time'], region['end_time']) for region in result['sponsored_regions']]
+
+
+def overlap(a, b):
+    return sum(max(0.0, min(a_end, b_end) - max(a_start, b_start)) for a_start, a_end in a for b_start, b_end in b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-path', type=str, default=None)
+    parser.add_argument('--prefilter', type=str, default=None)
+    parser.add_argument('--store', type=str, default='data/videos.db')
+    parser.add_argument('--videos', type=int, default=50)
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many videos instead of using --store")
+    parser.add_argument('--segments', type=int, default=600, help="Segments per synthetic video")
+    parser.add_argument('--max-recall-loss', type=float, default=0.01)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            store = VideoStore(os.path.join(tmp, 'videos.db'))
+            store.put_videos([
+                (f"synthetic{i:04d}", {'title': '', 'description': ''}, make_video(args.segments)[0])
+                for i in range(args.synthetic)
+            ])
+            prefilter = LexicalPrefilter()
+            report = prefilter.fit(labeled_windows(20000), max_recall_loss=args.max_recall_loss)
+            print(f"prefilter calibration: skip threshold {report['skip_threshold']:.4f}, "
+                  f"held-out recall loss {report['recall_loss']:.2%}, skipped {report['skipped_fraction']:.1%}")
+        else:
+            store = VideoStore(args.store)
+            prefilter = LexicalPrefilter.load(args.prefilter)
+        video_ids = list(store.iter_video_ids(with_transcript=True))[:args.videos or None]
+
+        analyzer = VideoAnalyzer(model_path=args.model_path, scores_dir=os.path.join(tmp, 'scores'), store=store)
+        totals = {'exhaustive': 0.0, 'cascade': 0.0}
+        windows = skipped = 0
+        exhaustive_seconds = cascade_seconds = shared_seconds = 0.0
+        for video_id in video_ids:
+            results = {}
+            for mode in ('exhaustive', 'cascade'):
+                analyzer.prefilter = prefilter if mode == 'cascade' else None
+                started = time.perf_counter()
+                results[mode] = analyzer.analyze_video(video_id, args.threshold, refresh=True)
+                totals[mode] += time.perf_counter() - started
+            sources = [segment['source'] for segment in results['cascade']['segments']]
+            windows += len(sources)
+            skipped += sources.count('prefilter')
+            exhaustive_regions = sponsored_seconds(results['exhaustive'])
+            cascade_regions = sponsored_seconds(results['cascade'])
+            exhaustive_seconds += overlap(exhaustive_regions, exhaustive_regions)
+            cascade_seconds += overlap(cascade_regions, cascade_regions)
+            shared_seconds += overlap(exhaustive_regions, cascade_regions)
+
+    print(f"videos: {len(video_ids)}, windows: {windows}")
+    print(f"windows skipped by the prefilter: {skipped / max(windows, 1):.1%}")
+    print(f"exhaustive: {totals['exhaustive']:.2f}s, cascade: {totals['cascade']:.2f}s, "
+          f"speedup: {totals['exhaustive'] / max(totals['cascade'], 1e-9):.2f}x")
+    print(f"sponsored seconds found by both / exhaustive: {shared_seconds / max(exhaustive_seconds, 1e-9):.1%}, "
+          f"/ cascade: {shared_seconds / max(cascade_seconds, 1e-9):.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark of batch text preprocessing.
+
+Times preprocess_texts against the original three-regex preprocess_text on
+--windows synthetic transcript windows, and exits with status 1 if their
+outputs differ. Equivalence on edge cases and fuzzed input is covered by
+tests/test_preprocess.py.
+
+Usage:
+    python benchmarks/preprocess_throughput.py --windows 1000000 --workers 4
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.transcript_memory import make_transcript
+from src.data_processor import preprocess_texts
+
+def reference_preprocess(text: str) -> str:
+    """preprocess_text as originally written"""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = ' '.join(text.split())
+    return text
+
+
+def make_windows(count: int):
+    segments = make_transcript(2000, 45)
+    for i in range(0, len(segments), 50):
+        segments[i]['text'] += " Sign up at https://example.com/promo?ref=yt, it's 20% off!"
+    texts = [segment['text'] for segment in segments]
+    windows = [' '.join(texts[i:i + 5]) for i in range(len(texts) - 4)]
+    return [windows[i % len(windows)] for i in range(count)]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--windows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    mismatches = 0
+    windows = make_windows(args.windows)
+    expected, reference_time = timed(lambda: [reference_preprocess(text) for text in windows])
+    print(f"{'implementation':<28} {'windows/s':>11} {'speedup':>8}")
+    print(f"{'preprocess_text (original)':<28} {len(windows) / reference_time:>11.0f} {1.0:>8.2f}")
+    for workers in sorted({0, args.workers}):
+        actual, elapsed = timed(lambda: preprocess_texts(windows, num_workers=workers))
+        if actual != expected:
+            mismatches += sum(want != got for want, got in zip(expected, actual))
+        label = f"preprocess_texts ({workers} workers)"
+        print(f"{label:<28} {len(windows) / elapsed:>11.0f} {reference_time / elapsed:>8.2f}")
+
+    if mismatches:
+        print(f"\n{mismatches} mismatches")
+        sys.exit(1)
+    print("\nAll outputs identical to preprocess_text")
+
+
+if __name__ == '__main__':
+    main()
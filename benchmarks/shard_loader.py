@@ -0,0 +1,88 @@
+"""
+Per-epoch input pipeline cost: tokenizing labeled windows every epoch versus
+reading pre-tokenized memory-mapped shards with dynamic padding.
+
+Usage:
+    python benchmarks/shard_loader.py --tokenizer distilbert-base-uncased --windows 50000 --workers 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import torch
+from transformers import AutoTokenizer
+
+from benchmarks.transcript_memory import make_transcript
+from src.data_processor import preprocess_texts
+from src.shards import create_dataloader, write_shards
+
+
+def make_examples(count: int):
+    texts = [segment['text'] for segment in make_transcript(count + 4, 45)]
+    return [{'text': ' '.join(texts[i:i + random.randint(1, 5)]), 'is_sponsored': random.random() < 0.2}
+            for i in range(count)]
+
+
+def tokenize_per_epoch(examples, tokenizer, batch_size):
+    """What a training run without shards pays every epoch"""
+    order = list(range(len(examples)))
+    random.shuffle(order)
+    padded = real = 0
+    for start in range(0, len(order), batch_size):
+        batch = [examples[i] for i in order[start:start + batch_size]]
+        encoded = tokenizer(preprocess_texts([example['text'] for example in batch]),
+                            padding=True, truncation=True, max_length=512, return_tensors='pt')
+        torch.tensor([example['is_sponsored'] for example in batch])
+        padded += encoded['input_ids'].numel()
+        real += int(encoded['attention_mask'].sum())
+    return padded, real
+
+
+def read_shards(loader):
+    padded = real = 0
+    for batch in loader:
+        padded += batch['input_ids'].numel()
+        real += int(batch['attention_mask'].sum())
+    return padded, real
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokenizer', type=str, default='distilbert-base-uncased')
+    parser.add_argument('--windows', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--epochs', type=int, default=2)
+    args = parser.parse_args()
+
+    random.seed(0)
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    examples = make_examples(args.windows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        write_shards(examples, tmp, tokenizer)
+        print(f"one-time sharding: {time.perf_counter() - started:.2f}s for {args.windows} windows\n")
+
+        print(f"{'pipeline':<32} {'epoch s':>8} {'windows/s':>10} {'padding':>8}")
+        runs = [('tokenize every epoch', lambda: tokenize_per_epoch(examples, tokenizer, args.batch_size))]
+        for workers, grouped in ((0, False), (args.workers, False), (args.workers, True)):
+            loader = create_dataloader(tmp, batch_size=args.batch_size, num_workers=workers, group_by_length=grouped)
+            label = f"shards, {workers} workers" + (", grouped" if grouped else "")
+            runs.append((label, lambda loader=loader: read_shards(loader)))
+        for label, run in runs:
+            for epoch in range(args.epochs):
+                started = time.perf_counter()
+                padded, real = run()
+                elapsed = time.perf_counter() - started
+            # Last epoch: persistent loader workers are already up
+            print(f"{label:<32} {elapsed:>8.2f} {args.windows / elapsed:>10.0f} {1 - real / padded:>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Memory per transcript and load time of JSON segment lists versus CompactTranscript.
+
+Transcripts are synthetic: --segments segments of about --chars characters each.
+
+Usage:
+    python benchmarks/transcript_memory.py --segments 1500 --chars 45 --repeats 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.transcript import CompactTranscript
+
+WORDS = ("this video is sponsored by our friends over at nordvpn use code link in the description "
+         "today we are going to talk about how the engine works and why it matters for you").split()
+
+
+def make_transcript(segments: int, chars: int):
+    transcript = []
+    start = 0.0
+    for _ in range(segments):
+        words = []
+        while sum(len(word) + 1 for word in words) < chars:
+            words.append(random.choice(WORDS))
+        duration = round(random.uniform(1.5, 6.0), 2)
+        transcript.append({'text': ' '.join(words), 'start': round(start, 2), 'duration': duration})
+        start += duration
+    return transcript
+
+
+def allocated(fn):
+    """Bytes still allocated by the object fn() returns"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, result
+
+
+def timed(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return 1000 * (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segments', type=int, default=1500)
+    parser.add_argument('--chars', type=int, default=45)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+    segments = make_transcript(args.segments, args.chars)
+    as_json = json.dumps(segments, ensure_ascii=False)
+    as_bytes = CompactTranscript.from_segments(segments).to_bytes()
+
+    json_memory, _ = allocated(lambda: json.loads(as_json))
+    compact_memory, compact = allocated(lambda: CompactTranscript.from_buffer(as_bytes))
+    print(f"{args.segments} segments, {len(as_json)} bytes as JSON, {len(as_bytes)} bytes compact")
+    print(f"{'':<22} {'memory KiB':>11} {'load ms':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'transcript.json')
+        compact_path = os.path.join(tmp, 'transcript.bin')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(as_json)
+        compact.save(compact_path)
+
+        def load_json_file():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        rows = [
+            ('json.loads', json_memory, timed(lambda: json.loads(as_json), args.repeats)),
+            ('from_buffer', compact_memory, timed(lambda: CompactTranscript.from_buffer(as_bytes), args.repeats)),
+            ('json.load (file)', json_memory, timed(load_json_file, args.repeats)),
+            ('mmap load (file)', None, timed(lambda: CompactTranscript.load(compact_path), args.repeats)),
+        ]
+        for name, memory, load_ms in rows:
+            memory = f"{memory / 1024:>11.1f}" if memory is not None else f"{'mapped':>11}"
+            print(f"{name:<22} {memory} {load_ms:>9.3f}")
+
+    # Decoding every text is what windowing pays on top of the load
+    print(f"{'texts() decode':<22} {'':>11} {timed(compact.texts, args.repeats):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
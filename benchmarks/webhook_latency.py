@@ -0,0 +1,92 @@
+"""
+Webhook latency under a synthetic notification flood, before and after fast-ack.
+
+The YouTube fetch is replaced by a fixed delay, so only the webhook path is
+measured. The "inline" mode runs ingestion inside the request, as the webhook
+did before background ingestion; "queued" is the current fast-ack path.
+
+Usage:
+    python benchmarks/webhook_latency.py --notifications 500 --concurrency 50 --fetch-ms 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+from src import main as app_module
+
+FEED = """<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  </entry>
+</feed>"""
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def flood(notifications: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def send(i):
+            body = FEED.format(video_id=f"bench{i:06d}").encode()
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/webhook", content=body)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code < 300, response.status_code
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(notifications)))
+        elapsed = time.perf_counter() - started
+    return latencies, notifications / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--notifications', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--fetch-ms', type=float, default=200.0, help="Simulated YouTube fetch time per collect batch")
+    args = parser.parse_args()
+
+    os.environ.pop('WEBHOOK_SECRET', None)
+    collector = app_module.data_collector
+    collector.youtube_api.save_video_data_many = lambda video_ids: (
+        time.sleep(args.fetch_ms / 1000.0) or dict.fromkeys(video_ids, True)
+    )
+    collector.process_video_data = lambda video_id: True
+    app_module.save_notification = lambda *a: None
+
+    ingestion = app_module.ingestion
+    enqueue = ingestion.enqueue
+
+    def enqueue_inline(video_id, payload=None):
+        job = [{'id': 0, 'video_id': video_id, 'payload': payload}]
+        return app_module.collect_videos(job)[0] and app_module.process_videos(job)[0]
+
+    print(f"{'mode':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in ('inline', 'queued'):
+        if mode == 'inline':
+            ingestion.enqueue = enqueue_inline
+        else:
+            ingestion.enqueue = enqueue
+            ingestion.start()
+        latencies, throughput = asyncio.run(flood(args.notifications, args.concurrency))
+        print(f"{mode:<8} {throughput:>8.0f} {1000 * percentile(latencies, 0.5):>8.1f} {1000 * percentile(latencies, 0.95):>8.1f} "
+              f"{1000 * percentile(latencies, 0.99):>8.1f} {1000 * max(latencies):>8.1f}")
+    ingestion.stop(timeout=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Enqueue and dequeue throughput of the durable work queue on local disk.
+
+Usage:
+    python benchmarks/work_queue_throughput.py --jobs 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.work_queue import WorkQueue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = WorkQueue(os.path.join(tmp, 'queue.db'))
+        payload = {'xml': 'x' * 800, 'received_at': '20240101_000000_000000'}
+
+        started = time.perf_counter()
+        for i in range(args.jobs):
+            queue.enqueue(f"single{i}", payload)
+        single = args.jobs / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for i in range(0, args.jobs, args.batch_size):
+            ids = [f"bulk{j}" for j in range(i, min(i + args.batch_size, args.jobs))]
+            queue.enqueue_many(ids, [payload] * len(ids))
+        bulk = args.jobs / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        duplicates = sum(queue.enqueue(f"single{i}", payload) for i in range(args.jobs))
+        idempotent = args.jobs / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        leased = 0
+        while True:
+            jobs = queue.dequeue('collect', 'bench', batch_size=args.batch_size)
+            if not jobs:
+                break
+            for job in jobs:
+                queue.complete(job['id'], 'bench', 'process')
+            leased += len(jobs)
+        drain = leased / (time.perf_counter() - started)
+
+        print(f"single enqueue:      {single:>10.0f} jobs/s")
+        print(f"batched enqueue:     {bulk:>10.0f} jobs/s (batches of {args.batch_size})")
+        print(f"duplicate enqueue:   {idempotent:>10.0f} jobs/s ({duplicates} re-added)")
+        print(f"dequeue + complete:  {drain:>10.0f} jobs/s ({leased} jobs)")
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()
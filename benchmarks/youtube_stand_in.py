@@ -0,0 +1,151 @@
+"""
+Local stand-in for the YouTube Data API, for benchmarks that should not call Google.
+
+Serves videos().list with generated metadata, channels().list and
+playlistItems().list for channels of channel_videos uploads, plus generated
+transcripts at /transcript?v=<id>, and counts calls. Point YouTubeAPI at it with
+YOUTUBE_API_ENDPOINT=<server.url>.
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StandInYouTube(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float = 0.0, missing_fraction: float = 0.0, flaky_fraction: float = 0.0,
+                 channel_videos: int = 500):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.channel_videos = channel_videos
+        self.latency_ms = latency_ms
+        self.missing_fraction = missing_fraction
+        # Transcript requests for this fraction of IDs get a 429 on their first attempt
+        self.flaky_fraction = flaky_fraction
+        self.calls = {}
+        self.active = 0
+        self.max_active = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def start(self) -> 'StandInYouTube':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def count(self, resource: str):
+        with self._lock:
+            self.calls[resource] = self.calls.get(resource, 0) + 1
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def first_attempt(self, video_id: str) -> bool:
+        with self._lock:
+            self._attempts[video_id] = self._attempts.get(video_id, 0) + 1
+            return self._attempts[video_id] == 1
+
+    def is_flaky(self, video_id: str) -> bool:
+        return zlib.crc32(video_id.encode()[::-1]) % 1000 < self.flaky_fraction * 1000
+
+    def is_missing(self, video_id: str) -> bool:
+        """Deterministically treat a fraction of IDs as deleted or private"""
+        return zlib.crc32(video_id.encode()) % 1000 < self.missing_fraction * 1000
+
+    def video(self, video_id: str) -> dict:
+        return {
+            'id': video_id,
+            'snippet': {
+                'title': f"Video {video_id}",
+                'description': f"Description of {video_id}\nUse code TECH for 20% off at https://example.com/sponsor",
+                'publishedAt': '2024-01-01T00:00:00Z',
+                'channelId': 'UCstandin',
+                'channelTitle': 'Stand-in channel'
+            },
+            'contentDetails': {'duration': 'PT12M30S'}
+        }
+
+    def uploads(self, playlist_id: str) -> list:
+        """Video IDs of an uploads playlist, newest first"""
+        return [f"{playlist_id[2:10]}{i:06d}" for i in range(self.channel_videos, 0, -1)]
+
+    def transcript(self, video_id: str) -> list:
+        return [
+            {'text': f"segment {i} of {video_id}", 'start': i * 4.0, 'duration': 4.0}
+            for i in range(180)
+        ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        resource = url.path.rstrip('/').rsplit('/', 1)[-1]
+        self.server.count(resource)
+        # Counted as in flight until the response is about to be written, so a client
+        # reusing the connection can never overlap with it
+        self.server.enter()
+        try:
+            if self.server.latency_ms:
+                time.sleep(self.server.latency_ms / 1000.0)
+        finally:
+            self.server.leave()
+        self._respond(resource, query)
+
+    def _respond(self, resource: str, query: dict):
+        if resource == 'transcript':
+            video_id = query.get('v', [''])[0]
+            if self.server.is_missing(video_id):
+                self._send(404, {'error': 'Transcripts are disabled for this video'})
+            elif self.server.is_flaky(video_id) and self.server.first_attempt(video_id):
+                self._send(429, {'error': 'Too many requests'})
+            else:
+                self._send(200, self.server.transcript(video_id))
+            return
+        if resource == 'channels':
+            items = [
+                {'id': channel_id, 'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}}}
+                for channel_id in query.get('id', [])
+            ]
+            self._send(200, {'kind': 'youtube#channelListResponse', 'items': items})
+            return
+        if resource == 'playlistItems':
+            uploads = self.server.uploads(query.get('playlistId', [''])[0])
+            offset = int(query.get('pageToken', ['0'])[0])
+            page_size = min(50, int(query.get('maxResults', ['5'])[0]))
+            body = {'kind': 'youtube#playlistItemListResponse', 'items': [
+                {'contentDetails': {'videoId': video_id}} for video_id in uploads[offset:offset + page_size]
+            ]}
+            if offset + page_size < len(uploads):
+                body['nextPageToken'] = str(offset + page_size)
+            self._send(200, body)
+            return
+        if resource != 'videos':
+            self._send(404, {'error': {'code': 404, 'message': f"Unknown resource {resource}"}})
+            return
+        ids = [video_id for value in query.get('id', []) for video_id in value.split(',') if video_id]
+        if len(ids) > 50:
+            self._send(400, {'error': {'code': 400, 'message': "Too many IDs"}})
+            return
+        items = [self.server.video(video_id) for video_id in ids if not self.server.is_missing(video_id)]
+        self._send(200, {'kind': 'youtube#videoListResponse', 'items': items})
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
@@ -1,7 +1,7 @@
 from .analyzer import VideoAnalyzer
 from .data_collector import DataCollector
 from .data_processor import DataProcessor
-from .model import ModelTrainer
+from .model import InferenceEngine, ModelTrainer
 from .pubsubhubbub import PubSubHubbub
 from .youtube_api import YouTubeAPI
 
@@ -9,6 +9,7 @@ __all__ = [
     'VideoAnalyzer',
     'DataCollector',
     'DataProcessor',
+    'InferenceEngine',
     'ModelTrainer',
     'PubSubHubbub',
     'YouTubeAPI'
@@ -1,49 +1,342 @@
 from typing import Dict, List, Optional
 from .data_processor import DataProcessor
-from .model import ModelTrainer
+from .description_parser import parse_description, parse_duration
+from .model import InferenceEngine
+from .prefilter import LexicalPrefilter
+from .score_cache import ScoreCache
+from .video_store import VideoStore
 import json
+import numpy as np
 import os
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
+ANALYSIS_MODES = ('exhaustive', 'adaptive')
+DESCRIPTION_HINTS = ('off', 'focus', 'trust')
+
 class VideoAnalyzer:
-    def __init__(self, model_path: str = None):
-        self.data_processor = DataProcessor()
-        self.model_trainer = ModelTrainer()
-        if model_path:
-            self.model_trainer.load_model(model_path)
+    def __init__(self, model_path: str = None, backend: str = 'torch', batch_size: int = 64,
+                 max_tokens_per_batch: int = 4096, max_wait_ms: Optional[float] = None,
+                 score_cache: Optional[ScoreCache] = None, scores_dir: str = "data/processed/scores",
+                 max_cached_videos: int = 1024, store: Optional[VideoStore] = None,
+                 prefilter: Optional[LexicalPrefilter] = None, analysis_mode: str = 'exhaustive',
+                 coarse_window_size: int = 32, trigger_threshold: float = 0.2, description_hints: str = 'off'):
+        if analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode '{analysis_mode}', expected one of {', '.join(ANALYSIS_MODES)}")
+        if description_hints not in DESCRIPTION_HINTS:
+            raise ValueError(f"Unknown description hints '{description_hints}', expected one of {', '.join(DESCRIPTION_HINTS)}")
+        self.engine = InferenceEngine(
+            model_path,
+            backend=backend,
+            batch_size=batch_size,
+            max_tokens_per_batch=max_tokens_per_batch,
+            max_wait_ms=max_wait_ms,
+            score_cache=score_cache
+        )
+        self.data_processor = DataProcessor(store=store, tokenizer=self.engine.tokenizer)
+        # Optional lexical first stage; windows it rules out skip the transformer
+        self.prefilter = prefilter
+        # Adaptive mode scores non-overlapping blocks of up to coarse_window_size segments
+        # first (fewer where needed to fit the model's max length), and fine windows only
+        # around blocks scoring at least trigger_threshold
+        self.analysis_mode = analysis_mode
+        self.coarse_window_size = coarse_window_size
+        self.trigger_threshold = trigger_threshold
+        # Sponsor chapters in the description: 'focus' runs the model only on the windows
+        # they overlap, 'trust' takes them as the answer without inference
+        self.description_hints = description_hints
+        # Raw scores per (video_id, model version), so re-thresholding skips inference
+        self.scores_dir = scores_dir
+        self.max_cached_videos = max_cached_videos
+        self._scores = OrderedDict()
+        self._scores_lock = threading.Lock()
         
-    def analyze_video(self, video_id: str, threshold: float = 0.5) -> Dict:
+    def analyze_video(self, video_id: str, threshold: float = 0.5, refresh: bool = False,
+                      mode: Optional[str] = None) -> Dict:
         """
         Analyze a video for sponsorship segments
         Args:
             video_id: YouTube video ID
             threshold: Confidence threshold for sponsorship detection
+            refresh: Re-run the model even if scores are stored for this model version
+            mode: 'exhaustive' scores every window; 'adaptive' searches coarse-to-fine
+                (default: the analyzer's analysis_mode)
         Returns:
             Dictionary containing analysis results
         """
-        # Process video segments
-        segments = self.data_processor.process_video_segments(video_id)
-        if not segments:
+        scores = self.score_video(video_id, refresh=refresh, mode=mode)
+        if scores is None:
             return {
                 'video_id': video_id,
                 'status': 'error',
                 'message': 'No segments found for analysis'
             }
+        return self.apply_threshold(scores, threshold)
+    
+    def scores_version(self, mode: Optional[str] = None) -> str:
+        """Version of everything that produces the scores: model, prefilter and analysis mode"""
+        version = self.engine.model_version
+        if self.prefilter is not None:
+            version = f"{version}+{self.prefilter.version}"
+        if (mode or self.analysis_mode) == 'adaptive':
+            # Blocks are sized by tokens as well as segments
+            version = f"{version}+adaptive{self.coarse_window_size}t@{self.trigger_threshold:g}"
+        if self.description_hints != 'off':
+            version = f"{version}+description-{self.description_hints}"
+        return version
+    
+    def score_video(self, video_id: str, refresh: bool = False, mode: Optional[str] = None) -> Optional[Dict]:
+        """
+        Return raw per-window confidences for a video. They are computed once per
+        model version and stored, so any threshold can be applied later without inference.
+        Returns:
+            Stored scores, or None if the video has no transcript windows
+        """
+        mode = mode or self.analysis_mode
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode '{mode}', expected one of {', '.join(ANALYSIS_MODES)}")
+        if not refresh:
+            scores = self.load_scores(video_id, mode)
+            if scores is not None:
+                return scores
+        
+        transcript, segments = self.prepare_windows(video_id)
+        if not segments:
+            return None
+        return self.score_prepared(video_id, transcript, segments, mode)
+    
+    def prepare_windows(self, video_id: str):
+        """
+        Load a video's transcript and build its tokenized windows, without inference
+        Returns:
+            The transcript (None if not stored) and its windows
+        """
+        transcript = self.data_processor.store.get_transcript(video_id)
+        segments = self.data_processor.create_token_windows(transcript) if transcript else []
+        return transcript, segments
+    
+    def score_prepared(self, video_id: str, transcript, segments: List[Dict], mode: Optional[str] = None) -> Dict:
+        """
+        Score windows from prepare_windows and store the scores
+        Lets callers such as the channel backfill build windows and run inference in separate stages.
+        """
+        mode = mode or self.analysis_mode
+        hints = self._description_hints(video_id) if self.description_hints != 'off' else None
+        if hints and hints['sponsor_chapters']:
+            confidences, sources, windows_scored = self._chapter_scores(segments, hints['sponsor_chapters'])
+        elif mode == 'adaptive':
+            confidences, sources, windows_scored = self._adaptive_scores(transcript, segments)
+        else:
+            confidences, sources = self._score_windows(segments)
+            windows_scored = sources.count('model')
         
-        # Get predictions for each segment
-        predictions = self.model_trainer.predict_segments(segments, threshold)
+        scores = {
+            'video_id': video_id,
+            'model_version': self.scores_version(mode),
+            'scored_at': datetime.utcnow().isoformat(),
+            'segments': [
+                {
+                    'start_time': segment['start_time'],
+                    'end_time': segment['end_time'],
+                    'confidence': float(confidence)
+                }
+                for segment, confidence in zip(segments, confidences)
+            ],
+            # Forward passes spent on this video, coarse windows included
+            'windows_scored': windows_scored
+        }
+        if hints is not None:
+            scores['description'] = {
+                'hints': self.description_hints,
+                'applied': bool(hints['sponsor_chapters']),
+                **hints
+            }
+        if self.prefilter is not None or hints is not None or mode == 'adaptive':
+            for segment, source in zip(scores['segments'], sources):
+                segment['source'] = source
+        self.save_scores(scores)
+        return scores
+    
+    def _description_hints(self, video_id: str) -> Dict:
+        """Chapters and sponsor links parsed from the stored description"""
+        details = self.data_processor.store.get_details(video_id) or {}
+        return parse_description(details.get('description') or '', parse_duration(details.get('duration')))
+    
+    def _chapter_scores(self, segments: List[Dict], chapters: List[Dict]):
+        """
+        Score windows from sponsor chapters in the description. With 'trust' hints,
+        windows centered in a sponsor chapter get confidence 1 and the rest 0, without
+        inference. With 'focus' hints, windows overlapping a sponsor chapter are scored
+        by the model and the rest get 0.
+        Returns:
+            Confidences, per window 'description' or where its score came from, and the
+            number of windows that went through the model
+        """
+        # The last chapter runs to the end of the video when its length is unknown
+        spans = [(chapter['start_time'], chapter['end_time'] or float('inf')) for chapter in chapters]
+        confidences = [0.0] * len(segments)
+        sources = ['description'] * len(segments)
+        if self.description_hints == 'trust':
+            for i, segment in enumerate(segments):
+                middle = (segment['start_time'] + segment['end_time']) / 2
+                if any(start <= middle < end for start, end in spans):
+                    confidences[i] = 1.0
+            return confidences, sources, 0
+        
+        selected = [
+            i for i, segment in enumerate(segments)
+            if any(segment['start_time'] < end and segment['end_time'] > start for start, end in spans)
+        ]
+        windows_scored = 0
+        if selected:
+            model_confidences, model_sources = self._score_windows([segments[i] for i in selected])
+            for i, confidence, source in zip(selected, model_confidences, model_sources):
+                confidences[i] = confidence
+                sources[i] = source
+            windows_scored = model_sources.count('model')
+        return confidences, sources, windows_scored
+    
+    def _score_windows(self, segments: List[Dict]):
+        """
+        Score windows with the engine, through the prefilter cascade if there is one
+        Returns:
+            Confidences and, per window, where its score came from
+        """
+        if self.prefilter is not None:
+            return self._cascade_scores(segments)
+        return self.engine.score_windows(segments), ['model'] * len(segments)
+    
+    def _adaptive_scores(self, transcript, fine_windows: List[Dict], window_size: int = 5, stride: int = 2):
+        """
+        Coarse-to-fine search: score non-overlapping blocks of up to coarse_window_size
+        segments, each sized to fit the model's token limit so nothing in it is cut off,
+        then run the fine windows only where a block scored at least trigger_threshold,
+        plus window_size segments either side of it. The other fine windows get
+        confidence 0, like windows the prefilter rules out, so no threshold flags a
+        window the model never scored.
+        Returns:
+            Fine window confidences, per window 'coarse' or where its fine score came
+            from, and the number of windows that went through the model
+        """
+        blocks = self.data_processor.create_token_blocks(transcript, self.coarse_window_size)
+        coarse_confidences, coarse_sources = self._score_windows(blocks)
+        
+        # Mark the segments around triggered blocks, then select the fine windows touching them
+        segment_triggered = np.zeros(len(transcript), dtype=bool)
+        for block, confidence in zip(blocks, coarse_confidences):
+            if confidence >= self.trigger_threshold:
+                segment_triggered[max(0, block['first_segment'] - window_size):block['end_segment'] + window_size] = True
+        selected = [
+            i for i in range(len(fine_windows))
+            if segment_triggered[i * stride:i * stride + window_size].any()
+        ]
+        
+        confidences = [0.0] * len(fine_windows)
+        sources = ['coarse'] * len(fine_windows)
+        windows_scored = coarse_sources.count('model')
+        if selected:
+            fine_confidences, fine_sources = self._score_windows([fine_windows[i] for i in selected])
+            for i, confidence, source in zip(selected, fine_confidences, fine_sources):
+                confidences[i] = confidence
+                sources[i] = source
+            windows_scored += fine_sources.count('model')
+        return confidences, sources, windows_scored
+
+    def _cascade_scores(self, segments: List[Dict]):
+        """
+        Score windows with the prefilter, then only its candidates with the transformer
+        Returns:
+            Confidences and, per window, 'prefilter' or 'model' for where its score came from.
+            Windows the prefilter rules out get confidence 0, so no threshold flags them
+        """
+        lexical_scores = self.prefilter.score([segment['processed_text'] for segment in segments])
+        candidates = [i for i, score in enumerate(lexical_scores) if score >= self.prefilter.skip_threshold]
+        confidences = [0.0] * len(segments)
+        sources = ['prefilter'] * len(segments)
+        if candidates:
+            model_confidences = self.engine.score_windows([segments[i] for i in candidates])
+            for i, confidence in zip(candidates, model_confidences):
+                confidences[i] = confidence
+                sources[i] = 'model'
+        return confidences, sources
+    
+    def apply_threshold(self, scores: Dict, threshold: float) -> Dict:
+        """
+        Build analysis results from stored scores for a given threshold
+        """
+        predictions = [
+            {**segment, 'is_sponsored': segment['confidence'] > threshold}
+            for segment in scores['segments']
+        ]
         
         # Group consecutive sponsored segments
         sponsored_regions = self._group_sponsored_segments(predictions)
         
-        return {
-            'video_id': video_id,
+        results = {
+            'video_id': scores['video_id'],
             'status': 'success',
             'analyzed_at': datetime.utcnow().isoformat(),
+            'model_version': scores['model_version'],
             'threshold': threshold,
             'sponsored_regions': sponsored_regions,
             'segments': predictions
         }
+        if 'description' in scores:
+            # What the description contributed, and whether it decided where the model ran
+            results['description'] = scores['description']
+        return results
+    
+    def _scores_file(self, video_id: str, version: str) -> str:
+        version = re.sub(r'[^\w.-]', '_', version)
+        return os.path.join(self.scores_dir, f"{video_id}_{version}_scores.json")
+    
+    def has_scores(self, video_id: str, mode: Optional[str] = None) -> bool:
+        """Whether scores for this video, model version and analysis mode are stored"""
+        return self.load_scores(video_id, mode) is not None
+    
+    def load_scores(self, video_id: str, mode: Optional[str] = None) -> Optional[Dict]:
+        """
+        Load stored scores for this video, model version and analysis mode, if any.
+        Scores from another model version, such as an earlier training run saved to
+        the same checkpoint directory, are never returned.
+        """
+        key = (video_id, self.scores_version(mode))
+        with self._scores_lock:
+            if key in self._scores:
+                self._scores.move_to_end(key)
+                return self._scores[key]
+        
+        scores_file = self._scores_file(*key)
+        if not os.path.exists(scores_file):
+            return None
+        with open(scores_file, 'r', encoding='utf-8') as f:
+            scores = json.load(f)
+        # File names only keep the safe characters of the version, so check the full one
+        if scores.get('model_version') != key[1]:
+            return None
+        self._remember_scores(scores)
+        return scores
+    
+    def save_scores(self, scores: Dict) -> str:
+        """Store raw scores in memory and on disk"""
+        self._remember_scores(scores)
+        os.makedirs(self.scores_dir, exist_ok=True)
+        scores_file = self._scores_file(scores['video_id'], scores['model_version'])
+        tmp_file = f"{scores_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(scores, f, ensure_ascii=False)
+        os.replace(tmp_file, scores_file)
+        return scores_file
+    
+    def _remember_scores(self, scores: Dict):
+        with self._scores_lock:
+            key = (scores['video_id'], scores['model_version'])
+            self._scores[key] = scores
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_cached_videos:
+                self._scores.popitem(last=False)
     
     def _group_sponsored_segments(self, segments: List[Dict]) -> List[Dict]:
         """
@@ -0,0 +1,112 @@
+import threading
+import time
+import queue
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+
+class DynamicBatcher:
+    """
+    Pools items submitted from concurrent callers into shared batches.
+
+    A single worker thread collects queued items until either max_batch_size
+    items are waiting or the oldest item has waited max_wait_ms, runs them
+    through run_batch in one call and routes each result back to its caller.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+        self._stats = {'batches': 0, 'items': 0, 'wait_seconds': 0.0}
+
+    def submit(self, items: List[Any]) -> List[Any]:
+        """
+        Queue items for batched processing and block until all results are ready
+        Args:
+            items: Inputs accepted by run_batch
+        Returns:
+            Results in the same order as items
+        """
+        if not items:
+            return []
+        self._ensure_worker()
+        futures = []
+        enqueued_at = time.perf_counter()
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, enqueued_at))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DynamicBatcher is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="dynamic-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            deadline = first[2] + self.max_wait
+            stop = False
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                pending.append(entry)
+            self._process(pending)
+            if stop:
+                return
+
+    def _process(self, pending: List):
+        started = time.perf_counter()
+        try:
+            results = self.run_batch([item for item, _, _ in pending])
+        except Exception as e:
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['items'] += len(pending)
+            self._stats['wait_seconds'] += sum(started - enqueued_at for _, _, enqueued_at in pending)
+        for (_, future, _), result in zip(pending, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Return counters describing how items have been batched so far"""
+        with self._lock:
+            batches = self._stats['batches']
+            items = self._stats['items']
+            return {
+                'batches': batches,
+                'items': items,
+                'mean_batch_size': items / batches if batches else 0.0,
+                'mean_wait_ms': 1000.0 * self._stats['wait_seconds'] / items if items else 0.0
+            }
+
+    def close(self):
+        """Stop the worker thread once queued items have been processed"""
+        with self._lock:
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
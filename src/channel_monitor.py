@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .analyzer import VideoAnalyzer
+from .youtube_api import YouTubeAPI
+
+logger = logging.getLogger(__name__)
+
+# Passed down the stages once the playlist is exhausted
+_END = object()
+
+
+class ChannelBackfill:
+    """
+    Analyzes a channel's past uploads.
+
+    Pages through the channel's uploads playlist and skips videos that are already
+    scored. The rest go through three stages, each on its own thread, joined by
+    bounded queues:
+    - fetch: details in bulk and transcripts concurrently, skipped for videos
+      whose transcript is already stored
+    - windowing: transcript to tokenized windows
+    - inference: scoring and saving results
+    The network-bound fetches for one page overlap the CPU-bound windowing and
+    inference for earlier ones. The bounded queues keep a fast stage from
+    running far ahead of a slow one.
+
+    After the last page whose videos have all finished, the next page token is
+    saved, so an interrupted backfill resumes from there. Videos that failed on
+    those pages are saved with it and retried first when the backfill resumes.
+    """
+
+    def __init__(self, youtube_api: YouTubeAPI, analyzer: VideoAnalyzer, state_dir: str = "data/backfill",
+                 threshold: float = 0.5, results_dir: str = "data/processed", max_queued_pages: int = 2,
+                 max_queued_videos: int = 32):
+        self.youtube_api = youtube_api
+        self.store = youtube_api.store
+        self.analyzer = analyzer
+        self.state_dir = state_dir
+        self.threshold = threshold
+        self.results_dir = results_dir
+        self.max_queued_pages = max_queued_pages
+        self.max_queued_videos = max_queued_videos
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _state_file(self, channel_id: str) -> str:
+        return os.path.join(self.state_dir, f"{channel_id}.json")
+
+    def load_state(self, channel_id: str) -> Optional[Dict]:
+        """Saved progress of a channel's backfill, if any"""
+        state_file = self._state_file(channel_id)
+        if not os.path.exists(state_file):
+            return None
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._state['updated_at'] = time.time()
+        state_file = self._state_file(self._state['channel_id'])
+        tmp_file = f"{state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_file, state_file)
+
+    def run(self, channel_id: str, max_videos: Optional[int] = None, restart: bool = False,
+            progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Backfill a channel, resuming from its saved page token unless restart is set
+        Videos saved as failed by the previous run are retried before listing resumes.
+        A backfill that had completed starts again from the newest uploads, skipping
+        the videos it already scored.
+        Args:
+            channel_id: YouTube channel ID
+            max_videos: Stop listing after this many videos, rounded up to a whole page
+            restart: Ignore saved progress
+            progress: Called with a copy of the counters whenever a video finishes
+        Returns:
+            Counters: listed (including retried failures), skipped (already scored),
+            missing (no details), no_transcript, analyzed and failed
+        Raises:
+            ValueError: If the channel does not exist
+        """
+        state = None if restart else self.load_state(channel_id)
+        if state is None or state.get('completed'):
+            playlist_id = self.youtube_api.get_uploads_playlist_id(channel_id)
+            if playlist_id is None:
+                raise ValueError(f"Channel {channel_id} not found")
+            state = {'channel_id': channel_id, 'playlist_id': playlist_id, 'page_token': None,
+                     'pages': 0, 'completed': False, 'failed': []}
+        # Failures that still fail are saved again once the retry finishes
+        retry = state.get('failed', [])
+        state['failed'] = []
+        self._state = state
+        self._stats = dict.fromkeys(('listed', 'skipped', 'missing', 'no_transcript', 'analyzed', 'failed'), 0)
+        self._progress = progress
+        # Per page index: videos not finished yet, the ones that failed, and the token of
+        # the page after it. Page 0 holds the retried failures, if any
+        self._pages = {}
+        self._next_commit = 0
+        self._stop.clear()
+
+        fetch_queue = queue.Queue(self.max_queued_pages)
+        window_queue = queue.Queue(self.max_queued_videos)
+        inference_queue = queue.Queue(self.max_queued_videos)
+        stages = [
+            threading.Thread(target=self._fetch_stage, args=(fetch_queue, window_queue), name='backfill-fetch'),
+            threading.Thread(target=self._window_stage, args=(window_queue, inference_queue), name='backfill-window'),
+            threading.Thread(target=self._inference_stage, args=(inference_queue,), name='backfill-inference')
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            first_page = 0
+            if retry:
+                self._dispatch(0, retry, state['page_token'], fetch_queue, window_queue, retry=True)
+                first_page = 1
+            self._list_pages(state['playlist_id'], state['page_token'], max_videos, fetch_queue, window_queue,
+                             first_page)
+        except BaseException:
+            # Let the stages drain without doing more work; progress so far stays saved
+            self._stop.set()
+            raise
+        finally:
+            fetch_queue.put(_END)
+            for stage in stages:
+                stage.join()
+        return dict(self._stats)
+
+    def stop(self):
+        """Stop listing and processing; finished pages stay saved for resuming"""
+        self._stop.set()
+
+    def _list_pages(self, playlist_id: str, page_token: Optional[str], max_videos: Optional[int],
+                    fetch_queue: queue.Queue, window_queue: queue.Queue, page_index: int = 0):
+        while not self._stop.is_set():
+            video_ids, next_token = self.youtube_api.get_playlist_page(playlist_id, page_token)
+            self._dispatch(page_index, video_ids, next_token, fetch_queue, window_queue)
+            page_token = next_token
+            page_index += 1
+            if page_token is None or (max_videos and self._stats['listed'] >= max_videos):
+                return
+
+    def _dispatch(self, page_index: int, video_ids, next_token: Optional[str], fetch_queue: queue.Queue,
+                  window_queue: queue.Queue, retry: bool = False):
+        video_ids = list(dict.fromkeys(video_ids))
+        # Compare with what is stored: scored videos are done, and stored transcripts need no fetch
+        scored = {video_id for video_id in video_ids if self.analyzer.has_scores(video_id)}
+        pending = [video_id for video_id in video_ids if video_id not in scored]
+        stored = self.store.existing(pending, with_transcript=True)
+        with self._lock:
+            self._pages[page_index] = {'remaining': len(video_ids), 'failed': [], 'next_token': next_token,
+                                       'retry': retry}
+            self._stats['listed'] += len(video_ids)
+            # An empty page has nothing to finish
+            self._commit()
+        for video_id in scored:
+            self._finish(page_index, video_id, 'skipped')
+
+        for video_id in pending:
+            if video_id in stored:
+                window_queue.put((page_index, video_id))
+        to_fetch = [video_id for video_id in pending if video_id not in stored]
+        if to_fetch:
+            fetch_queue.put((page_index, to_fetch))
+
+    def _fetch_stage(self, fetch_queue: queue.Queue, window_queue: queue.Queue):
+        while True:
+            item = fetch_queue.get()
+            if item is _END:
+                window_queue.put(_END)
+                return
+            page_index, video_ids = item
+            if self._stop.is_set():
+                continue
+            try:
+                saved = self.youtube_api.save_video_data_many(video_ids)
+            except Exception:
+                logger.exception(f"Backfill fetch of {len(video_ids)} videos failed")
+                saved = None
+            # Unsaved videos whose details were stored had their transcript fetch fail
+            stored = self.store.existing([video_id for video_id in video_ids if not saved[video_id]]) if saved else set()
+            for video_id in video_ids:
+                if saved is None or video_id in stored:
+                    self._finish(page_index, video_id, 'failed')
+                elif saved[video_id]:
+                    window_queue.put((page_index, video_id))
+                else:
+                    self._finish(page_index, video_id, 'missing')
+
+    def _window_stage(self, window_queue: queue.Queue, inference_queue: queue.Queue):
+        while True:
+            item = window_queue.get()
+            if item is _END:
+                inference_queue.put(_END)
+                return
+            page_index, video_id = item
+            if self._stop.is_set():
+                continue
+            try:
+                transcript, windows = self.analyzer.prepare_windows(video_id)
+            except Exception:
+                logger.exception(f"Backfill windowing of {video_id} failed")
+                self._finish(page_index, video_id, 'failed')
+                continue
+            if windows:
+                inference_queue.put((page_index, video_id, transcript, windows))
+            else:
+                self._finish(page_index, video_id, 'no_transcript')
+
+    def _inference_stage(self, inference_queue: queue.Queue):
+        while True:
+            item = inference_queue.get()
+            if item is _END:
+                return
+            page_index, video_id, transcript, windows = item
+            if self._stop.is_set():
+                continue
+            try:
+                scores = self.analyzer.score_prepared(video_id, transcript, windows)
+                self.analyzer.save_results(self.analyzer.apply_threshold(scores, self.threshold), self.results_dir)
+                outcome = 'analyzed'
+            except Exception:
+                logger.exception(f"Backfill analysis of {video_id} failed")
+                outcome = 'failed'
+            self._finish(page_index, video_id, outcome)
+
+    def _finish(self, page_index: int, video_id: str, outcome: str):
+        """Count a finished video and save progress past every fully finished page"""
+        with self._lock:
+            self._stats[outcome] += 1
+            page = self._pages[page_index]
+            page['remaining'] -= 1
+            if outcome == 'failed':
+                page['failed'].append(video_id)
+            self._commit()
+            stats = dict(self._stats)
+        if self._progress is not None:
+            self._progress(stats)
+
+    def _commit(self):
+        # Called with the lock held
+        while self._next_commit in self._pages and self._pages[self._next_commit]['remaining'] == 0:
+            page = self._pages.pop(self._next_commit)
+            self._state['failed'].extend(page['failed'])
+            if not page['retry']:
+                self._state['page_token'] = page['next_token']
+                self._state['pages'] += 1
+                self._state['completed'] = page['next_token'] is None
+            self._save_state()
+            self._next_commit += 1
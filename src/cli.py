@@ -4,9 +4,20 @@ import os
 import time
 import logging
 import asyncio
-from analyzer import VideoAnalyzer
-from data_collector import DataCollector
-from pubsubhubbub import PubSubHubbub
+import json
+import random
+from .analyzer import VideoAnalyzer
+from .channel_monitor import ChannelBackfill
+from .data_collector import DataCollector
+from .data_processor import DataProcessor
+from .distributed import is_main_process, launch
+from .model import BACKENDS, DEFAULT_BASE_MODEL, EXPORT_FILES, ModelTrainer, compare_backends, export_model
+from .prefilter import LexicalPrefilter
+from .pubsubhubbub import PubSubHubbub
+from .score_cache import ScoreCache
+from .shards import ShardWriter, create_dataloader
+from .video_store import VideoStore
+from .youtube_api import YouTubeAPI
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 logger = logging.getLogger(__name__)
@@ -17,7 +28,10 @@ def print_progress(message, end="\r"):
 def subscribe_channel(channel_id):
     pubsub = PubSubHubbub()
     async def run():
-        result = await pubsub.subscribe_to_channel(channel_id)
+        try:
+            result = await pubsub.subscribe_to_channel(channel_id)
+        finally:
+            await pubsub.close()
         if result:
             print(f"[SUCCESS] Subscribed to channel {channel_id}.")
         else:
@@ -27,13 +41,171 @@ def subscribe_channel(channel_id):
 def unsubscribe_channel(channel_id):
     pubsub = PubSubHubbub()
     async def run():
-        result = await pubsub.unsubscribe_from_channel(channel_id)
+        try:
+            result = await pubsub.unsubscribe_from_channel(channel_id)
+        finally:
+            await pubsub.close()
         if result:
             print(f"[SUCCESS] Unsubscribed from channel {channel_id}.")
         else:
             print(f"[ERROR] Failed to unsubscribe from channel {channel_id}.")
     asyncio.run(run())
 
+def read_channel_ids(channel_file):
+    """Channel IDs from a file, one per line; blank lines and # comments are skipped"""
+    with open(channel_file, 'r', encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+def bulk_subscription(args, mode):
+    channel_ids = read_channel_ids(args.channel_file)
+    if not channel_ids:
+        print(f"[ERROR] No channel IDs in '{args.channel_file}'.")
+        sys.exit(1)
+    # Outcomes are reported below; per-request logs would drown the progress line
+    logging.getLogger(PubSubHubbub.__module__).setLevel(logging.ERROR)
+    pubsub = PubSubHubbub(max_connections=args.concurrency)
+    print(f"[INFO] Sending {mode} requests for {len(channel_ids)} channels to {pubsub.hub_url}...")
+
+    started = time.time()
+    counts = {'ok': 0, 'failed': 0}
+    def report(channel_id, outcome):
+        counts['ok' if outcome['ok'] else 'failed'] += 1
+        done = counts['ok'] + counts['failed']
+        print_progress(f"[INFO] {done}/{len(channel_ids)} channels: {counts['ok']} succeeded, "
+                       f"{counts['failed']} failed ({done / max(time.time() - started, 1e-9):.1f}/s)   ")
+    async def run():
+        try:
+            return await pubsub.bulk_request(channel_ids, mode, max_attempts=args.max_attempts,
+                                             request_timeout=args.timeout, progress=report)
+        finally:
+            await pubsub.close()
+    outcomes = asyncio.run(run())
+    print()
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for channel_id, outcome in outcomes.items():
+                f.write(json.dumps({'channel_id': channel_id, **outcome}) + "\n")
+        print(f"[INFO] Wrote per-channel outcomes to {args.output}")
+
+    failed = {channel_id: outcome for channel_id, outcome in outcomes.items() if not outcome['ok']}
+    retried = sum(1 for outcome in outcomes.values() if outcome['attempts'] > 1)
+    print(f"[SUCCESS] {len(outcomes) - len(failed)}/{len(outcomes)} channels {mode}d in "
+          f"{time.time() - started:.1f}s ({retried} needed retries).")
+    if failed:
+        for channel_id, outcome in list(failed.items())[:20]:
+            print(f"[ERROR] {channel_id}: {outcome['error']} after {outcome['attempts']} attempt(s)")
+        if len(failed) > 20:
+            print(f"[ERROR] ... and {len(failed) - 20} more")
+        sys.exit(1)
+
+def export_checkpoint(model_path, export_format, parity_videos):
+    print_progress(f"[INFO] Exporting {model_path} as {export_format}...", end="\n")
+    output_file = export_model(model_path, export_format)
+    print(f"[SUCCESS] Exported model to {output_file}")
+
+    # Parity and latency against the fp32 model on locally collected transcripts
+    processor = DataProcessor()
+    windows = []
+    for video_id in processor.store.iter_video_ids(with_transcript=True):
+        if parity_videos <= 0:
+            break
+        windows.extend(processor.process_video_segments(video_id))
+        parity_videos -= 1
+    if not windows:
+        print("[WARNING] No stored transcripts, skipping the parity check.")
+        return
+
+    print_progress(f"[INFO] Comparing backends on {len(windows)} windows...", end="\n")
+    report = compare_backends(model_path, windows, backends=('torch', 'quantized', export_format))
+    print(f"{'backend':<10} {'max diff':>10} {'agreement':>10} {'latency ms':>11} {'windows/s':>10}")
+    for backend, row in report.items():
+        print(f"{backend:<10} {row['max_abs_diff']:>10.4f} {row['label_agreement']:>10.2%} "
+              f"{row['latency_ms']:>11.1f} {row['windows_per_sec']:>10.1f}")
+
+def shard_dataset(labeled_file, output_dir, tokenizer_name, max_length, shard_size, val_fraction):
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    writers = {
+        split: ShardWriter(os.path.join(output_dir, split), tokenizer, max_length=max_length, shard_size=shard_size)
+        for split in ('train', 'val')
+    }
+    # The file is streamed, so each window is assigned on its own; the fixed seed keeps the split
+    # stable across runs, but it is not the split prepare_training_data's train_test_split makes
+    rng = random.Random(42)
+    with open(labeled_file, 'r', encoding='utf-8') as f:
+        for count, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            example = json.loads(line)
+            split = 'val' if rng.random() < val_fraction else 'train'
+            writers[split].add(example['text'], example['is_sponsored'])
+            if count % 10000 == 0:
+                print_progress(f"[INFO] Tokenized {count} windows...")
+    for split, writer in writers.items():
+        manifest = writer.close()
+        print(f"[SUCCESS] {split}: {manifest['examples']} windows in {len(manifest['shards'])} shards "
+              f"({manifest['dtype']}) at {writer.output_dir}")
+
+def train_model(args):
+    # Runs in every training process when --nproc > 1
+    trainer = ModelTrainer(model_dir=args.model_dir, base_model=args.base_model, num_threads=args.threads)
+    train_loader = create_dataloader(os.path.join(args.shard_dir, 'train'), batch_size=args.batch_size,
+                                     num_workers=args.workers)
+    val_loader = create_dataloader(os.path.join(args.shard_dir, 'val'), batch_size=args.batch_size,
+                                   shuffle=False, num_workers=args.workers, distributed_sampling=False)
+    if is_main_process():
+        print_progress(f"[INFO] Training on {len(train_loader.dataset)} windows with {args.nproc} process(es) "
+                       f"(effective batch size {args.batch_size * args.grad_accum * args.nproc})...", end="\n")
+    history = trainer.train(train_loader, val_loader, epochs=args.epochs, bf16=args.bf16,
+                            grad_accumulation_steps=args.grad_accum, checkpoint_dir=args.checkpoint_dir,
+                            checkpoint_every=args.checkpoint_every)
+    if not is_main_process():
+        return
+    print(f"{'epoch':>5} {'train loss':>11} {'val loss':>9} {'f1':>6} {'samples/s':>10}")
+    for row in history:
+        print(f"{row['epoch']:>5} {row['train_loss']:>11.4f} {row['val_loss']:>9.4f} {row['f1']:>6.3f} "
+              f"{row['samples_per_sec']:>10.1f}")
+
+def train_prefilter(labeled_file, output, max_recall_loss):
+    with open(labeled_file, 'r', encoding='utf-8') as f:
+        labeled_data = [json.loads(line) for line in f if line.strip()]
+    print_progress(f"[INFO] Training prefilter on {len(labeled_data)} windows...", end="\n")
+    prefilter = LexicalPrefilter()
+    report = prefilter.fit(labeled_data, max_recall_loss=max_recall_loss)
+    prefilter.save(output)
+    print(f"[SUCCESS] Saved prefilter {prefilter.version} to {output}")
+    print(f"  Skip threshold: {report['skip_threshold']:.4f}")
+    print(f"  Held-out windows skipped: {report['skipped_fraction']:.1%}")
+    print(f"  Held-out recall loss: {report['recall_loss']:.2%} (budget {report['max_recall_loss']:.2%})")
+
+def backfill_channel(args):
+    store = VideoStore()
+    analyzer = VideoAnalyzer(model_path=args.model_path, backend=args.backend, score_cache=ScoreCache(), store=store,
+                             analysis_mode=args.mode)
+    backfill = ChannelBackfill(YouTubeAPI(store=store), analyzer, state_dir=args.state_dir, threshold=args.threshold)
+    state = None if args.restart else backfill.load_state(args.channel_id)
+    if state and not state.get('completed'):
+        retrying = f", retrying {len(state['failed'])} failed videos" if state.get('failed') else ""
+        print(f"[INFO] Resuming backfill of {args.channel_id} after {state['pages']} pages{retrying}...")
+    else:
+        print(f"[INFO] Backfilling {args.channel_id} from its newest upload...")
+
+    started = time.time()
+    def report(stats):
+        done = sum(stats.values()) - stats['listed']
+        print_progress(f"[INFO] {done}/{stats['listed']} videos: {stats['analyzed']} analyzed, "
+                       f"{stats['skipped']} already analyzed, {stats['no_transcript']} without transcript, "
+                       f"{stats['missing']} missing, {stats['failed']} failed ({done / max(time.time() - started, 1e-9):.1f}/s)   ")
+    stats = backfill.run(args.channel_id, max_videos=args.max_videos, restart=args.restart, progress=report)
+    state = backfill.load_state(args.channel_id)
+    print(f"\n[SUCCESS] Backfill {'complete' if state and state['completed'] else 'paused'}: "
+          f"{stats['analyzed']} videos analyzed in {time.time() - started:.1f}s.")
+    if stats['failed']:
+        print(f"[WARNING] {stats['failed']} videos failed; run the backfill again to retry them.")
+
 def main():
     parser = argparse.ArgumentParser(description="YouTube Sponsorship Detector CLI")
     subparsers = parser.add_subparsers(dest="command")
@@ -43,6 +215,53 @@ def main():
     analyze_parser.add_argument("video_id", type=str, help="YouTube video ID to analyze")
     analyze_parser.add_argument("--threshold", type=float, default=0.5, help="Confidence threshold for sponsorship detection (default: 0.5)")
     analyze_parser.add_argument("--model-path", type=str, default=None, help="Path to trained model directory")
+    analyze_parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Inference backend (default: torch)")
+    analyze_parser.add_argument("--refresh", action="store_true", help="Re-score the stored video data even if scores are stored")
+    analyze_parser.add_argument("--prefilter", type=str, default=None, help="Lexical prefilter file; windows it rules out skip the transformer")
+    analyze_parser.add_argument("--mode", choices=("exhaustive", "adaptive"), default="exhaustive", help="Score every window, or search coarse-to-fine around likely sponsor reads (default: exhaustive)")
+    analyze_parser.add_argument("--coarse-window", type=int, default=32, help="Most segments per coarse block in adaptive mode; blocks also fit the token limit (default: 32)")
+    analyze_parser.add_argument("--trigger-threshold", type=float, default=0.2, help="Coarse score that triggers fine windows in adaptive mode (default: 0.2)")
+    analyze_parser.add_argument("--description-hints", choices=("off", "focus", "trust"), default="off", help="Use sponsor chapters in the description: run the model only inside them (focus) or take them as the result (trust) (default: off)")
+
+    # Export command
+    export_parser = subparsers.add_parser("export", help="Export a trained model for ONNX Runtime inference")
+    export_parser.add_argument("model_path", type=str, help="Path to trained model directory")
+    export_parser.add_argument("--format", choices=list(EXPORT_FILES), default="onnx", help="Export format (default: onnx)")
+    export_parser.add_argument("--parity-videos", type=int, default=20, help="Stored videos used for the parity check (default: 20)")
+
+    # Shard command
+    shard_parser = subparsers.add_parser("shard", help="Tokenize labeled windows into memory-mapped training shards")
+    shard_parser.add_argument("labeled_file", type=str, help="JSON Lines file of {\"text\": ..., \"is_sponsored\": 0/1} windows")
+    shard_parser.add_argument("--output", type=str, default="data/shards", help="Output directory; train/ and val/ are created inside (default: data/shards)")
+    shard_parser.add_argument("--tokenizer", type=str, default="distilbert-base-uncased", help="Tokenizer name or path (default: distilbert-base-uncased)")
+    shard_parser.add_argument("--max-length", type=int, default=512, help="Maximum tokens per window (default: 512)")
+    shard_parser.add_argument("--shard-size", type=int, default=100000, help="Windows per shard (default: 100000)")
+    shard_parser.add_argument("--val-fraction", type=float, default=0.2, help="Fraction of windows for validation (default: 0.2)")
+
+    # Prefilter command
+    prefilter_parser = subparsers.add_parser("prefilter", help="Train the lexical prefilter that lets windows skip the transformer")
+    prefilter_parser.add_argument("labeled_file", type=str, help="JSON Lines file of {\"text\": ..., \"is_sponsored\": 0/1} windows")
+    prefilter_parser.add_argument("--output", type=str, default="models/prefilter.joblib", help="Output file (default: models/prefilter.joblib)")
+    prefilter_parser.add_argument("--max-recall-loss", type=float, default=0.01, help="Largest fraction of sponsored windows the prefilter may skip (default: 0.01)")
+
+    # Train command
+    train_parser = subparsers.add_parser("train", help="Train the detector on shards written by the shard command")
+    train_parser.add_argument("shard_dir", type=str, help="Directory with train/ and val/ shards")
+    train_parser.add_argument("--base-model", type=str, default=DEFAULT_BASE_MODEL, help=f"Pretrained base model (default: {DEFAULT_BASE_MODEL})")
+    train_parser.add_argument("--model-dir", type=str, default="models/saved_models", help="Where the best model is saved (default: models/saved_models)")
+    train_parser.add_argument("--epochs", type=int, default=3, help="Number of epochs (default: 3)")
+    train_parser.add_argument("--batch-size", type=int, default=16, help="Windows per batch (default: 16)")
+    train_parser.add_argument("--grad-accum", type=int, default=1, help="Batches per optimizer step (default: 1)")
+    train_parser.add_argument("--bf16", action="store_true", help="Use bf16 autocast where the hardware supports it")
+    train_parser.add_argument("--threads", type=int, default=None, help="Intra-op threads per process (default: CPU count / nproc)")
+    train_parser.add_argument("--nproc", type=int, default=1, help="Data-parallel training processes (gloo backend, default: 1)")
+    train_parser.add_argument("--workers", type=int, default=2, help="DataLoader worker processes (default: 2)")
+    train_parser.add_argument("--checkpoint-dir", type=str, default=None, help="Write resumable checkpoints here and resume from the latest one")
+    train_parser.add_argument("--checkpoint-every", type=int, default=None, help="Also checkpoint every N optimizer steps")
+
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Import per-video JSON files from data/raw into the video store")
+    migrate_parser.add_argument("--raw-dir", type=str, default="data/raw", help="Directory with *_details.json files (default: data/raw)")
 
     # Subscribe command
     subscribe_parser = subparsers.add_parser("subscribe", help="Subscribe to a YouTube channel for PubSubHubbub notifications")
@@ -52,6 +271,25 @@ def main():
     unsubscribe_parser = subparsers.add_parser("unsubscribe", help="Unsubscribe from a YouTube channel for PubSubHubbub notifications")
     unsubscribe_parser.add_argument("channel_id", type=str, help="YouTube channel ID to unsubscribe")
 
+    # Backfill command
+    for mode in ("subscribe", "unsubscribe"):
+        bulk_parser = subparsers.add_parser(f"bulk-{mode}", help=f"Bulk {mode} channels listed in a file, one ID per line")
+        bulk_parser.add_argument("channel_file", type=str, help="File of YouTube channel IDs; blank lines and # comments are skipped")
+        bulk_parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once (default: 20)")
+        bulk_parser.add_argument("--max-attempts", type=int, default=4, help="Attempts per channel; 5xx responses and timeouts are retried (default: 4)")
+        bulk_parser.add_argument("--timeout", type=float, default=30.0, help="Timeout per request in seconds (default: 30)")
+        bulk_parser.add_argument("--output", type=str, default=None, help="Write per-channel outcomes to this JSON Lines file")
+
+    backfill_parser = subparsers.add_parser("backfill", help="Analyze a channel's past uploads, resuming where the last run stopped")
+    backfill_parser.add_argument("channel_id", type=str, help="YouTube channel ID to backfill")
+    backfill_parser.add_argument("--model-path", type=str, default=None, help="Path to trained model directory")
+    backfill_parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Inference backend (default: torch)")
+    backfill_parser.add_argument("--mode", choices=("exhaustive", "adaptive"), default="exhaustive", help="Analysis mode (default: exhaustive)")
+    backfill_parser.add_argument("--threshold", type=float, default=0.5, help="Confidence threshold for saved results (default: 0.5)")
+    backfill_parser.add_argument("--max-videos", type=int, default=None, help="Stop after listing this many videos, rounded up to a page of 50")
+    backfill_parser.add_argument("--state-dir", type=str, default="data/backfill", help="Where progress is saved (default: data/backfill)")
+    backfill_parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the newest upload")
+
     args = parser.parse_args()
 
     if args.command == "subscribe":
@@ -60,6 +298,99 @@ def main():
     elif args.command == "unsubscribe":
         unsubscribe_channel(args.channel_id)
         return
+    elif args.command in ("bulk-subscribe", "bulk-unsubscribe"):
+        if not os.path.exists(args.channel_file):
+            print(f"[ERROR] File '{args.channel_file}' does not exist.")
+            sys.exit(1)
+        if args.concurrency < 1 or args.max_attempts < 1:
+            print("[ERROR] Concurrency and max attempts must be at least 1.")
+            sys.exit(1)
+        try:
+            bulk_subscription(args, args.command.split("-", 1)[1])
+        except KeyboardInterrupt:
+            print("\n[INFO] Interrupted.")
+            sys.exit(1)
+        return
+    elif args.command == "shard":
+        if not os.path.exists(args.labeled_file):
+            print(f"[ERROR] File '{args.labeled_file}' does not exist.")
+            sys.exit(1)
+        if not (0.0 <= args.val_fraction < 1.0):
+            print("[ERROR] Validation fraction must be in [0, 1).")
+            sys.exit(1)
+        try:
+            shard_dataset(args.labeled_file, args.output, args.tokenizer, args.max_length,
+                          args.shard_size, args.val_fraction)
+        except Exception as e:
+            logger.exception("Shard error")
+            print(f"[ERROR] {str(e)}")
+            sys.exit(1)
+        return
+    elif args.command == "backfill":
+        if not (0.0 < args.threshold < 1.0):
+            print("[ERROR] Threshold must be between 0 and 1.")
+            sys.exit(1)
+        if args.model_path and not os.path.exists(args.model_path):
+            print(f"[ERROR] Model path '{args.model_path}' does not exist.")
+            sys.exit(1)
+        try:
+            backfill_channel(args)
+        except KeyboardInterrupt:
+            print("\n[INFO] Interrupted; finished pages are saved and the next run resumes from them.")
+            sys.exit(1)
+        except Exception as e:
+            logger.exception("Backfill error")
+            print(f"\n[ERROR] {str(e)}")
+            sys.exit(1)
+        return
+    elif args.command == "prefilter":
+        if not os.path.exists(args.labeled_file):
+            print(f"[ERROR] File '{args.labeled_file}' does not exist.")
+            sys.exit(1)
+        if not (0.0 <= args.max_recall_loss < 1.0):
+            print("[ERROR] Recall loss budget must be in [0, 1).")
+            sys.exit(1)
+        try:
+            train_prefilter(args.labeled_file, args.output, args.max_recall_loss)
+        except Exception as e:
+            logger.exception("Prefilter error")
+            print(f"[ERROR] {str(e)}")
+            sys.exit(1)
+        return
+    elif args.command == "train":
+        if not os.path.exists(os.path.join(args.shard_dir, 'train', 'manifest.json')):
+            print(f"[ERROR] No train shards found in '{args.shard_dir}'. Run the shard command first.")
+            sys.exit(1)
+        if args.grad_accum < 1 or args.nproc < 1:
+            print("[ERROR] Gradient accumulation steps and process count must be at least 1.")
+            sys.exit(1)
+        try:
+            launch(train_model, args.nproc, args=(args,), threads_per_process=args.threads)
+        except Exception as e:
+            logger.exception("Training error")
+            print(f"[ERROR] {str(e)}")
+            sys.exit(1)
+        return
+    elif args.command == "migrate":
+        if not os.path.isdir(args.raw_dir):
+            print(f"[ERROR] Directory '{args.raw_dir}' does not exist.")
+            sys.exit(1)
+        store = VideoStore()
+        print_progress(f"[INFO] Importing videos from {args.raw_dir}...", end="\n")
+        imported = store.migrate_from_dir(args.raw_dir)
+        print(f"[SUCCESS] Imported {imported} videos into {store.db_path} ({store.count()} stored).")
+        return
+    elif args.command == "export":
+        if not os.path.exists(os.path.join(args.model_path, 'model.pt')):
+            print(f"[ERROR] No model.pt found in '{args.model_path}'.")
+            sys.exit(1)
+        try:
+            export_checkpoint(args.model_path, args.format, args.parity_videos)
+        except Exception as e:
+            logger.exception("Export error")
+            print(f"[ERROR] {str(e)}")
+            sys.exit(1)
+        return
     elif args.command == "analyze":
         # Input validation
         if not args.video_id or len(args.video_id) < 5:
@@ -74,23 +405,29 @@ def main():
 
         try:
             print_progress("[INFO] Initializing analyzer...        ")
-            analyzer = VideoAnalyzer(model_path=args.model_path)
+            prefilter = LexicalPrefilter.load(args.prefilter) if args.prefilter else None
+            analyzer = VideoAnalyzer(model_path=args.model_path, backend=args.backend, score_cache=ScoreCache(),
+                                     prefilter=prefilter, analysis_mode=args.mode,
+                                     coarse_window_size=args.coarse_window, trigger_threshold=args.trigger_threshold,
+                                     description_hints=args.description_hints)
             collector = DataCollector()
 
-            print_progress("[INFO] Collecting video data...      ")
-            if not collector.process_video_data(args.video_id):
-                logger.error("Failed to collect video data.")
-                print("\n[ERROR] Failed to collect video data. Exiting.")
-                sys.exit(1)
+            if args.refresh or not analyzer.has_scores(args.video_id):
+                print_progress("[INFO] Collecting video data...      ")
+                if not collector.process_video_data(args.video_id):
+                    logger.error("Failed to collect video data.")
+                    print("\n[ERROR] Failed to collect video data. Exiting.")
+                    sys.exit(1)
 
             print_progress("[INFO] Analyzing video...            ")
-            results = analyzer.analyze_video(args.video_id, args.threshold)
+            results = analyzer.analyze_video(args.video_id, args.threshold, refresh=args.refresh)
             print("\n[INFO] Analysis complete.")
 
             if results["status"] != "success":
                 logger.error(f"Analysis failed: {results.get('message', 'Unknown error')}")
                 print(f"[ERROR] {results.get('message', 'Unknown error')}")
                 sys.exit(1)
+            output_file = analyzer.save_results(results)
 
             # Result visualization
             print(f"\n[RESULT] Sponsored Segments for Video ID: {args.video_id}")
@@ -99,7 +436,13 @@ def main():
             else:
                 for idx, region in enumerate(results["sponsored_regions"], 1):
                     print(f"  {idx}. Start: {region['start_time']}s, End: {region['end_time']}s, Confidence: {region['confidence']:.2f}")
-            print(f"\n[INFO] Full analysis saved to: data/processed/{args.video_id}_analysis.json")
+            description = results.get("description")
+            if description:
+                for chapter in description["sponsor_chapters"]:
+                    print(f"  Description chapter: {chapter['title']} at {chapter['start_time']}s")
+                for link in description["sponsor_links"]:
+                    print(f"  Description sponsor link: {', '.join(link['urls'])}" + (f" (code {link['code']})" if link["code"] else ""))
+            print(f"\n[INFO] Full analysis saved to: {output_file}")
         except Exception as e:
             logger.exception("CLI error")
             print(f"[ERROR] {str(e)}")
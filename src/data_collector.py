@@ -1,46 +1,56 @@
 from typing import Dict, Optional
 import xml.etree.ElementTree as ET
-from datetime import datetime
-import json
 import os
+from .fetch_cache import FetchCache
+from .video_store import VideoStore
 from .youtube_api import YouTubeAPI
 
 class DataCollector:
-    def __init__(self):
-        self.youtube_api = YouTubeAPI()
-        self.raw_data_dir = "data/raw"
+    def __init__(self, store: Optional[VideoStore] = None, fetch_cache: Optional[FetchCache] = None):
+        self.store = store or VideoStore()
+        self.youtube_api = YouTubeAPI(store=self.store, fetch_cache=fetch_cache)
         self.processed_data_dir = "data/processed"
         
         # Ensure directories exist
-        os.makedirs(self.raw_data_dir, exist_ok=True)
         os.makedirs(self.processed_data_dir, exist_ok=True)
 
-    def process_notification(self, notification_data: bytes) -> Optional[str]:
+    def extract_video_id(self, notification_data: bytes) -> Optional[str]:
         """
-        Process incoming notification from PubSubHubbub
-        Returns video ID if successfully processed, None otherwise
+        Extract the video ID from a PubSubHubbub notification without fetching anything
+        Returns video ID if found, None if the XML is invalid or has no video entry
         """
         try:
             # Parse XML content
             root = ET.fromstring(notification_data)
+        except ET.ParseError as e:
+            print(f"Error parsing notification: {str(e)}")
+            return None
+        
+        # Find video ID from the feed
+        # XML namespace for Atom feed
+        ns = {'atom': 'http://www.w3.org/2005/Atom'}
+        
+        # Extract video ID from entry link
+        entry = root.find('atom:entry', ns)
+        if entry is None:
+            return None
             
-            # Find video ID from the feed
-            # XML namespace for Atom feed
-            ns = {'atom': 'http://www.w3.org/2005/Atom'}
-            
-            # Extract video ID from entry link
-            entry = root.find('atom:entry', ns)
-            if entry is None:
-                return None
-                
-            video_link = entry.find('atom:link', ns)
-            if video_link is None:
-                return None
-                
-            # Extract video ID from link
-            video_url = video_link.get('href', '')
-            video_id = video_url.split('watch?v=')[-1]
+        video_link = entry.find('atom:link', ns)
+        if video_link is None:
+            return None
             
+        # Extract video ID from link
+        video_url = video_link.get('href', '')
+        video_id = video_url.split('watch?v=')[-1]
+        return video_id or None
+
+    def process_notification(self, notification_data: bytes) -> Optional[str]:
+        """
+        Process incoming notification from PubSubHubbub
+        Returns video ID if successfully processed, None otherwise
+        """
+        try:
+            video_id = self.extract_video_id(notification_data)
             if video_id:
                 # Collect and save video data
                 self.youtube_api.save_video_data(video_id)
@@ -52,41 +62,23 @@ class DataCollector:
             print(f"Error processing notification: {str(e)}")
             return None
 
+    def collect_video(self, video_id: str) -> bool:
+        """
+        Fetch a video's details and transcript and build its processed record
+        Returns True if both steps succeeded
+        """
+        if not self.youtube_api.save_video_data(video_id):
+            return False
+        return self.process_video_data(video_id)
+
     def process_video_data(self, video_id: str) -> bool:
         """
         Process collected video data to determine sponsorship
+        The stored record already combines details and transcript, so this marks it processed
         """
         try:
-            # Read the collected data
-            details_file = os.path.join(self.raw_data_dir, f"{video_id}_details.json")
-            transcript_file = os.path.join(self.raw_data_dir, f"{video_id}_transcript.json")
-            
-            if not os.path.exists(details_file):
-                return False
-                
-            with open(details_file, 'r', encoding='utf-8') as f:
-                video_details = json.load(f)
-                
-            transcript = None
-            if os.path.exists(transcript_file):
-                with open(transcript_file, 'r', encoding='utf-8') as f:
-                    transcript = json.load(f)
-            
-            # Combine data into a single processed record
-            processed_data = {
-                'video_id': video_id,
-                'processed_at': datetime.utcnow().isoformat(),
-                'video_details': video_details,
-                'transcript': transcript
-            }
-            
-            # Save processed data
-            output_file = os.path.join(self.processed_data_dir, f"{video_id}_processed.json")
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(processed_data, f, ensure_ascii=False, indent=2)
-                
-            return True
+            return self.store.mark_processed(video_id)
             
         except Exception as e:
             print(f"Error processing video data for {video_id}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
@@ -1,63 +1,163 @@
 import os
-import json
 import pandas as pd
-from typing import List, Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import re
 from sklearn.model_selection import train_test_split
 from transformers import AutoTokenizer
+from .transcript import CompactTranscript, as_compact
+from .video_store import VideoStore
+
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+# URLs (http\S+ also covers https\S+) and punctuation removed in one pass. A punctuation
+# match is a single character that cannot start a URL, so this matches removing URLs first.
+CLEANUP_PATTERN = re.compile(r'http\S+|www\S+|[^\w\s]')
+# ASCII characters PUNCTUATION_PATTERN removes, as bytes.translate arguments. Bytes
+# translate and split run several times faster than their str counterparts. The table
+# maps every whitespace character to a space, because bytes.split() does not split on
+# \x1c-\x1f while str.split() does.
+ASCII_PUNCTUATION = bytes(c for c in range(128) if PUNCTUATION_PATTERN.match(chr(c)))
+ASCII_SPACES = bytes(32 if chr(c).isspace() else c for c in range(256))
+
+
+def clean_text(text: str) -> str:
+    """Clean and preprocess text data"""
+    # Convert to lowercase
+    text = text.lower()
+    if text.isascii() and 'http' not in text and 'www' not in text:
+        # No URLs: remove special characters and numbers, then extra whitespace
+        data = text.encode('ascii').translate(ASCII_SPACES, ASCII_PUNCTUATION)
+        return b' '.join(data.split()).decode('ascii')
+    # Remove URLs, special characters and numbers
+    text = CLEANUP_PATTERN.sub('', text)
+    # Remove extra whitespace
+    return ' '.join(text.split())
+
+
+def clean_texts(texts: List[str]) -> List[str]:
+    return [clean_text(text) for text in texts]
+
+
+def preprocess_texts(texts: Iterable[str], num_workers: int = 0, chunk_size: int = 20000) -> List[str]:
+    """
+    Clean many strings at once, with exactly the output of preprocess_text
+    Args:
+        texts: Strings to clean
+        num_workers: Worker processes to spread the work over; 0 cleans in this process
+        chunk_size: Strings per task sent to a worker
+    Returns:
+        Cleaned strings in input order
+    """
+    texts = list(texts)
+    if num_workers == 0 or len(texts) <= chunk_size:
+        return clean_texts(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return [text for chunk in executor.map(clean_texts, chunks) for text in chunk]
+
+
+# One store per worker process, opened on its first chunk. Keyed by PID too,
+# so a forked worker never reuses a connection inherited from its parent.
+_worker_stores: Dict[Tuple[int, str], VideoStore] = {}
+
+
+def _load_video_chunk(db_path: str, video_ids: List[str]) -> List[Dict]:
+    """Read, format and preprocess a chunk of videos inside a loader worker"""
+    key = (os.getpid(), db_path)
+    store = _worker_stores.get(key)
+    if store is None:
+        store = _worker_stores[key] = VideoStore(db_path)
+    records = []
+    for video_id in video_ids:
+        video = store.get_video(video_id)
+        record = DataProcessor._format_video_data(video) if video else None
+        if record:
+            record['processed_text'] = clean_text(record['transcript'])
+            records.append(record)
+    return records
+
 
 class DataProcessor:
-    def __init__(self, raw_data_dir: str = "data/raw", processed_data_dir: str = "data/processed"):
-        self.raw_data_dir = raw_data_dir
+    def __init__(self, store: Optional[VideoStore] = None, processed_data_dir: str = "data/processed", tokenizer=None):
+        self.store = store or VideoStore()
         self.processed_data_dir = processed_data_dir
-        self.tokenizer = AutoTokenizer.from_pretrained('distilbert-base-uncased')
+        self._tokenizer = tokenizer
+
+    @property
+    def tokenizer(self):
+        """Tokenizer shared with the model, loaded on first use if none was given"""
+        if self._tokenizer is None:
+            self._tokenizer = AutoTokenizer.from_pretrained('distilbert-base-uncased')
+        return self._tokenizer
         
     def load_raw_data(self) -> List[Dict]:
-        """Load all raw video data from the data directory"""
+        """Load all raw video data from the video store"""
         data = []
-        for filename in os.listdir(self.raw_data_dir):
-            if filename.endswith('_details.json'):
-                video_id = filename.replace('_details.json', '')
-                video_data = self._load_video_data(video_id)
-                if video_data:
-                    data.append(video_data)
+        for video in self.store.iter_videos():
+            video_data = self._format_video_data(video)
+            if video_data:
+                data.append(video_data)
         return data
 
     def _load_video_data(self, video_id: str) -> Dict:
         """Load details and transcript for a single video"""
-        details_file = os.path.join(self.raw_data_dir, f"{video_id}_details.json")
-        transcript_file = os.path.join(self.raw_data_dir, f"{video_id}_transcript.json")
+        video = self.store.get_video(video_id)
+        return self._format_video_data(video) if video else None
+
+    def iter_raw_data(self, chunk_size: int = 256, num_workers: Optional[int] = None,
+                      max_chunks_in_flight: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Stream all stored videos in chunks, read and preprocessed in worker processes
+        Memory stays bounded by the chunks in flight, whatever the corpus size.
+        Args:
+            chunk_size: Videos per chunk
+            num_workers: Worker processes (default: CPU count); 0 loads in this process
+            max_chunks_in_flight: Chunks submitted ahead of the consumer (default: 2 per worker)
+        Returns:
+            Iterator over lists of records with video_id, title, description,
+            transcript and processed_text (the preprocessed transcript), in store order
+        """
+        video_ids = self.store.iter_video_ids()
+        chunks = iter(lambda: list(islice(video_ids, chunk_size)), [])
+        if num_workers == 0:
+            for chunk in chunks:
+                yield _load_video_chunk(self.store.db_path, chunk)
+            return
         
+        num_workers = num_workers or os.cpu_count() or 1
+        max_chunks_in_flight = max_chunks_in_flight or 2 * num_workers
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            pending = []
+            for chunk in chunks:
+                pending.append(executor.submit(_load_video_chunk, self.store.db_path, chunk))
+                if len(pending) >= max_chunks_in_flight:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+    @staticmethod
+    def _format_video_data(video: Dict) -> Dict:
         try:
-            with open(details_file, 'r', encoding='utf-8') as f:
-                details = json.load(f)
-            
-            transcript = []
-            if os.path.exists(transcript_file):
-                with open(transcript_file, 'r', encoding='utf-8') as f:
-                    transcript = json.load(f)
-            
+            details = video['details']
+            transcript = video['transcript']
             return {
-                'video_id': video_id,
+                'video_id': video['video_id'],
                 'title': details['title'],
                 'description': details['description'],
-                'transcript': ' '.join([item['text'] for item in transcript])
+                'transcript': ' '.join(transcript.texts()) if transcript is not None else ''
             }
         except Exception as e:
-            print(f"Error loading data for video {video_id}: {str(e)}")
+            print(f"Error loading data for video {video['video_id']}: {str(e)}")
             return None
 
     def preprocess_text(self, text: str) -> str:
         """Clean and preprocess text data"""
-        # Convert to lowercase
-        text = text.lower()
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-        # Remove special characters and numbers
-        text = re.sub(r'[^\w\s]', '', text)
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        return text
+        return clean_text(text)
+
+    def preprocess_texts(self, texts: Iterable[str], num_workers: int = 0) -> List[str]:
+        """Clean many strings at once, optionally across worker processes"""
+        return preprocess_texts(texts, num_workers=num_workers)
 
     def prepare_training_data(self, labeled_data: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
@@ -68,7 +168,7 @@ class DataProcessor:
         df = pd.DataFrame(labeled_data)
         
         # Preprocess text
-        df['processed_text'] = df['text'].apply(self.preprocess_text)
+        df['processed_text'] = self.preprocess_texts(df['text'].tolist())
         
         # Split into training and validation sets
         train_df, val_df = train_test_split(df, test_size=0.2, random_state=42)
@@ -85,47 +185,142 @@ class DataProcessor:
             return_tensors='pt'
         )
 
-    def create_transcript_windows(self, transcript: List[Dict], window_size: int = 5, stride: int = 2) -> List[Dict]:
+    def create_transcript_windows(self, transcript: Union[CompactTranscript, List[Dict]], window_size: int = 5,
+                                  stride: int = 2) -> List[Dict]:
         """
         Create sliding windows over transcript segments for timestamp detection
         Args:
-            transcript: List of transcript segments with 'text' and 'start' time
+            transcript: CompactTranscript or list of segments with 'text', 'start' and 'duration'
             window_size: Number of segments to include in each window
             stride: Number of segments to move forward for next window
         Returns:
             List of windows with combined text and start/end times
         """
+        transcript = as_compact(transcript)
+        texts = transcript.texts()
+        starts = transcript.starts.tolist()
+        ends = transcript.ends().tolist()
         windows = []
-        for i in range(0, len(transcript), stride):
-            window_end = min(i + window_size, len(transcript))
-            window_segments = transcript[i:window_end]
-            if len(window_segments) < window_size:  # Skip incomplete windows
-                break
-                
-            window = {
-                'text': ' '.join([seg['text'] for seg in window_segments]),
-                'start_time': window_segments[0]['start'],
-                'end_time': window_segments[-1]['start'] + window_segments[-1]['duration']
-            }
-            windows.append(window)
+        for i in range(0, len(transcript) - window_size + 1, stride):
+            window_end = i + window_size
+            windows.append({
+                'text': ' '.join(texts[i:window_end]),
+                'start_time': starts[i],
+                'end_time': ends[window_end - 1]
+            })
         return windows
 
-    def process_video_segments(self, video_id: str) -> List[Dict]:
+    def create_token_windows(self, transcript: Union[CompactTranscript, List[Dict]], window_size: int = 5,
+                             stride: int = 2, max_length: int = 512) -> List[Dict]:
+        """
+        Create the same sliding windows as create_transcript_windows, tokenized.
+        Each segment is preprocessed and tokenized once, and every window is a
+        slice of the concatenated token array.
+        Args:
+            transcript: CompactTranscript or list of segments with 'text', 'start' and 'duration'
+            window_size: Number of segments to include in each window
+            stride: Number of segments to move forward for next window
+            max_length: Maximum window length in tokens, including special tokens
+        Returns:
+            List of windows with processed text, input IDs and start/end times
+        """
+        transcript = as_compact(transcript)
+        if len(transcript) < window_size:
+            return []
+        
+        tokenized = self._tokenize_segments(transcript, max_length)
+        return [
+            self._token_window(tokenized, i, i + window_size, max_length)
+            for i in range(0, len(transcript) - window_size + 1, stride)
+        ]
+
+    def create_token_blocks(self, transcript: Union[CompactTranscript, List[Dict]], max_segments: int = 32,
+                            max_length: int = 512) -> List[Dict]:
+        """
+        Split a transcript into consecutive, non-overlapping tokenized blocks of at most
+        max_segments segments that fit in max_length tokens, so no block is truncated.
+        Only a single segment longer than max_length is cut, as it is in every window.
+        Args:
+            transcript: CompactTranscript or list of segments with 'text', 'start' and 'duration'
+            max_segments: Maximum number of segments per block
+            max_length: Maximum block length in tokens, including special tokens
+        Returns:
+            Windows as create_token_windows builds them, plus the 'first_segment' and
+            'end_segment' (exclusive) indices of each block
+        """
+        transcript = as_compact(transcript)
+        tokenized = self._tokenize_segments(transcript, max_length)
+        offsets = tokenized[2]
+        body_length = max_length - 2
+        blocks = []
+        first = 0
+        while first < len(transcript):
+            end = first + 1
+            while (end < len(transcript) and end - first < max_segments
+                   and offsets[end + 1] - offsets[first] <= body_length):
+                end += 1
+            block = self._token_window(tokenized, first, end, max_length)
+            block['first_segment'] = first
+            block['end_segment'] = end
+            blocks.append(block)
+            first = end
+        return blocks
+
+    def _tokenize_segments(self, transcript: CompactTranscript, max_length: int):
+        """
+        Preprocess and tokenize each segment once
+        Returns:
+            Processed texts, the flat token array, per segment where it starts in that
+            array (with the total length appended), and segment start and end times
+        """
+        processed = clean_texts(transcript.texts())
+        # Same truncation settings as the model's own tokenizer calls: a shared fast
+        # tokenizer is only safe across threads while those settings don't change.
+        # Window bodies are at most max_length - 2 tokens, so this never shortens a window.
+        segment_ids = self.tokenizer(
+            processed, add_special_tokens=False, truncation=True, max_length=max_length
+        )['input_ids']
+        
+        # offsets[i] is where segment i starts in the flat token array
+        token_ids = []
+        offsets = [0]
+        for ids in segment_ids:
+            token_ids.extend(ids)
+            offsets.append(len(token_ids))
+        return processed, token_ids, offsets, transcript.starts.tolist(), transcript.ends().tolist()
+
+    def _token_window(self, tokenized, first: int, end: int, max_length: int) -> Dict:
+        """Window over segments first to end (exclusive), cut to max_length tokens"""
+        processed, token_ids, offsets, starts, ends = tokenized
+        start = offsets[first]
+        stop = min(offsets[end], start + max_length - 2)
+        return {
+            'processed_text': ' '.join(text for text in processed[first:end] if text),
+            'input_ids': [self.tokenizer.cls_token_id] + token_ids[start:stop] + [self.tokenizer.sep_token_id],
+            'start_time': starts[first],
+            'end_time': ends[end - 1]
+        }
+
+    def process_video_segments(self, video_id: str, tokenize: bool = False) -> List[Dict]:
         """
         Process video transcript into segments for sponsorship detection
+        Args:
+            video_id: YouTube video ID
+            tokenize: Build windows over token IDs so the model can skip tokenization
         """
-        transcript_file = os.path.join(self.raw_data_dir, f"{video_id}_transcript.json")
-        if not os.path.exists(transcript_file):
+        transcript = self.store.get_transcript(video_id)
+        if not transcript:
             return []
-            
-        with open(transcript_file, 'r', encoding='utf-8') as f:
-            transcript = json.load(f)
+        
+        if tokenize:
+            return self.create_token_windows(transcript)
             
         # Create sliding windows over transcript
         windows = self.create_transcript_windows(transcript)
         
         # Preprocess text in each window
-        for window in windows:
-            window['processed_text'] = self.preprocess_text(window['text'])
+        processed = clean_texts([window['text'] for window in windows])
+        for window, text in zip(windows, processed):
+            window['processed_text'] = text
             
         return windows
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, List, Optional
+
+# "0:45 Sponsor", "[12:01] - Thanks to NordVPN", "Sponsor: 1:02:03"
+TIMESTAMP = r'(?:\d{1,2}:)?\d{1,2}:\d{2}'
+CHAPTER_PATTERN = re.compile(
+    rf'^[\W_]*(?:(?P<time>{TIMESTAMP})[\W_]*(?P<title>\w.*?)|(?P<title_first>\w.*?)[\s:\-–—|(\[]+(?P<time_last>{TIMESTAMP}))[\W_]*$'
+)
+SPONSOR_CHAPTER_PATTERN = re.compile(
+    r'\b(?:sponsor\w*|ads?|advert\w*|promo(?:tion)?|paid promotion|partner(?:ed|ship)?|brought to you by)\b',
+    re.IGNORECASE
+)
+URL_PATTERN = re.compile(r'(?:https?://|www\.)\S+|\b[\w-]+\.(?:com|io|co|ly|gg|me|net|org|shop)/\S*', re.IGNORECASE)
+SPONSOR_LINK_PATTERN = re.compile(
+    r'\bsponsor\w*|\b(?:use|with|enter)\s+(?:my\s+|the\s+)?code\b|\b(?:promo|discount|coupon)\s+code\b|'
+    r'\d+\s*%\s*off\b|\bthanks\s+to\b|\baffiliate\b|\bbrought\s+to\s+you\s+by\b|\bfree\s+trial\b',
+    re.IGNORECASE
+)
+CODE_PATTERN = re.compile(r'\bcode\s*[:"\']?\s*(?P<code>[A-Z0-9]{3,})\b')
+DURATION_PATTERN = re.compile(r'^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$')
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """Seconds in an "H:MM:SS" or "M:SS" timestamp"""
+    seconds = 0
+    for part in timestamp.split(':'):
+        seconds = seconds * 60 + int(part)
+    return float(seconds)
+
+
+def parse_duration(duration: Optional[str]) -> Optional[float]:
+    """Seconds in an ISO 8601 duration as returned by the YouTube API ("PT1H2M3S")"""
+    match = DURATION_PATTERN.match(duration or '')
+    if not match:
+        return None
+    parts = {name: int(value or 0) for name, value in match.groupdict().items()}
+    return float(((parts['days'] * 24 + parts['hours']) * 60 + parts['minutes']) * 60 + parts['seconds'])
+
+
+def parse_chapters(description: str, duration: Optional[float] = None) -> List[Dict]:
+    """
+    Parse chapter markers from a video description
+    Only lines with one timestamp count. As YouTube requires for chapters, the
+    first must start at 0:00, there must be at least three, and their
+    timestamps must increase; otherwise there are no chapters.
+    Args:
+        description: Video description
+        duration: Video length in seconds, the end of the last chapter (None if unknown)
+    Returns:
+        Chapters with title, start_time and end_time
+    """
+    chapters = []
+    for line in (description or '').splitlines():
+        if len(re.findall(TIMESTAMP, line)) != 1:
+            continue
+        match = CHAPTER_PATTERN.match(line.strip())
+        if not match:
+            continue
+        start = parse_timestamp(match.group('time') or match.group('time_last'))
+        if chapters and start <= chapters[-1]['start_time']:
+            # Out of order: a list of timestamps, not chapters
+            return []
+        chapters.append({
+            'title': (match.group('title') or match.group('title_first')).strip(),
+            'start_time': start,
+            'end_time': None
+        })
+    if len(chapters) < 3 or chapters[0]['start_time'] != 0:
+        return []
+    for chapter, next_chapter in zip(chapters, chapters[1:]):
+        chapter['end_time'] = next_chapter['start_time']
+    chapters[-1]['end_time'] = duration
+    return chapters
+
+
+def find_sponsor_links(description: str) -> List[Dict]:
+    """
+    Find description lines advertising a sponsor: a link next to a sponsorship
+    or discount cue
+    Returns:
+        Lines with their URLs and discount code, if any
+    """
+    links = []
+    for line in (description or '').splitlines():
+        urls = URL_PATTERN.findall(line)
+        if urls and SPONSOR_LINK_PATTERN.search(line):
+            code = CODE_PATTERN.search(line)
+            links.append({
+                'text': line.strip(),
+                'urls': urls,
+                'code': code.group('code') if code else None
+            })
+    return links
+
+
+def parse_description(description: str, duration: Optional[float] = None) -> Dict:
+    """
+    Sponsorship hints in a video description
+    Args:
+        description: Video description
+        duration: Video length in seconds (None if unknown)
+    Returns:
+        Dictionary with all chapters, the chapters whose title marks a sponsor
+        segment, and sponsor link lines
+    """
+    chapters = parse_chapters(description, duration)
+    return {
+        'chapters': chapters,
+        'sponsor_chapters': [chapter for chapter in chapters if SPONSOR_CHAPTER_PATTERN.search(chapter['title'])],
+        'sponsor_links': find_sponsor_links(description)
+    }
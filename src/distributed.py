@@ -0,0 +1,89 @@
+import os
+import socket
+from typing import Any, Callable, List, Optional, Sequence
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    return get_rank() == 0
+
+
+def barrier():
+    if is_distributed():
+        dist.barrier()
+
+
+def all_reduce_sum(values: Sequence[float]) -> List[float]:
+    """Sum numbers over all processes; a no-op outside a process group"""
+    if not is_distributed():
+        return list(values)
+    tensor = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tensor.tolist()
+
+
+def all_reduce_max(value: float) -> float:
+    if not is_distributed():
+        return value
+    tensor = torch.tensor([value], dtype=torch.float64)
+    dist.all_reduce(tensor, op=dist.ReduceOp.MAX)
+    return tensor.item()
+
+
+def broadcast_object(obj: Any, src: int = 0) -> Any:
+    """Return src's obj on every process"""
+    if not is_distributed():
+        return obj
+    objects = [obj]
+    dist.broadcast_object_list(objects, src=src)
+    return objects[0]
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _worker(rank: int, world_size: int, port: int, threads_per_process: int, fn: Callable, args: tuple):
+    os.environ['MASTER_ADDR'] = '127.0.0.1'
+    os.environ['MASTER_PORT'] = str(port)
+    torch.set_num_threads(threads_per_process)
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    try:
+        fn(*args)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch(fn: Callable, nproc: int, args: tuple = (), threads_per_process: Optional[int] = None):
+    """
+    Run fn(*args) in nproc local processes joined in a gloo process group
+    Args:
+        fn: Picklable (module-level) function; every process runs it
+        nproc: Number of processes
+        args: Arguments passed to fn
+        threads_per_process: Intra-op threads per process (default: CPU count / nproc)
+    """
+    if nproc == 1:
+        if threads_per_process:
+            torch.set_num_threads(threads_per_process)
+        fn(*args)
+        return
+    threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // nproc)
+    mp.spawn(_worker, args=(nproc, _free_port(), threads_per_process, fn, args), nprocs=nproc, join=True)
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Kinds of fetched data
+DETAILS = 'details'
+TRANSCRIPT = 'transcript'
+
+# Fetch outcomes; anything but OK is a negative result
+OK = 'ok'
+NOT_FOUND = 'not_found'
+NO_TRANSCRIPT = 'no_transcript'
+
+DEFAULT_TTLS = {DETAILS: 3600.0, TRANSCRIPT: 7 * 86400.0}
+DEFAULT_NEGATIVE_TTLS = {DETAILS: 600.0, TRANSCRIPT: 3600.0}
+
+
+class FetchCache:
+    """
+    Records when each video's details and transcript were last fetched and
+    with what outcome, so YouTubeAPI can skip fetches within a TTL.
+
+    Successful fetches are served from the video store while fresh. Negative
+    results ("video not found", "no transcript") are remembered for their own,
+    usually shorter, TTL. Transient failures are not recorded, so they are
+    retried on the next request.
+    """
+
+    def __init__(self, db_path: str = "data/cache/fetches.db", ttls: Optional[Dict[str, float]] = None,
+                 negative_ttls: Optional[Dict[str, float]] = None):
+        self.db_path = db_path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.negative_ttls = {**DEFAULT_NEGATIVE_TTLS, **(negative_ttls or {})}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'negative_hits': 0, 'misses': 0}
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetches ("
+            "video_id TEXT NOT NULL, kind TEXT NOT NULL, outcome TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (video_id, kind)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def lookup_many(self, kind: str, video_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Look up fresh fetch outcomes
+        Returns:
+            Outcomes of the videos fetched within their TTL; the others need fetching
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        now = time.time()
+        fresh = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(video_ids), 500):
+                chunk = video_ids[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT video_id, outcome, fetched_at FROM fetches WHERE kind = ? "
+                    f"AND video_id IN ({','.join('?' * len(chunk))})",
+                    [kind] + chunk
+                ).fetchall()
+                for video_id, outcome, fetched_at in rows:
+                    ttl = self.ttls[kind] if outcome == OK else self.negative_ttls[kind]
+                    if now - fetched_at < ttl:
+                        fresh[video_id] = outcome
+            positive = sum(outcome == OK for outcome in fresh.values())
+            self._counters['hits'] += positive
+            self._counters['negative_hits'] += len(fresh) - positive
+            self._counters['misses'] += len(video_ids) - len(fresh)
+        return fresh
+
+    def record_many(self, kind: str, outcomes: Dict[str, str]):
+        """Record fetch outcomes as of now"""
+        if not outcomes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fetches (video_id, kind, outcome, fetched_at) VALUES (?, ?, ?, ?)",
+                [(video_id, kind, outcome, now) for video_id, outcome in outcomes.items()]
+            )
+            self._conn.commit()
+
+    def invalidate(self, video_id: str):
+        """Forget a video's fetches, so the next request refetches everything"""
+        with self._lock:
+            self._conn.execute("DELETE FROM fetches WHERE video_id = ?", (video_id,))
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters"""
+        with self._lock:
+            lookups = sum(self._counters.values())
+            hits = self._counters['hits'] + self._counters['negative_hits']
+            return {**self._counters, 'hit_rate': hits / lookups if lookups else 0.0}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,119 @@
+import logging
+import os
+import random
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .work_queue import STAGES, WorkQueue
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionPipeline:
+    """
+    Background workers driving videos through the collect -> process -> analyze stages.
+
+    Each stage has its own worker threads. They lease batches from the durable
+    WorkQueue and call the stage handler with the leased jobs. The handler returns
+    {job_id: True/False}. Successful jobs advance to the next stage; failed ones are
+    retried with jittered exponential backoff until the queue's max_attempts. The
+    leases are renewed while the handler runs, so a slow batch is not handed out twice.
+    """
+
+    def __init__(self, work_queue: WorkQueue, handlers: Dict[str, Callable[[List[Dict]], Dict[int, bool]]],
+                 workers_per_stage: int = 2, batch_size: int = 10, lease_seconds: float = 300.0,
+                 retry_delay: float = 2.0, poll_interval: float = 1.0):
+        unknown = set(handlers) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+        self.work_queue = work_queue
+        self.handlers = handlers
+        self.workers_per_stage = workers_per_stage
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._wake = {stage: threading.Event() for stage in STAGES}
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._owner_prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    def start(self):
+        """Start worker threads for every stage with a handler"""
+        if self._workers:
+            return
+        self._stop.clear()
+        for stage in STAGES:
+            if stage not in self.handlers:
+                continue
+            for i in range(self.workers_per_stage):
+                worker = threading.Thread(target=self._run, args=(stage, f"{self._owner_prefix}-{stage}-{i}"),
+                                          name=f"ingestion-{stage}-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def enqueue(self, video_id: str, payload: Any = None) -> bool:
+        """
+        Durably queue a video for collection and wake the collect workers
+        Returns:
+            False if the video was already queued; a done or failed video starts over
+        """
+        added = self.work_queue.enqueue(video_id, payload)
+        self._wake['collect'].set()
+        return added
+
+    def _run(self, stage: str, owner: str):
+        handler = self.handlers[stage]
+        next_index = STAGES.index(stage) + 1
+        next_stage = STAGES[next_index] if next_index < len(STAGES) else None
+        while not self._stop.is_set():
+            jobs = self.work_queue.dequeue(stage, owner, self.batch_size, self.lease_seconds)
+            if not jobs:
+                self._wake[stage].wait(self.poll_interval)
+                self._wake[stage].clear()
+                continue
+
+            handled = threading.Event()
+            renewer = threading.Thread(target=self._renew_leases, args=(jobs, owner, handled),
+                                       name=f"{threading.current_thread().name}-lease", daemon=True)
+            renewer.start()
+            try:
+                outcomes = handler(jobs)
+                error = "handler reported failure"
+            except Exception as e:
+                logger.exception(f"Ingestion {stage} handler failed")
+                outcomes = {}
+                error = str(e)
+            finally:
+                handled.set()
+                renewer.join()
+
+            for job in jobs:
+                if outcomes.get(job['id']):
+                    self.work_queue.complete(job['id'], owner, next_stage)
+                else:
+                    delay = self.retry_delay * (2 ** (job['attempts'] - 1)) * random.uniform(0.5, 1.5)
+                    logger.warning(f"{stage} of {job['video_id']} failed ({error}), attempt {job['attempts']}")
+                    self.work_queue.fail(job['id'], owner, error, retry_delay=delay)
+            if next_stage is not None:
+                self._wake[next_stage].set()
+
+    def _renew_leases(self, jobs: List[Dict], owner: str, handled: threading.Event):
+        # Renew well before expiry; stops as soon as the handler returns
+        while not handled.wait(self.lease_seconds / 3):
+            for job in jobs:
+                self.work_queue.extend_lease(job['id'], owner, self.lease_seconds)
+
+    def stats(self) -> Dict:
+        """Return job counts per stage and status"""
+        return self.work_queue.stats()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the workers; leased jobs they could not finish resume after their lease expires"""
+        self._stop.set()
+        for event in self._wake.values():
+            event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
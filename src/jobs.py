@@ -0,0 +1,93 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+    pass
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool and keeps their status for polling.
+    Threads are enough here: the model releases the GIL during forward passes,
+    and concurrent jobs share batches through the engine's batcher.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue_depth: int = 100, max_finished_jobs: int = 1000):
+        self.max_queue_depth = max_queue_depth
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        """
+        Queue fn(*args, **kwargs) for execution
+        Returns:
+            Job ID to poll with get()
+        Raises:
+            JobQueueFullError: If max_queue_depth jobs are already queued or running
+        """
+        with self._lock:
+            if self._active >= self.max_queue_depth:
+                raise JobQueueFullError(f"Job queue is full ({self.max_queue_depth} jobs pending)")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'submitted_at': datetime.utcnow().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self._active += 1
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable, args, kwargs):
+        self._update(job_id, status='running', started_at=datetime.utcnow().isoformat())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status='completed', result=result)
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._jobs[job_id]['finished_at'] = datetime.utcnow().isoformat()
+                self._active -= 1
+                self._prune()
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond the retention limit
+        finished = len(self._jobs) - self._active
+        for job_id in list(self._jobs):
+            if finished <= self.max_finished_jobs:
+                break
+            if self._jobs[job_id]['finished_at'] is not None:
+                del self._jobs[job_id]
+                finished -= 1
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job's status and result, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> Dict:
+        """Return the number of active and retained jobs"""
+        with self._lock:
+            return {'active': self._active, 'retained': len(self._jobs), 'max_queue_depth': self.max_queue_depth}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
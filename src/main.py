@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request, Response, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import uvicorn
 import hashlib
@@ -9,8 +10,15 @@ import json
 import time
 from dotenv import load_dotenv
 from .data_collector import DataCollector
+from .fetch_cache import DETAILS, TRANSCRIPT, FetchCache
 from .analyzer import VideoAnalyzer
+from .ingestion import IngestionPipeline
+from .jobs import JobManager, JobQueueFullError
+from .prefilter import LexicalPrefilter
 from .pubsubhubbub import PubSubHubbub
+from .score_cache import ScoreCache
+from .video_store import VideoStore
+from .work_queue import WorkQueue
 import logging
 from pathlib import Path
 from datetime import datetime
@@ -21,9 +29,45 @@ load_dotenv()
 # Create FastAPI app
 app = FastAPI(title="YouTube Sponsorship Detector")
 
-# Setup data collector and analyzer
-data_collector = DataCollector()
-video_analyzer = VideoAnalyzer(model_path=os.getenv('MODEL_PATH'))
+# Setup data collector and analyzer, sharing one video store
+video_store = VideoStore(os.getenv('VIDEO_STORE_PATH', 'data/videos.db'))
+# Repeat notifications for a video within the TTLs reuse what was already fetched
+fetch_cache = FetchCache(
+    db_path=os.getenv('FETCH_CACHE_PATH', 'data/cache/fetches.db'),
+    ttls={
+        DETAILS: float(os.getenv('FETCH_TTL_DETAILS', '3600')),
+        TRANSCRIPT: float(os.getenv('FETCH_TTL_TRANSCRIPT', '604800'))
+    },
+    negative_ttls={
+        DETAILS: float(os.getenv('FETCH_NEGATIVE_TTL_DETAILS', '600')),
+        TRANSCRIPT: float(os.getenv('FETCH_NEGATIVE_TTL_TRANSCRIPT', '3600'))
+    }
+)
+data_collector = DataCollector(store=video_store, fetch_cache=fetch_cache)
+# Concurrent /analyze requests share forward passes through the engine's batcher
+video_analyzer = VideoAnalyzer(
+    model_path=os.getenv('MODEL_PATH'),
+    backend=os.getenv('INFERENCE_BACKEND', 'torch'),
+    batch_size=int(os.getenv('INFERENCE_BATCH_SIZE', '64')),
+    max_tokens_per_batch=int(os.getenv('INFERENCE_MAX_TOKENS_PER_BATCH', '4096')),
+    max_wait_ms=float(os.getenv('INFERENCE_MAX_WAIT_MS', '10')),
+    score_cache=ScoreCache(
+        db_path=os.getenv('SCORE_CACHE_PATH', 'data/cache/scores.db'),
+        max_memory_entries=int(os.getenv('SCORE_CACHE_SIZE', '100000'))
+    ),
+    store=video_store,
+    prefilter=LexicalPrefilter.load(os.environ['PREFILTER_PATH']) if os.getenv('PREFILTER_PATH') else None,
+    analysis_mode=os.getenv('ANALYSIS_MODE', 'exhaustive'),
+    coarse_window_size=int(os.getenv('ANALYSIS_COARSE_WINDOW', '32')),
+    trigger_threshold=float(os.getenv('ANALYSIS_TRIGGER_THRESHOLD', '0.2')),
+    description_hints=os.getenv('DESCRIPTION_HINTS', 'off')
+)
+
+# Analysis runs on a bounded worker pool so inference never blocks the event loop
+analysis_jobs = JobManager(
+    max_workers=int(os.getenv('ANALYSIS_WORKERS', '2')),
+    max_queue_depth=int(os.getenv('ANALYSIS_MAX_QUEUE', '100'))
+)
 
 # In-memory notification log
 notifications = []
@@ -60,6 +104,27 @@ PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 async def root():
     return {"status": "alive"}
 
+@app.get("/ingestion/stats")
+async def ingestion_stats():
+    """
+    Job counts per pipeline stage and status
+    """
+    return await run_in_threadpool(ingestion.stats)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters of the window score cache
+    """
+    return video_analyzer.engine.score_cache.stats()
+
+@app.get("/fetch-cache/stats")
+async def fetch_cache_stats():
+    """
+    Hit/miss counters of the YouTube fetch cache, negative hits included
+    """
+    return await run_in_threadpool(fetch_cache.stats)
+
 @app.get("/webhook")
 async def webhook_verification(request: Request):
     """
@@ -85,17 +150,91 @@ async def webhook_verification(request: Request):
         logger.exception("Error in webhook verification:")
         return Response(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def save_notification(xml_data: str, received_at: str, video_id: str):
+    """
+    Archive a notification as XML. Named by receive time and video ID, so retries overwrite
+    """
+    filepath = PROCESSED_DIR / f"youtube_notification_{received_at}_{video_id}.xml"
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(xml_data)
+        logger.info(f"Saved notification to {filepath}")
+    except Exception as e:
+        logger.error(f"Failed to save notification to {filepath}: {str(e)}")
+
+def collect_videos(jobs: list) -> dict:
+    """
+    Archive notifications and fetch details and transcripts. Runs on ingestion workers.
+    """
+    for job in jobs:
+        payload = job['payload']
+        if payload:
+            save_notification(payload['xml'], payload['received_at'], job['video_id'])
+    # One details call covers the whole batch
+    logger.info(f"Collecting {len(jobs)} videos: {', '.join(job['video_id'] for job in jobs)}")
+    saved = data_collector.youtube_api.save_video_data_many([job['video_id'] for job in jobs])
+    return {job['id']: saved[job['video_id']] for job in jobs}
+
+def process_videos(jobs: list) -> dict:
+    return {job['id']: data_collector.process_video_data(job['video_id']) for job in jobs}
+
+def analyze_videos(jobs: list) -> dict:
+    """
+    Score newly ingested videos so later /analyze calls only apply a threshold
+    A re-notified video was collected again, so its stored scores are replaced.
+    """
+    outcomes = {}
+    for job in jobs:
+        results = video_analyzer.analyze_video(job['video_id'], DEFAULT_THRESHOLD, refresh=True)
+        if results['status'] == 'success':
+            video_analyzer.save_results(results)
+            logger.info(f"Successfully processed video {job['video_id']}")
+        # Videos without a transcript have nothing to analyze, which is not a failure
+        outcomes[job['id']] = True
+    return outcomes
+
+# Webhook work is queued durably and done by background workers, so the hub gets a fast 2xx
+DEFAULT_THRESHOLD = float(os.getenv('DEFAULT_THRESHOLD', '0.5'))
+work_queue = WorkQueue(
+    os.getenv('WORK_QUEUE_PATH', 'data/queue.db'),
+    max_attempts=int(os.getenv('INGESTION_MAX_ATTEMPTS', '5'))
+)
+ingestion = IngestionPipeline(
+    work_queue,
+    {'collect': collect_videos, 'process': process_videos, 'analyze': analyze_videos},
+    workers_per_stage=int(os.getenv('INGESTION_WORKERS', '2')),
+    batch_size=int(os.getenv('INGESTION_BATCH_SIZE', '10')),
+    lease_seconds=float(os.getenv('INGESTION_LEASE_SECONDS', '300'))
+)
+
+@app.on_event("startup")
+def start_workers():
+    ingestion.start()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    ingestion.stop(timeout=5)
+    analysis_jobs.shutdown(wait=False)
+    video_analyzer.engine.close()
+
+# Subscribe and unsubscribe requests share one pooled session to the hub
+pubsub = PubSubHubbub()
+
+@app.on_event("shutdown")
+async def close_hub_session():
+    await pubsub.close()
+
 @app.post("/webhook")
 async def webhook_receiver(request: Request):
     """
-    Handle incoming notifications from YouTube and save as XML
+    Handle incoming notifications from YouTube: verify, queue the video and acknowledge
     """
     try:
         # Get raw body
         body = await request.body()
-        headers = dict(request.headers)
-        signature = headers.get('X-Hub-Signature')
+        signature = request.headers.get('X-Hub-Signature')
 
+        headers = dict(request.headers)
         logger.info(f"Received webhook notification. Headers: {headers}")
 
         # Signature verification
@@ -110,59 +249,33 @@ async def webhook_receiver(request: Request):
                 hashlib.sha1
             ).hexdigest()
 
-            if signature != f"sha1={expected_sig}":
+            if not hmac.compare_digest(signature, f"sha1={expected_sig}"):
                 logger.warning(f"Invalid signature received: {signature}")
                 return Response(status_code=status.HTTP_403_FORBIDDEN)
 
-        # Parse XML
-        try:
-            from xml.etree import ElementTree
-            xml_data = body.decode()
-            ElementTree.fromstring(xml_data)
-            logger.debug("Successfully parsed XML notification")
-        except Exception as e:
-            logger.error(f"Invalid XML received: {str(e)}")
-            return Response(status_code=status.HTTP_400_BAD_REQUEST)
-
-        # Store in memory
-        notifications.append((str(headers), xml_data, str(datetime.now())))
-        notifications[:] = notifications[-10:]
-
-        # Save to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"youtube_notification_{timestamp}.xml"
-        filepath = PROCESSED_DIR / filename
-
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(xml_data)
-            logger.info(f"Saved notification to {filepath}")
-        except Exception as e:
-            logger.error(f"Failed to save notification to {filepath}: {str(e)}")
-
-        # Process video
-        video_id = data_collector.process_notification(body)
-        if video_id:
-            logger.info(f"Processing new video: {video_id}")
-            try:
-                data_collector.process_video_data(video_id)
-                logger.info(f"Successfully processed video {video_id}")
-            except Exception as e:
-                logger.error(f"Error processing video {video_id}: {str(e)}")
-                return JSONResponse(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    content={"error": f"Error processing video: {str(e)}"}
-                )
-        else:
+        # Parse XML once, just for the video ID
+        video_id = data_collector.extract_video_id(body)
+        if not video_id:
             logger.warning("No video ID found in notification")
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"error": "No video ID found in notification"}
             )
 
+        xml_data = body.decode(errors='replace')
+        received_at = datetime.now()
+
+        # Store in memory
+        notifications.append((str(headers), xml_data, str(received_at)))
+        notifications[:] = notifications[-10:]
+
+        # Idempotent by video ID, so hub redeliveries do not queue duplicate work
+        payload = {'xml': xml_data, 'received_at': received_at.strftime("%Y%m%d_%H%M%S_%f")}
+        await run_in_threadpool(ingestion.enqueue, video_id, payload)
+
         return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={"status": "success", "video_id": video_id}
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "queued", "video_id": video_id}
         )
 
     except Exception as e:
@@ -172,21 +285,62 @@ async def webhook_receiver(request: Request):
             content={"error": "Internal server error"}
         )
 
-@app.post("/analyze/{video_id}")
-async def analyze_video(video_id: str, threshold: float = 0.5):
-    try:
-        logger.info(f"Received analysis request for video_id={video_id}, threshold={threshold}")
+def run_analysis(video_id: str, threshold: float, refresh: bool) -> dict:
+    """
+    Process the stored video data (when needed), analyze and save results for one video.
+    Collection is left to webhook ingestion. Runs on the analysis worker pool, off the event loop.
+    """
+    logger.info(f"Running analysis for video_id={video_id}, threshold={threshold}")
+    # Stored scores only need the new threshold applied, so skip processing and inference
+    if refresh or not video_analyzer.has_scores(video_id):
         if not data_collector.process_video_data(video_id):
             logger.error(f"Failed to collect video data for {video_id}")
-            return {"status": "error", "message": "Failed to collect video data"}
-        results = video_analyzer.analyze_video(video_id, threshold)
-        video_analyzer.save_results(results)
-        logger.info(f"Analysis complete for video_id={video_id}")
-        return results
+            raise RuntimeError("Failed to collect video data")
+    results = video_analyzer.analyze_video(video_id, threshold, refresh=refresh)
+    video_analyzer.save_results(results)
+    logger.info(f"Analysis complete for video_id={video_id}")
+    return results
+
+@app.post("/analyze/{video_id}")
+async def analyze_video(video_id: str, threshold: float = 0.5, refresh: bool = False):
+    """
+    Queue an analysis job and return its ID, or return the result directly
+    when scores for this video are already stored.
+    """
+    logger.info(f"Received analysis request for video_id={video_id}, threshold={threshold}")
+    try:
+        if not refresh and await run_in_threadpool(video_analyzer.has_scores, video_id):
+            return await run_in_threadpool(run_analysis, video_id, threshold, False)
+        job_id = analysis_jobs.submit(run_analysis, video_id, threshold, refresh)
+    except JobQueueFullError as e:
+        logger.warning(f"Rejected analysis of {video_id}: {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"status": "error", "message": str(e)},
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         logger.exception(f"Error analyzing video {video_id}")
         return {"status": "error", "message": str(e)}
 
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "queued", "job_id": job_id, "video_id": video_id}
+    )
+
+@app.get("/analyze/jobs/{job_id}")
+async def analysis_job_status(job_id: str):
+    """
+    Report the status of an analysis job, with its result once completed
+    """
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"status": "error", "message": f"Unknown job {job_id}"}
+        )
+    return job
+
 @app.post("/subscribe/{channel_id}")
 async def subscribe_channel(channel_id: str):
     """
@@ -203,7 +357,6 @@ async def subscribe_channel(channel_id: str):
     logger.info(f"CALLBACK_URL: {os.getenv('CALLBACK_URL')}")
     logger.info(f"WEBHOOK_VERIFY_TOKEN: {'*' * 8}{os.getenv('WEBHOOK_VERIFY_TOKEN')[-4:] if os.getenv('WEBHOOK_VERIFY_TOKEN') else 'None'}")
 
-    pubsub = PubSubHubbub()
     try:
         result = await pubsub.subscribe_to_channel(channel_id)
         if result:
@@ -219,7 +372,6 @@ async def unsubscribe_channel(channel_id: str):
     """
     Unsubscribe from a YouTube channel's PubSubHubbub notifications.
     """
-    pubsub = PubSubHubbub()
     try:
         result = await pubsub.unsubscribe_from_channel(channel_id)
         if result:
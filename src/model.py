@@ -1,17 +1,57 @@
 import torch
 import torch.nn as nn
-from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+from transformers import AutoConfig, AutoModel, AutoModelForSequenceClassification, AutoTokenizer
 from typing import Dict, List, Tuple, Optional
 import os
 import json
+import math
+import time
+import hashlib
+import uuid
 from datetime import datetime
 import numpy as np
+from contextlib import nullcontext
+from torch.nn.parallel import DistributedDataParallel
 from sklearn.metrics import precision_recall_fscore_support, accuracy_score
+from .batching import DynamicBatcher
+from . import distributed
+from .score_cache import ScoreCache
+
+DEFAULT_BASE_MODEL = 'distilbert-base-uncased'
+BACKENDS = ('torch', 'quantized', 'onnx', 'onnx-int8')
+EXPORT_FILES = {'onnx': 'model.onnx', 'onnx-int8': 'model_int8.onnx'}
+
+def length_bucketed_batches(lengths: List[int], max_tokens_per_batch: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group sequence indices into batches of similar length
+    Args:
+        lengths: Token count of each sequence
+        max_tokens_per_batch: Budget for padded tokens (batch size x longest sequence)
+        max_batch_size: Upper bound on sequences per batch
+    Returns:
+        Lists of indices into lengths, shortest sequences first
+    """
+    batches = []
+    current = []
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so the newest sequence sets the padded length
+        if current and (len(current) >= max_batch_size or
+                        (len(current) + 1) * lengths[index] > max_tokens_per_batch):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
 
 class SponsorshipDetector(nn.Module):
-    def __init__(self, model_name: str = 'distilbert-base-uncased'):
+    def __init__(self, model_name: str = DEFAULT_BASE_MODEL, pretrained: bool = True):
         super().__init__()
-        self.bert = AutoModel.from_pretrained(model_name)
+        if pretrained:
+            self.bert = AutoModel.from_pretrained(model_name)
+        else:
+            # Architecture only, the weights come from a saved checkpoint
+            self.bert = AutoModel.from_config(AutoConfig.from_pretrained(model_name))
         self.dropout = nn.Dropout(0.1)
         self.classifier = nn.Linear(self.bert.config.hidden_size, 1)
         self.sigmoid = nn.Sigmoid()
@@ -23,59 +63,220 @@ class SponsorshipDetector(nn.Module):
         logits = self.classifier(pooled_output)
         return self.sigmoid(logits)
 
+def bf16_supported(device: torch.device) -> bool:
+    """Whether bf16 autocast runs natively on the device"""
+    if device.type == 'cuda':
+        return torch.cuda.is_bf16_supported()
+    # CPUs without AVX512-BF16 or AMX emulate bf16 and train slower than fp32
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
 class ModelTrainer:
-    def __init__(self, model_dir: str = "models/saved_models"):
+    def __init__(self, model_dir: str = "models/saved_models", base_model: str = DEFAULT_BASE_MODEL,
+                 num_threads: Optional[int] = None):
         self.model_dir = model_dir
+        self.base_model = base_model
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = SponsorshipDetector().to(self.device)
+        if num_threads:
+            # Intra-op threads used by CPU kernels
+            torch.set_num_threads(num_threads)
+        self.model = SponsorshipDetector(base_model).to(self.device)
         self.criterion = nn.BCELoss()
         self.optimizer = torch.optim.AdamW(self.model.parameters(), lr=2e-5)
-        self.tokenizer = AutoTokenizer.from_pretrained('distilbert-base-uncased')
+        self.tokenizer = AutoTokenizer.from_pretrained(base_model)
         
-    def train(self, train_dataloader, val_dataloader, epochs: int = 3) -> Dict:
-        """Train the model and return training metrics"""
+    def train(self, train_dataloader, val_dataloader, epochs: int = 3, bf16: bool = False,
+              grad_accumulation_steps: int = 1, checkpoint_dir: Optional[str] = None,
+              checkpoint_every: Optional[int] = None) -> Dict:
+        """
+        Train the model and return training metrics
+        Args:
+            train_dataloader: Batches of input_ids, attention_mask and labels
+            val_dataloader: Validation batches, evaluated after every epoch
+            epochs: Total number of epochs, including any already completed before a resume
+            bf16: Run forward passes under bf16 autocast, if the hardware supports it
+            grad_accumulation_steps: Batches whose gradients are summed per optimizer step
+            checkpoint_dir: Write resumable checkpoints here and resume from the latest one.
+                The best model is then saved to model_dir/best_model instead of a new
+                timestamped directory
+            checkpoint_every: Also checkpoint every this many optimizer steps within an epoch
+        Returns:
+            One dict of metrics per epoch, including training samples/sec
+        
+        Inside a process group started by distributed.launch, every process trains
+        a DistributedDataParallel replica on its own slice of the data (see
+        shards.create_dataloader). Only rank 0 evaluates and writes checkpoints and
+        models; the reported loss and samples/sec cover all processes.
+        """
+        if bf16 and not bf16_supported(self.device):
+            print("bf16 autocast is not supported on this device, training in fp32")
+            bf16 = False
+        is_main = distributed.is_main_process()
+        if distributed.is_distributed():
+            model = DistributedDataParallel(self.model)
+        else:
+            model = self.model
         best_val_loss = float('inf')
         training_history = []
+        start_epoch = 0
+        resume_batch = 0
+        partial = {'loss': 0.0, 'batches': 0}
+        
+        state = self.load_checkpoint(checkpoint_dir) if checkpoint_dir else None
+        if state is not None:
+            start_epoch = state['epoch']
+            resume_batch = state['batch']
+            if is_main:
+                partial = state['partial']
+            best_val_loss = state['best_val_loss']
+            training_history = state['history']
         
-        for epoch in range(epochs):
+        for epoch in range(start_epoch, epochs):
+            # Restoring the RNG state makes a resumed epoch shuffle the same way
+            if state is not None and epoch == start_epoch:
+                torch.set_rng_state(state['epoch_rng_state'])
+            epoch_rng_state = torch.get_rng_state()
+            sampler = getattr(train_dataloader, 'sampler', None)
+            if hasattr(sampler, 'set_epoch'):
+                sampler.set_epoch(epoch)
+            
             # Training
-            self.model.train()
-            train_loss = 0
-            for batch in train_dataloader:
-                self.optimizer.zero_grad()
+            model.train()
+            train_loss = partial['loss']
+            batches = partial['batches']
+            samples = 0
+            optimizer_steps = 0
+            pending_gradients = False
+            started = time.perf_counter()
+            self.optimizer.zero_grad()
+            for batch_index, batch in enumerate(train_dataloader):
+                if epoch == start_epoch and batch_index < resume_batch:
+                    continue
                 
                 input_ids = batch['input_ids'].to(self.device)
                 attention_mask = batch['attention_mask'].to(self.device)
                 labels = batch['labels'].to(self.device)
                 
-                outputs = self.model(input_ids, attention_mask)
-                loss = self.criterion(outputs.squeeze(), labels.float())
+                step_now = (batch_index + 1) % grad_accumulation_steps == 0 \
+                    or batch_index + 1 == len(train_dataloader)
+                # Replicas only all-reduce gradients on the batch that completes a step
+                sync = nullcontext() if step_now or model is self.model else model.no_sync()
+                with sync:
+                    with torch.autocast(self.device.type, dtype=torch.bfloat16, enabled=bf16):
+                        outputs = model(input_ids, attention_mask)
+                    # BCELoss is unsafe under autocast, so the loss runs in fp32
+                    loss = self.criterion(outputs.float().squeeze(-1), labels.float())
+                    
+                    (loss / grad_accumulation_steps).backward()
+                pending_gradients = True
+                train_loss += loss.item()
+                batches += 1
+                samples += labels.size(0)
                 
-                loss.backward()
+                if step_now:
+                    self.optimizer.step()
+                    self.optimizer.zero_grad()
+                    pending_gradients = False
+                    optimizer_steps += 1
+                    if checkpoint_dir and checkpoint_every and optimizer_steps % checkpoint_every == 0:
+                        # Loss so far over all replicas; on resume, rank 0 carries it alone
+                        partial_loss, partial_batches = distributed.all_reduce_sum([train_loss, batches])
+                        if is_main:
+                            self.save_checkpoint(checkpoint_dir, {
+                                'epoch': epoch,
+                                'batch': batch_index + 1,
+                                'partial': {'loss': partial_loss, 'batches': partial_batches},
+                                'best_val_loss': best_val_loss,
+                                'history': training_history,
+                                'epoch_rng_state': epoch_rng_state
+                            })
+            # Gradients left over from a final incomplete accumulation
+            if pending_gradients:
                 self.optimizer.step()
-                train_loss += loss.item()
+                self.optimizer.zero_grad()
+            train_time = time.perf_counter() - started
+            epoch_loss = train_loss / max(batches, 1)
+            if distributed.is_distributed():
+                train_loss, batches, samples = distributed.all_reduce_sum([train_loss, batches, samples])
+                train_time = distributed.all_reduce_max(train_time)
+                epoch_loss = train_loss / max(batches, 1)
             
-            # Validation
-            val_loss, val_metrics = self.evaluate(val_dataloader)
+            # Validation on rank 0; the other replicas wait for its result
+            val_loss, val_metrics = self.evaluate(val_dataloader) if is_main else (None, None)
+            val_loss, val_metrics = distributed.broadcast_object((val_loss, val_metrics))
             
-            # Save best model
-            if val_loss < best_val_loss:
+            # Save best model; without validation data, keep the latest one
+            if val_loss < best_val_loss or math.isnan(val_loss):
                 best_val_loss = val_loss
-                self.save_model('best_model')
+                if is_main:
+                    self.save_model('best_model', timestamped=checkpoint_dir is None)
             
             # Record metrics
             epoch_metrics = {
                 'epoch': epoch + 1,
-                'train_loss': train_loss / len(train_dataloader),
+                'train_loss': epoch_loss,
                 'val_loss': val_loss,
+                'samples_per_sec': samples / train_time if train_time > 0 else 0.0,
+                'train_time_sec': train_time,
                 **val_metrics
             }
             training_history.append(epoch_metrics)
+            partial = {'loss': 0.0, 'batches': 0}
             
+            if is_main and checkpoint_dir:
+                self.save_checkpoint(checkpoint_dir, {
+                    'epoch': epoch + 1,
+                    'batch': 0,
+                    'partial': partial,
+                    'best_val_loss': best_val_loss,
+                    'history': training_history,
+                    'epoch_rng_state': torch.get_rng_state()
+                })
+        
+        # Nobody leaves before rank 0 has written its last checkpoint
+        distributed.barrier()
         return training_history
 
+    def save_checkpoint(self, checkpoint_dir: str, progress: Dict):
+        """Atomically write model and optimizer state with training progress to checkpoint_dir/latest.pt"""
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        path = os.path.join(checkpoint_dir, 'latest.pt')
+        tmp_path = f"{path}.tmp"
+        torch.save({
+            'model': self.model.state_dict(),
+            'optimizer': self.optimizer.state_dict(),
+            **progress
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    def load_checkpoint(self, checkpoint_dir: str) -> Optional[Dict]:
+        """
+        Restore model and optimizer state from checkpoint_dir/latest.pt
+        Returns:
+            The saved training progress, or None if there is no checkpoint
+        """
+        path = os.path.join(checkpoint_dir, 'latest.pt')
+        if not os.path.exists(path):
+            return None
+        state = torch.load(path, map_location=self.device, weights_only=False)
+        self.model.load_state_dict(state.pop('model'))
+        self.optimizer.load_state_dict(state.pop('optimizer'))
+        return state
+
     def evaluate(self, dataloader) -> Tuple[float, Dict]:
-        """Evaluate the model and return loss and metrics"""
+        """
+        Evaluate the model and return loss and metrics
+        
+        An empty dataloader (e.g. shards written with --val-fraction 0) gives NaN
+        loss and metrics.
+        """
+        if len(dataloader) == 0:
+            nan = float('nan')
+            return nan, {'accuracy': nan, 'precision': nan, 'recall': nan, 'f1': nan}
         self.model.eval()
         val_loss = 0
         predictions = []
@@ -88,10 +289,11 @@ class ModelTrainer:
                 labels = batch['labels'].to(self.device)
                 
                 outputs = self.model(input_ids, attention_mask)
-                loss = self.criterion(outputs.squeeze(), labels.float())
+                # squeeze(-1) keeps the batch dimension of a final batch of one
+                loss = self.criterion(outputs.squeeze(-1), labels.float())
                 val_loss += loss.item()
                 
-                predictions.extend((outputs.squeeze() > 0.5).cpu().numpy())
+                predictions.extend((outputs.squeeze(-1) > 0.5).cpu().numpy())
                 true_labels.extend(labels.cpu().numpy())
         
         # Calculate metrics
@@ -118,30 +320,28 @@ class ModelTrainer:
             outputs = self.model(input_ids, attention_mask)
             return outputs.squeeze().cpu().numpy().tolist()
 
-    def predict_segments(self, windows_data: List[Dict], threshold: float = 0.5) -> List[Dict]:
+    def predict_segments(self, windows_data: List[Dict], threshold: float = 0.5,
+                         max_tokens_per_batch: int = 4096) -> List[Dict]:
         """
         Make predictions on video segments and identify potential sponsorship regions
         Args:
             windows_data: List of windows with text and timestamp information
             threshold: Confidence threshold for sponsorship detection
+            max_tokens_per_batch: Padded token budget per forward pass
         Returns:
             List of segments with predictions and confidence scores
         """
         self.model.eval()
-        results = []
+        texts = [w['processed_text'] for w in windows_data]
+        if not texts:
+            return []
+        token_ids = self.tokenizer(texts, truncation=True, max_length=512)['input_ids']
+        confidences = [0.0] * len(windows_data)
         
-        # Process windows in batches
-        batch_size = 8
-        for i in range(0, len(windows_data), batch_size):
-            batch = windows_data[i:i + batch_size]
-            texts = [w['processed_text'] for w in batch]
-            
-            # Tokenize
-            inputs = self.tokenizer(
-                texts,
-                padding=True,
-                truncation=True,
-                max_length=512,
+        # Batch windows of similar length to keep padding down
+        for batch in length_bucketed_batches([len(ids) for ids in token_ids], max_tokens_per_batch, max_batch_size=64):
+            inputs = self.tokenizer.pad(
+                {'input_ids': [token_ids[k] for k in batch]},
                 return_tensors='pt'
             ).to(self.device)
             
@@ -151,33 +351,40 @@ class ModelTrainer:
                     inputs['input_ids'],
                     inputs['attention_mask']
                 )
-                predictions = outputs.squeeze().cpu().numpy()
+                predictions = outputs.view(-1).cpu().numpy()
             
-            # Add results
-            for j, window in enumerate(batch):
-                confidence = float(predictions[j])
-                results.append({
-                    'start_time': window['start_time'],
-                    'end_time': window['end_time'],
-                    'confidence': confidence,
-                    'is_sponsored': confidence > threshold
-                })
+            for j, k in enumerate(batch):
+                confidences[k] = float(predictions[j])
+        
+        # Results stay in time order
+        results = []
+        for window, confidence in zip(windows_data, confidences):
+            results.append({
+                'start_time': window['start_time'],
+                'end_time': window['end_time'],
+                'confidence': confidence,
+                'is_sponsored': confidence > threshold
+            })
         
         return results
 
-    def save_model(self, model_name: str):
-        """Save the model and its configuration"""
+    def save_model(self, model_name: str, timestamped: bool = True):
+        """Save the model and its configuration, to a new timestamped directory unless timestamped is False"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        save_dir = os.path.join(self.model_dir, f"{model_name}_{timestamp}")
+        save_dir = os.path.join(self.model_dir, f"{model_name}_{timestamp}" if timestamped else model_name)
         os.makedirs(save_dir, exist_ok=True)
         
         # Save model state
         torch.save(self.model.state_dict(), os.path.join(save_dir, 'model.pt'))
         
+        # Save base model config and tokenizer so inference can load offline
+        self.model.bert.config.save_pretrained(os.path.join(save_dir, 'base_config'))
+        self.tokenizer.save_pretrained(os.path.join(save_dir, 'tokenizer'))
+        
         # Save model configuration
         config = {
             'model_type': 'SponsorshipDetector',
-            'base_model': 'distilbert-base-uncased',
+            'base_model': self.base_model,
             'saved_at': timestamp
         }
         with open(os.path.join(save_dir, 'config.json'), 'w') as f:
@@ -187,3 +394,299 @@ class ModelTrainer:
         """Load a saved model"""
         self.model.load_state_dict(torch.load(os.path.join(model_path, 'model.pt')))
         self.model.eval()
+
+
+def _weights_digest(weights_file: str) -> str:
+    """Short content hash of a checkpoint's weights"""
+    digest = hashlib.sha256()
+    with open(weights_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class InferenceEngine:
+    """
+    Inference-only wrapper around a SponsorshipDetector checkpoint.
+    Loads one tokenizer and builds the model straight from the saved weights,
+    without the loss, optimizer or pretrained download that ModelTrainer needs.
+    """
+    def __init__(self, model_path: Optional[str] = None, backend: str = 'torch', batch_size: int = 64,
+                 max_tokens_per_batch: int = 4096, max_wait_ms: Optional[float] = None,
+                 score_cache: Optional[ScoreCache] = None):
+        """
+        Args:
+            model_path: Directory written by ModelTrainer.save_model, or None for the base model
+            backend: 'torch' (fp32), 'quantized' (PyTorch INT8 dynamic quantization, applied at load),
+                'onnx' or 'onnx-int8' (ONNX Runtime on a graph written by export_model)
+            batch_size: Maximum number of windows per forward pass
+            max_tokens_per_batch: Padded token budget per forward pass; windows are
+                bucketed by length so short windows run in larger batches
+            max_wait_ms: When set, windows from concurrent callers are pooled into
+                shared forward passes, waiting at most this long for a batch to fill
+            score_cache: Cache of window scores; only misses are sent to the model
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+        self.model_path = model_path
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.device = torch.device('cuda' if torch.cuda.is_available() and backend == 'torch' else 'cpu')
+        
+        config = {}
+        if model_path:
+            config_file = os.path.join(model_path, 'config.json')
+            if os.path.exists(config_file):
+                with open(config_file, 'r') as f:
+                    config = json.load(f)
+        self.base_model = config.get('base_model', DEFAULT_BASE_MODEL)
+        # Identifies the scores this engine produces, for caches and stored results. Checkpoints
+        # are keyed on their weights, since retraining can overwrite the same directory. Without
+        # one the classifier head is randomly initialised, so its scores belong to this instance only
+        checkpoint_name = f"{self.base_model}@untrained-{uuid.uuid4().hex[:8]}"
+        if model_path:
+            weights_file = os.path.join(model_path, 'model.pt')
+            content = _weights_digest(weights_file) if os.path.exists(weights_file) else config.get('saved_at', 'unsaved')
+            checkpoint_name = f"{os.path.basename(os.path.normpath(model_path))}@{content}"
+        self.model_version = f"{checkpoint_name}:{backend}"
+        self.score_cache = score_cache
+        
+        # Prefer the files saved next to the checkpoint over the hub
+        self.tokenizer = AutoTokenizer.from_pretrained(self._checkpoint_file('tokenizer') or self.base_model)
+        
+        self.model = None
+        self.session = None
+        if backend in EXPORT_FILES:
+            self.session = self._load_onnx_session()
+        else:
+            self.model = self._build_model()
+            if model_path:
+                state_dict = torch.load(os.path.join(model_path, 'model.pt'), map_location='cpu')
+                self.model.load_state_dict(state_dict)
+                del state_dict
+            if backend == 'quantized':
+                self.model = _quantize(self.model)
+        if self.model is not None:
+            self.model.to(self.device)
+            self.model.eval()
+        
+        self.batcher = None
+        if max_wait_ms is not None:
+            self.batcher = DynamicBatcher(self._forward_token_ids, max_batch_size=batch_size, max_wait_ms=max_wait_ms)
+
+    def _build_model(self) -> SponsorshipDetector:
+        """Build the detector architecture, pretrained only when there is no checkpoint"""
+        if not self.model_path:
+            return SponsorshipDetector(self.base_model)
+        return SponsorshipDetector(self._checkpoint_file('base_config') or self.base_model, pretrained=False)
+
+    def _load_onnx_session(self):
+        """Open an ONNX Runtime session on the exported graph"""
+        onnx_file = self._checkpoint_file(EXPORT_FILES[self.backend])
+        if onnx_file is None:
+            raise FileNotFoundError(
+                f"No {EXPORT_FILES[self.backend]} in {self.model_path}; "
+                f"export it first with `cli.py export --format {self.backend}`"
+            )
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError(f"The '{self.backend}' backend requires onnxruntime (pip install onnxruntime)")
+        return onnxruntime.InferenceSession(onnx_file, providers=['CPUExecutionProvider'])
+
+    def _checkpoint_file(self, name: str) -> Optional[str]:
+        """Return the path of a file saved alongside the checkpoint, if present"""
+        if not self.model_path:
+            return None
+        path = os.path.join(self.model_path, name)
+        return path if os.path.exists(path) else None
+
+    def encode_windows(self, windows_data: List[Dict]) -> List[List[int]]:
+        """
+        Return unpadded token ID lists for windows, reusing the 'input_ids'
+        of token windows and tokenizing the processed text of the rest
+        """
+        missing = [i for i, w in enumerate(windows_data) if 'input_ids' not in w]
+        token_ids = [w.get('input_ids') for w in windows_data]
+        if missing:
+            texts = [windows_data[i]['processed_text'] for i in missing]
+            encoded = self.tokenizer(texts, truncation=True, max_length=512)['input_ids']
+            for i, ids in zip(missing, encoded):
+                token_ids[i] = ids
+        return token_ids
+
+    def score_windows(self, windows_data: List[Dict]) -> List[float]:
+        """
+        Return the sponsorship confidence for each window, in order.
+        With a score cache, only windows whose text has not been scored by
+        this model version before are run through the model.
+        """
+        if self.score_cache is None:
+            return self.score_token_ids(self.encode_windows(windows_data))
+        
+        keys = [ScoreCache.window_key(w['processed_text']) for w in windows_data]
+        scores = self.score_cache.get_many(self.model_version, keys)
+        
+        # One forward pass per distinct missing text
+        missing = {}
+        for window, key in zip(windows_data, keys):
+            if key not in scores and key not in missing:
+                missing[key] = window
+        if missing:
+            computed = self.score_token_ids(self.encode_windows(list(missing.values())))
+            new_scores = dict(zip(missing.keys(), computed))
+            self.score_cache.put_many(self.model_version, new_scores)
+            scores.update(new_scores)
+        return [scores[key] for key in keys]
+
+    def score_token_ids(self, token_ids: List[List[int]]) -> List[float]:
+        """
+        Return the sponsorship confidence for each tokenized window.
+        Goes through the shared batcher when one is configured.
+        """
+        if self.batcher is not None:
+            return self.batcher.submit(token_ids)
+        return self._forward_token_ids(token_ids)
+
+    def _forward_token_ids(self, token_ids: List[List[int]]) -> List[float]:
+        """Run the model over token ID lists in length-bucketed batches"""
+        scores = [0.0] * len(token_ids)
+        batches = length_bucketed_batches(
+            [len(ids) for ids in token_ids], self.max_tokens_per_batch, self.batch_size
+        )
+        for batch in batches:
+            inputs = self.tokenizer.pad(
+                {'input_ids': [token_ids[k] for k in batch]},
+                return_tensors='pt'
+            )
+            for k, score in zip(batch, self._run_model(inputs['input_ids'], inputs['attention_mask'])):
+                scores[k] = score
+        return scores
+
+    def _run_model(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> List[float]:
+        """Run one padded batch through the selected backend"""
+        if self.session is not None:
+            outputs = self.session.run(None, {
+                'input_ids': input_ids.numpy(),
+                'attention_mask': attention_mask.numpy()
+            })[0]
+            return outputs.reshape(-1).tolist()
+        with torch.inference_mode():
+            outputs = self.model(input_ids.to(self.device), attention_mask.to(self.device))
+        return outputs.view(-1).cpu().tolist()
+
+    def predict_segments(self, windows_data: List[Dict], threshold: float = 0.5) -> List[Dict]:
+        """
+        Make predictions on video segments and identify potential sponsorship regions
+        Args:
+            windows_data: List of windows with text and timestamp information
+            threshold: Confidence threshold for sponsorship detection
+        Returns:
+            List of segments with predictions and confidence scores
+        """
+        scores = self.score_windows(windows_data)
+        return [
+            {
+                'start_time': window['start_time'],
+                'end_time': window['end_time'],
+                'confidence': float(confidence),
+                'is_sponsored': confidence > threshold
+            }
+            for window, confidence in zip(windows_data, scores)
+        ]
+
+    def close(self):
+        """Release the batching worker, if any"""
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def _quantize(model: nn.Module) -> nn.Module:
+    """Apply INT8 dynamic quantization to the linear layers"""
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {nn.Linear}, dtype=torch.qint8)
+
+
+def export_model(model_path: str, export_format: str = 'onnx') -> str:
+    """
+    Export a saved checkpoint as an ONNX graph next to its model.pt
+    Args:
+        model_path: Directory written by ModelTrainer.save_model
+        export_format: 'onnx' (fp32) or 'onnx-int8' (dynamically quantized weights)
+    Returns:
+        Path of the exported file
+    """
+    if export_format not in EXPORT_FILES:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_FILES)}")
+    
+    onnx_file = os.path.join(model_path, EXPORT_FILES['onnx'])
+    if export_format == 'onnx' or not os.path.exists(onnx_file):
+        engine = InferenceEngine(model_path, backend='torch')
+        model = engine.model.cpu().eval()
+        
+        # Trace with a padded example so the attention mask stays in the graph
+        input_ids = torch.full((2, 16), engine.tokenizer.cls_token_id or 0, dtype=torch.long)
+        attention_mask = torch.ones((2, 16), dtype=torch.long)
+        attention_mask[1, 8:] = 0
+        dynamic_axes = {
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'confidence': {0: 'batch'}
+        }
+        torch.onnx.export(
+            model,
+            (input_ids, attention_mask),
+            onnx_file,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['confidence'],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            dynamo=False
+        )
+    if export_format == 'onnx':
+        return onnx_file
+    
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    output_file = os.path.join(model_path, EXPORT_FILES[export_format])
+    quantize_dynamic(onnx_file, output_file, weight_type=QuantType.QInt8)
+    return output_file
+
+
+def compare_backends(model_path: str, windows_data: List[Dict], backends: Tuple[str, ...] = BACKENDS,
+                     threshold: float = 0.5, repeats: int = 3) -> Dict[str, Dict]:
+    """
+    Check accuracy parity and latency of inference backends against fp32 PyTorch
+    Args:
+        model_path: Directory written by ModelTrainer.save_model
+        windows_data: Windows with 'processed_text' (or 'input_ids') to score
+        backends: Backends to compare; 'torch' is always the reference
+        threshold: Confidence threshold used for label agreement
+        repeats: Timed passes per backend, the fastest is reported
+    Returns:
+        Per-backend score differences, label agreement and latency
+    """
+    report = {}
+    reference = None
+    for backend in ('torch',) + tuple(b for b in backends if b != 'torch'):
+        engine = InferenceEngine(model_path, backend=backend)
+        token_ids = engine.encode_windows(windows_data)
+        engine.score_token_ids(token_ids)  # warm-up
+        
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            scores = np.array(engine.score_token_ids(token_ids))
+            timings.append(time.perf_counter() - started)
+        if reference is None:
+            reference = scores
+        
+        diff = np.abs(scores - reference)
+        best = min(timings)
+        report[backend] = {
+            'max_abs_diff': float(diff.max()) if len(diff) else 0.0,
+            'mean_abs_diff': float(diff.mean()) if len(diff) else 0.0,
+            'label_agreement': float(np.mean((scores > threshold) == (reference > threshold))) if len(diff) else 1.0,
+            'latency_ms': 1000 * best,
+            'windows_per_sec': len(token_ids) / best if best > 0 else 0.0
+        }
+    return report
@@ -0,0 +1,96 @@
+import hashlib
+import os
+from typing import Dict, List
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from .data_processor import clean_texts
+
+
+class LexicalPrefilter:
+    """
+    Cheap first stage of the detection cascade: hashed word n-grams and a
+    logistic regression, trained on the same labeled windows as the transformer.
+
+    Windows scoring below skip_threshold are treated as not sponsored without
+    running the transformer. The threshold is calibrated on held-out windows so
+    that at most max_recall_loss of the sponsored ones fall below it.
+    """
+
+    def __init__(self, n_features: int = 2 ** 20, ngram_range: tuple = (1, 2)):
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=ngram_range, alternate_sign=False, norm='l2'
+        )
+        self.classifier = LogisticRegression(max_iter=1000, class_weight='balanced')
+        self.skip_threshold = 0.0
+        self.calibration: Dict = {}
+        self.version = None
+
+    def fit(self, labeled_data: List[Dict], max_recall_loss: float = 0.01, val_fraction: float = 0.2) -> Dict:
+        """
+        Train on labeled windows and calibrate the skip threshold
+        Args:
+            labeled_data: Dicts with 'text' and 'is_sponsored' fields, as for prepare_training_data
+            max_recall_loss: Largest fraction of held-out sponsored windows the prefilter may skip
+            val_fraction: Fraction of windows held out for calibration
+        Returns:
+            Calibration report: threshold, skipped fraction and recall loss on held-out windows
+        Raises:
+            ValueError: If the data lacks sponsored or non-sponsored windows
+        """
+        texts = clean_texts([example['text'] for example in labeled_data])
+        labels = np.asarray([int(example['is_sponsored']) for example in labeled_data])
+        if labels.min(initial=1) == labels.max(initial=0):
+            raise ValueError("Prefilter training needs both sponsored and non-sponsored windows")
+        train_texts, val_texts, train_labels, val_labels = train_test_split(
+            texts, labels, test_size=val_fraction, random_state=42, stratify=labels
+        )
+        self.classifier.fit(self.vectorizer.transform(train_texts), train_labels)
+        self.calibration = self.calibrate(val_texts, val_labels, max_recall_loss)
+        return self.calibration
+
+    def calibrate(self, texts: List[str], labels: np.ndarray, max_recall_loss: float) -> Dict:
+        """Pick the highest skip threshold that keeps the recall loss on (texts, labels) within budget"""
+        scores = self._scores(texts)
+        positive_scores = np.sort(scores[labels == 1])
+        # At most `allowed` positives may score below the threshold
+        allowed = min(int(np.floor(max_recall_loss * len(positive_scores))), len(positive_scores) - 1)
+        self.skip_threshold = float(positive_scores[allowed]) if len(positive_scores) else 0.0
+        # Identifies the weights and threshold, so cascade scores are stored separately
+        digest = hashlib.blake2b(digest_size=4)
+        digest.update(self.classifier.coef_.tobytes())
+        digest.update(self.classifier.intercept_.tobytes())
+        self.version = f"prefilter-{digest.hexdigest()}@{self.skip_threshold:.4g}"
+        skipped = scores < self.skip_threshold
+        return {
+            'skip_threshold': self.skip_threshold,
+            'max_recall_loss': max_recall_loss,
+            'recall_loss': float(skipped[labels == 1].mean()) if len(positive_scores) else 0.0,
+            'skipped_fraction': float(skipped.mean()),
+            'calibration_windows': int(len(labels))
+        }
+
+    def _scores(self, processed_texts: List[str]) -> np.ndarray:
+        return self.classifier.predict_proba(self.vectorizer.transform(processed_texts))[:, 1]
+
+    def score(self, processed_texts: List[str]) -> np.ndarray:
+        """Sponsorship probability of already preprocessed window texts"""
+        if not processed_texts:
+            return np.zeros(0)
+        return self._scores(processed_texts)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> 'LexicalPrefilter':
+        prefilter = joblib.load(path)
+        if not isinstance(prefilter, LexicalPrefilter):
+            raise ValueError(f"{path} does not contain a LexicalPrefilter")
+        return prefilter
+
@@ -2,7 +2,8 @@ import os
 import aiohttp
 import logging
 import asyncio
-from typing import Optional, Dict, Any
+import random
+from typing import Optional, Dict, Any, Callable, Iterable
 from urllib.parse import urljoin, urlparse, urlunparse
 
 # Configure logging
@@ -15,9 +16,18 @@ class PubSubHubbubError(Exception):
 class PubSubHubbub:
     """Handles PubSubHubbub subscriptions for YouTube channel updates."""
     
-    def __init__(self):
-        """Initialize the PubSubHubbub client with configuration from environment variables."""
-        self.hub_url = "https://pubsubhubbub.appspot.com/subscribe"
+    def __init__(self, max_connections: int = 20):
+        """
+        Initialize the PubSubHubbub client with configuration from environment variables.
+        
+        Args:
+            max_connections: Connections the shared session keeps open to the hub at most
+        """
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        # PUBSUB_HUB_URL points at another hub, e.g. a local stand-in
+        self.hub_url = os.getenv("PUBSUB_HUB_URL", "https://pubsubhubbub.appspot.com/subscribe")
         
         # Set default callback URL with HTTPS
         default_callback = "https://localhost:8000/webhook"
@@ -56,17 +66,21 @@ class PubSubHubbub:
             logger.error(f"Invalid URL format: {url}")
             raise PubSubHubbubError(f"Invalid URL format: {str(e)}")
 
-    async def _make_hub_request(self, channel_id: str, mode: str) -> bool:
-        """
-        Make a request to the PubSubHubbub hub with improved error handling.
-        
-        Args:
-            channel_id: YouTube channel ID to subscribe to
-            mode: 'subscribe' or 'unsubscribe'
-            
-        Returns:
-            bool: True if successful, False otherwise
-        """
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """The pooled session shared by all hub requests, opened on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the shared session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _hub_request_data(self, channel_id: str, mode: str) -> Dict[str, str]:
         if mode not in ('subscribe', 'unsubscribe'):
             raise ValueError("Mode must be either 'subscribe' or 'unsubscribe'")
             
@@ -83,48 +97,140 @@ class PubSubHubbub:
         # Add verify token if available
         if self.verify_token:
             data["hub.verify_token"] = self.verify_token
+        return data
+
+    async def _send_hub_request(self, session: aiohttp.ClientSession, channel_id: str, mode: str,
+                                max_attempts: int = 1, backoff_base: float = 1.0,
+                                request_timeout: float = 30.0) -> Dict[str, Any]:
+        """
+        Send one hub request on a session, retrying 5xx and 429 responses, timeouts and
+        connection errors with jittered exponential backoff.
         
+        Returns:
+            Outcome with ok, status (HTTP status or None), attempts and error
+        """
+        data = self._hub_request_data(channel_id, mode)
         logger.info(f"PubSubHubbub {mode} request for channel {channel_id}")
         logger.debug(f"Request data: {data}")
         
+        outcome = {'ok': False, 'status': None, 'attempts': 0, 'error': None}
+        for attempt in range(1, max_attempts + 1):
+            outcome['attempts'] = attempt
+            retry = False
+            try:
+                async with session.post(
+                    self.hub_url,
+                    data=data,
+                    timeout=aiohttp.ClientTimeout(total=request_timeout),
+                    headers={'User-Agent': 'Mozilla/5.0'}
+                ) as response:
+                    response_text = await response.text()
+                    outcome['status'] = response.status
+                    logger.info(f"Response status: {response.status}")
+                    logger.debug(f"Response text: {response_text}")
+
+                    # Check for successful response
+                    if response.status in (202, 204):
+                        logger.info(f"Successfully sent {mode} request for channel {channel_id}")
+                        outcome.update(ok=True, error=None)
+                        return outcome
+
+                    # Handle conflict (409) - subscription already exists
+                    if response.status == 409 and "already subscribed" in response_text.lower():
+                        logger.info(f"Channel {channel_id} is already {mode}d")
+                        outcome.update(ok=True, error=None)
+                        return outcome
+
+                    outcome['error'] = f"HTTP {response.status}: {response_text.strip()[:200]}"
+                    retry = response.status >= 500 or response.status == 429
+
+            except asyncio.TimeoutError:
+                outcome.update(status=None, error="Timeout")
+                retry = True
+            except aiohttp.ClientError as e:
+                outcome.update(status=None, error=f"{type(e).__name__}: {str(e)}")
+                retry = True
+
+            if not retry or attempt == max_attempts:
+                break
+            delay = backoff_base * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.warning(f"{mode} of channel {channel_id} failed ({outcome['error']}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        logger.error(f"Failed to {mode} channel {channel_id} after {outcome['attempts']} attempt(s): {outcome['error']}")
+        return outcome
+
+    async def _make_hub_request(self, channel_id: str, mode: str) -> bool:
+        """
+        Make a request to the PubSubHubbub hub with improved error handling.
+        
+        Args:
+            channel_id: YouTube channel ID to subscribe to
+            mode: 'subscribe' or 'unsubscribe'
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if mode not in ('subscribe', 'unsubscribe'):
+            raise ValueError("Mode must be either 'subscribe' or 'unsubscribe'")
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                # First try with a short timeout
-                try:
-                    async with session.post(
-                        self.hub_url,
-                        data=data,
-                        timeout=30,
-                        headers={'User-Agent': 'Mozilla/5.0'}
-                    ) as response:
-                        response_text = await response.text()
-                        logger.info(f"Response status: {response.status}")
-                        logger.debug(f"Response text: {response_text}")
-
-                        # Check for successful response
-                        if response.status in (202, 204):
-                            logger.info(f"Successfully sent {mode} request for channel {channel_id}")
-                            return True
-
-                        # Handle conflict (409) - subscription already exists
-                        if response.status == 409 and "already subscribed" in response_text.lower():
-                            logger.info(f"Channel {channel_id} is already {mode}d")
-                            return True
-
-                        logger.error(
-                            f"Failed to {mode} channel {channel_id}. "
-                            f"Status: {response.status}, Response: {response_text}"
-                        )
-                        return False
-
-                except asyncio.TimeoutError:
-                    logger.error(f"Timeout while trying to {mode} channel {channel_id}")
-                    return False
+            outcome = await self._send_hub_request(await self._get_session(), channel_id, mode)
+            return outcome['ok']
                     
         except Exception as e:
             logger.exception(f"Unexpected error during {mode} for channel {channel_id}")
             return False
 
+    async def bulk_request(self, channel_ids: Iterable[str], mode: str, concurrency: Optional[int] = None,
+                           max_attempts: int = 4, backoff_base: float = 1.0, request_timeout: float = 30.0,
+                           progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Subscribe or unsubscribe many channels over the shared session.
+        
+        Args:
+            channel_ids: YouTube channel IDs; duplicates are sent once
+            mode: 'subscribe' or 'unsubscribe'
+            concurrency: Most requests in flight at once (default: max_connections)
+            max_attempts: Attempts per channel; 5xx and 429 responses, timeouts and connection errors are retried
+            backoff_base: Delay before the first retry in seconds, doubling per attempt, with jitter
+            request_timeout: Timeout per attempt in seconds
+            progress: Called with each channel ID and its outcome as it finishes
+            
+        Returns:
+            Outcome per channel ID: ok, status (HTTP status or None), attempts and error
+        """
+        if mode not in ('subscribe', 'unsubscribe'):
+            raise ValueError("Mode must be either 'subscribe' or 'unsubscribe'")
+        channel_ids = list(dict.fromkeys(channel_ids))
+        semaphore = asyncio.Semaphore(concurrency or self.max_connections)
+        outcomes = {}
+        
+        session = await self._get_session()
+        
+        async def run(channel_id: str):
+            async with semaphore:
+                try:
+                    outcome = await self._send_hub_request(session, channel_id, mode, max_attempts, backoff_base,
+                                                           request_timeout)
+                except Exception as e:
+                    logger.exception(f"Unexpected error during {mode} for channel {channel_id}")
+                    outcome = {'ok': False, 'status': None, 'attempts': 0, 'error': str(e)}
+            outcomes[channel_id] = outcome
+            if progress is not None:
+                progress(channel_id, outcome)
+        
+        await asyncio.gather(*(run(channel_id) for channel_id in channel_ids))
+        return {channel_id: outcomes[channel_id] for channel_id in channel_ids}
+
+    async def bulk_subscribe(self, channel_ids: Iterable[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Subscribe to many channels; see bulk_request for options"""
+        return await self.bulk_request(channel_ids, 'subscribe', **kwargs)
+
+    async def bulk_unsubscribe(self, channel_ids: Iterable[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+        """Unsubscribe from many channels; see bulk_request for options"""
+        return await self.bulk_request(channel_ids, 'unsubscribe', **kwargs)
+
     async def subscribe_to_channel(self, channel_id: str) -> bool:
         """
         Subscribe to a YouTube channel's updates.
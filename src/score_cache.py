@@ -0,0 +1,108 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class ScoreCache:
+    """
+    Content-addressed cache of window scores keyed by (model version, text hash).
+    A bounded in-memory LRU sits in front of an optional SQLite file, so scores
+    survive restarts and are shared between workers on the same host.
+    """
+
+    def __init__(self, db_path: Optional[str] = "data/cache/scores.db", max_memory_entries: int = 100000):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS window_scores ("
+                "model_version TEXT NOT NULL, window_hash TEXT NOT NULL, score REAL NOT NULL, "
+                "PRIMARY KEY (model_version, window_hash)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def window_key(processed_text: str) -> str:
+        """Hash of the processed window text"""
+        return hashlib.blake2b(processed_text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get_many(self, model_version: str, keys: Iterable[str]) -> Dict[str, float]:
+        """
+        Look up scores for window keys
+        Returns:
+            Scores for the keys that were found in either tier
+        """
+        found = {}
+        disk_keys = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                score = self._memory.get((model_version, key))
+                if score is None:
+                    disk_keys.append(key)
+                else:
+                    self._memory.move_to_end((model_version, key))
+                    found[key] = score
+            self._counters['memory_hits'] += len(found)
+
+            if disk_keys and self._conn is not None:
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(disk_keys), 500):
+                    chunk = disk_keys[i:i + 500]
+                    rows = self._conn.execute(
+                        "SELECT window_hash, score FROM window_scores WHERE model_version = ? "
+                        f"AND window_hash IN ({','.join('?' * len(chunk))})",
+                        [model_version] + chunk
+                    ).fetchall()
+                    for key, score in rows:
+                        found[key] = score
+                        self._remember(model_version, key, score)
+                    self._counters['disk_hits'] += len(rows)
+            self._counters['misses'] += len(disk_keys) - sum(1 for key in disk_keys if key in found)
+        return found
+
+    def put_many(self, model_version: str, scores: Dict[str, float]):
+        """Store scores in both tiers"""
+        if not scores:
+            return
+        with self._lock:
+            for key, score in scores.items():
+                self._remember(model_version, key, score)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO window_scores (model_version, window_hash, score) VALUES (?, ?, ?)",
+                    [(model_version, key, float(score)) for key, score in scores.items()]
+                )
+                self._conn.commit()
+
+    def _remember(self, model_version: str, key: str, score: float):
+        self._memory[(model_version, key)] = score
+        self._memory.move_to_end((model_version, key))
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the size of the memory tier"""
+        with self._lock:
+            lookups = sum(self._counters.values())
+            hits = self._counters['memory_hits'] + self._counters['disk_hits']
+            return {
+                **self._counters,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory)
+            }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,271 @@
+import bisect
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+from torch.utils.data.distributed import DistributedSampler
+
+from . import distributed
+from .data_processor import clean_texts
+
+MANIFEST_FILE = 'manifest.json'
+
+
+class ShardWriter:
+    """
+    Tokenizes labeled windows once and writes them as memory-mappable shards.
+
+    Each shard is three .npy files: tokens (all examples' input IDs, including
+    special tokens, concatenated in the smallest unsigned dtype that fits the
+    vocabulary), offsets (int64, one more than the example count) and labels
+    (uint8). manifest.json lists the shards with the tokenizer settings.
+    """
+
+    def __init__(self, output_dir: str, tokenizer, max_length: int = 512,
+                 shard_size: int = 100000, tokenize_batch_size: int = 1024):
+        self.output_dir = output_dir
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.shard_size = shard_size
+        self.tokenize_batch_size = tokenize_batch_size
+        self.dtype = np.dtype(np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max + 1 else np.uint32)
+        self.shards: List[Dict] = []
+        self._texts: List[str] = []
+        self._labels: List[int] = []
+        self._token_chunks: List[np.ndarray] = []
+        self._lengths: List[int] = []
+        self._shard_labels: List[int] = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, text: str, label: int):
+        """Queue one labeled window; tokenization happens in batches"""
+        self._texts.append(text)
+        self._labels.append(int(label))
+        if len(self._texts) >= self.tokenize_batch_size:
+            self._tokenize_pending()
+
+    def _tokenize_pending(self):
+        if not self._texts:
+            return
+        input_ids = self.tokenizer(
+            clean_texts(self._texts), truncation=True, max_length=self.max_length
+        )['input_ids']
+        for ids, label in zip(input_ids, self._labels):
+            self._token_chunks.append(np.asarray(ids, dtype=self.dtype))
+            self._lengths.append(len(ids))
+            self._shard_labels.append(label)
+            if len(self._lengths) >= self.shard_size:
+                self._write_shard()
+        self._texts = []
+        self._labels = []
+
+    def _write_shard(self):
+        if not self._lengths:
+            return
+        name = f"shard_{len(self.shards):05d}"
+        offsets = np.zeros(len(self._lengths) + 1, dtype=np.int64)
+        np.cumsum(self._lengths, out=offsets[1:])
+        np.save(os.path.join(self.output_dir, f"{name}.tokens.npy"), np.concatenate(self._token_chunks))
+        np.save(os.path.join(self.output_dir, f"{name}.offsets.npy"), offsets)
+        np.save(os.path.join(self.output_dir, f"{name}.labels.npy"), np.asarray(self._shard_labels, dtype=np.uint8))
+        self.shards.append({
+            'name': name,
+            'examples': len(self._lengths),
+            'tokens': int(offsets[-1]),
+            'positives': int(sum(self._shard_labels))
+        })
+        self._token_chunks = []
+        self._lengths = []
+        self._shard_labels = []
+
+    def close(self) -> Dict:
+        """
+        Write the remaining examples and the manifest
+        Returns:
+            The manifest
+        """
+        self._tokenize_pending()
+        self._write_shard()
+        manifest = {
+            'tokenizer': getattr(self.tokenizer, 'name_or_path', None),
+            'max_length': self.max_length,
+            'dtype': self.dtype.name,
+            'pad_token_id': self.tokenizer.pad_token_id,
+            'examples': sum(shard['examples'] for shard in self.shards),
+            'shards': self.shards
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def write_shards(examples: Iterable[Dict], output_dir: str, tokenizer, max_length: int = 512,
+                 shard_size: int = 100000) -> Dict:
+    """
+    Tokenize labeled windows into shards
+    Args:
+        examples: Dicts with 'text' and 'is_sponsored' fields, as for prepare_training_data
+        output_dir: Directory for the shard files and manifest
+        tokenizer: Tokenizer of the model to be trained
+        max_length: Maximum tokens per example, including special tokens
+        shard_size: Examples per shard
+    Returns:
+        The manifest
+    """
+    writer = ShardWriter(output_dir, tokenizer, max_length=max_length, shard_size=shard_size)
+    for example in examples:
+        writer.add(example['text'], example['is_sponsored'])
+    return writer.close()
+
+
+class TokenShardDataset(Dataset):
+    """
+    Examples from shards written by ShardWriter, read through memory maps.
+    The maps are opened lazily, so each DataLoader worker maps the files
+    itself and the page cache is shared between them.
+    """
+
+    def __init__(self, shard_dir: str):
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.pad_token_id = self.manifest['pad_token_id']
+        # starts[i] is the index of the first example of shard i
+        self._starts = [0]
+        for shard in self.manifest['shards']:
+            self._starts.append(self._starts[-1] + shard['examples'])
+        self._arrays = None
+
+    def _open(self):
+        self._arrays = [
+            tuple(
+                np.load(os.path.join(self.shard_dir, f"{shard['name']}.{kind}.npy"), mmap_mode='r')
+                for kind in ('tokens', 'offsets', 'labels')
+            )
+            for shard in self.manifest['shards']
+        ]
+
+    def __getstate__(self):
+        # Workers reopen the maps rather than pickling them
+        state = self.__dict__.copy()
+        state['_arrays'] = None
+        return state
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def lengths(self) -> np.ndarray:
+        """Token count of every example, without reading the tokens"""
+        if self._arrays is None:
+            self._open()
+        return np.concatenate([np.diff(offsets) for _, offsets, _ in self._arrays]) \
+            if self._arrays else np.zeros(0, dtype=np.int64)
+
+    def __getitem__(self, index: int) -> Dict:
+        if self._arrays is None:
+            self._open()
+        if index < 0:
+            index += len(self)
+        shard = bisect.bisect_right(self._starts, index) - 1
+        tokens, offsets, labels = self._arrays[shard]
+        local = index - self._starts[shard]
+        return {
+            'input_ids': torch.from_numpy(tokens[offsets[local]:offsets[local + 1]].astype(np.int64)),
+            'labels': int(labels[local])
+        }
+
+
+class PaddingCollator:
+    """Pads each batch only to its own longest example"""
+
+    def __init__(self, pad_token_id: int):
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, examples: List[Dict]) -> Dict[str, torch.Tensor]:
+        max_length = max(len(example['input_ids']) for example in examples)
+        input_ids = torch.full((len(examples), max_length), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(examples), max_length), dtype=torch.long)
+        for row, example in enumerate(examples):
+            length = len(example['input_ids'])
+            input_ids[row, :length] = example['input_ids']
+            attention_mask[row, :length] = 1
+        return {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'labels': torch.tensor([example['labels'] for example in examples], dtype=torch.long)
+        }
+
+
+class LengthGroupedSampler(Sampler):
+    """
+    Shuffles examples, then sorts each run of batch_size * group_batches by length,
+    so batches hold similar lengths and dynamic padding wastes little.
+    With num_replicas > 1, each rank gets an equal-sized, disjoint share of the
+    shuffled order (padded by wrapping around, like DistributedSampler).
+    """
+
+    def __init__(self, lengths: np.ndarray, batch_size: int, group_batches: int = 50, seed: int = 42,
+                 num_replicas: int = 1, rank: int = 0):
+        self.lengths = lengths
+        self.group_size = batch_size * group_batches
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.num_samples = -(-len(lengths) // num_replicas)
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+    def __iter__(self) -> Iterator[int]:
+        # Same seed on every rank, so the shares never overlap
+        rng = np.random.default_rng(self.seed + self.epoch)
+        order = rng.permutation(len(self.lengths))
+        total = self.num_samples * self.num_replicas
+        if total > len(order):
+            order = np.concatenate([order, order[:total - len(order)]])
+        order = order[self.rank:total:self.num_replicas]
+        for start in range(0, len(order), self.group_size):
+            group = order[start:start + self.group_size]
+            yield from group[np.argsort(self.lengths[group], kind='stable')].tolist()
+
+
+def create_dataloader(shard_dir: str, batch_size: int = 32, shuffle: bool = True, num_workers: int = 2,
+                      group_by_length: bool = True, sampler: Optional[Sampler] = None,
+                      distributed_sampling: Optional[bool] = None) -> DataLoader:
+    """
+    DataLoader over a shard directory, yielding input_ids, attention_mask and labels
+    as ModelTrainer.train expects
+    Args:
+        shard_dir: Directory written by write_shards
+        batch_size: Examples per batch
+        shuffle: Shuffle every epoch (ignored when a sampler is given)
+        num_workers: Loader worker processes
+        group_by_length: When shuffling, batch examples of similar length to reduce padding
+        sampler: Custom sampler
+        distributed_sampling: Give each process of the process group its own share
+            of the examples (default: whenever a process group is running)
+    """
+    dataset = TokenShardDataset(shard_dir)
+    if distributed_sampling is None:
+        distributed_sampling = distributed.is_distributed()
+    num_replicas, rank = (distributed.get_world_size(), distributed.get_rank()) if distributed_sampling else (1, 0)
+    if sampler is None and shuffle and group_by_length:
+        sampler = LengthGroupedSampler(dataset.lengths(), batch_size, num_replicas=num_replicas, rank=rank)
+    elif sampler is None and distributed_sampling:
+        sampler = DistributedSampler(dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle)
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle and sampler is None,
+        sampler=sampler,
+        num_workers=num_workers,
+        collate_fn=PaddingCollator(dataset.pad_token_id),
+        persistent_workers=num_workers > 0
+    )
@@ -0,0 +1,138 @@
+import mmap
+import struct
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+MAGIC = b'CTR1'
+# magic, segment count, text buffer length; 16 bytes keeps the float arrays 8-byte aligned
+HEADER = struct.Struct('<4sIQ')
+
+
+class CompactTranscript:
+    """
+    Columnar transcript: start and duration times as float64 arrays, and all
+    segment texts as one UTF-8 buffer with an offsets array.
+
+    The binary layout is the header followed by starts, durations, offsets
+    (uint32, one more than the segment count) and the text bytes. from_buffer()
+    wraps those sections in place, so a transcript read from SQLite or a
+    memory-mapped file is used without copying or parsing.
+
+    Indexing returns a {'text', 'start', 'duration'} dict, so code written
+    against the list-of-dicts transcript keeps working.
+    """
+
+    __slots__ = ('starts', 'durations', 'offsets', 'text_buffer', '_source')
+
+    def __init__(self, starts: np.ndarray, durations: np.ndarray, offsets: np.ndarray,
+                 text_buffer: Union[bytes, memoryview], source=None):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.text_buffer = memoryview(text_buffer)
+        # Keeps a memory map open for as long as the arrays point into it
+        self._source = source
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict]) -> 'CompactTranscript':
+        """Build from a list of {'text', 'start', 'duration'} dicts"""
+        segments = list(segments)
+        encoded = [seg['text'].encode('utf-8') for seg in segments]
+        offsets = np.zeros(len(segments) + 1, dtype=np.uint32)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(
+            np.fromiter((seg['start'] for seg in segments), dtype=np.float64, count=len(segments)),
+            np.fromiter((seg['duration'] for seg in segments), dtype=np.float64, count=len(segments)),
+            offsets,
+            b''.join(encoded)
+        )
+
+    @classmethod
+    def from_buffer(cls, buffer, source=None) -> 'CompactTranscript':
+        """
+        Wrap a serialized transcript without copying it
+        Raises:
+            ValueError: If the buffer is not a compact transcript
+        """
+        magic, count, text_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a compact transcript")
+        position = HEADER.size
+        starts = np.frombuffer(buffer, dtype='<f8', count=count, offset=position)
+        position += 8 * count
+        durations = np.frombuffer(buffer, dtype='<f8', count=count, offset=position)
+        position += 8 * count
+        offsets = np.frombuffer(buffer, dtype='<u4', count=count + 1, offset=position)
+        position += 4 * (count + 1)
+        text_buffer = memoryview(buffer)[position:position + text_length]
+        return cls(starts, durations, offsets, text_buffer, source=source)
+
+    @classmethod
+    def load(cls, path: str) -> 'CompactTranscript':
+        """Memory-map a transcript file written by save()"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(mapped, source=mapped)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to the binary layout read by from_buffer()"""
+        return b''.join((
+            HEADER.pack(MAGIC, len(self), len(self.text_buffer)),
+            self.starts.astype('<f8', copy=False).tobytes(),
+            self.durations.astype('<f8', copy=False).tobytes(),
+            self.offsets.astype('<u4', copy=False).tobytes(),
+            self.text_buffer.tobytes()
+        ))
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays and text buffer"""
+        return self.starts.nbytes + self.durations.nbytes + self.offsets.nbytes + len(self.text_buffer)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, index: int) -> str:
+        return str(self.text_buffer[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+
+    def texts(self) -> List[str]:
+        """Decode all segment texts"""
+        offsets = self.offsets.tolist()
+        buffer = self.text_buffer
+        return [str(buffer[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(len(offsets) - 1)]
+
+    def ends(self) -> np.ndarray:
+        """End time of every segment"""
+        return self.starts + self.durations
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return {'text': self.text(index), 'start': float(self.starts[index]), 'duration': float(self.durations[index])}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_segments(self) -> List[Dict]:
+        """Expand back into a list of {'text', 'start', 'duration'} dicts"""
+        return [
+            {'text': text, 'start': start, 'duration': duration}
+            for text, start, duration in zip(self.texts(), self.starts.tolist(), self.durations.tolist())
+        ]
+
+
+def as_compact(transcript: Union[CompactTranscript, List[Dict]]) -> CompactTranscript:
+    """Return transcript as a CompactTranscript, converting a list of segment dicts"""
+    if isinstance(transcript, CompactTranscript):
+        return transcript
+    return CompactTranscript.from_segments(transcript)
@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+import youtube_transcript_api
+from requests.adapters import HTTPAdapter
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from .video_store import VideoStore
+
+logger = logging.getLogger(__name__)
+
+# Fetch outcomes
+FETCHED = 'fetched'
+# The video has no transcript to fetch, so retrying is pointless
+UNAVAILABLE = 'unavailable'
+# Transient errors persisted through every attempt
+FAILED = 'failed'
+
+# Errors that mean there is no transcript; names vary across youtube-transcript-api versions
+PERMANENT_ERRORS = tuple(
+    getattr(youtube_transcript_api, name) for name in (
+        'TranscriptsDisabled', 'NoTranscriptFound', 'NoTranscriptAvailable', 'VideoUnavailable',
+        'InvalidVideoId', 'AgeRestricted', 'VideoUnplayable', 'NotTranslatable'
+    ) if hasattr(youtube_transcript_api, name)
+)
+
+
+def _describe(error: Exception) -> str:
+    # youtube-transcript-api messages run to many lines of advice; keep the first
+    lines = str(error).strip().splitlines()
+    return f"{type(error).__name__}: {lines[0]}" if lines else type(error).__name__
+
+
+class TranscriptFetcher:
+    """
+    Fetches transcripts for many videos concurrently.
+
+    Worker threads share one HTTP session whose connection pool allows at most
+    max_per_host connections to each host, so extra workers queue for a
+    connection rather than opening more. Transient errors (network failures,
+    rate limiting, blocked requests) are retried with jittered exponential
+    backoff. Permanent ones, such as disabled transcripts, are not retried.
+    """
+
+    def __init__(self, store: Optional[VideoStore] = None, max_workers: int = 16, max_per_host: int = 8,
+                 max_attempts: int = 4, backoff_base: float = 1.0, backoff_max: float = 30.0):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._api_lock = threading.Lock()
+        self._api = None
+
+    def _fetch_once(self, video_id: str) -> List[Dict]:
+        """One attempt: transcript segments with 'text', 'start' and 'duration'"""
+        if not hasattr(YouTubeTranscriptApi, 'fetch'):
+            # youtube-transcript-api < 1.0 only has the static API, with its own HTTP handling
+            return YouTubeTranscriptApi.get_transcript(video_id)
+        with self._api_lock:
+            if self._api is None:
+                self._api = YouTubeTranscriptApi(http_client=self.session)
+        return self._api.fetch(video_id).to_raw_data()
+
+    def fetch(self, video_id: str) -> Dict:
+        """
+        Fetch one transcript, retrying transient errors
+        Returns:
+            Dictionary with video_id, status (fetched, unavailable or failed),
+            transcript (None unless fetched), error and attempts
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                transcript = self._fetch_once(video_id)
+                if not transcript:
+                    # Nothing to store or analyze, same as a video without captions
+                    return {'video_id': video_id, 'status': UNAVAILABLE, 'transcript': None,
+                            'error': 'EmptyTranscript', 'attempts': attempt}
+                return {'video_id': video_id, 'status': FETCHED, 'transcript': transcript,
+                        'error': None, 'attempts': attempt}
+            except PERMANENT_ERRORS as e:
+                return {'video_id': video_id, 'status': UNAVAILABLE, 'transcript': None,
+                        'error': type(e).__name__, 'attempts': attempt}
+            except Exception as e:
+                error = _describe(e)
+                if attempt == self.max_attempts:
+                    logger.warning(f"Giving up on transcript for {video_id} after {attempt} attempts ({error})")
+                    return {'video_id': video_id, 'status': FAILED, 'transcript': None,
+                            'error': error, 'attempts': attempt}
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.info(f"Transcript fetch for {video_id} failed ({error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def iter_fetch(self, video_ids: Iterable[str]) -> Iterator[Dict]:
+        """
+        Fetch transcripts concurrently, yielding results as they complete
+        At most two fetches per worker are queued ahead, so video_ids can be a
+        long or lazy iterable.
+        """
+        video_ids = iter(video_ids)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='transcripts') as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < 2 * self.max_workers:
+                    video_id = next(video_ids, None)
+                    if video_id is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(self.fetch, video_id))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def fetch_to_store(self, video_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetch transcripts concurrently and write each to the store as soon as it arrives
+        Returns:
+            Results keyed by video ID, without the transcripts
+        """
+        results = {}
+        for result in self.iter_fetch(video_ids):
+            if result['status'] == FETCHED:
+                self.store.put_video(result['video_id'], transcript=result['transcript'])
+            results[result['video_id']] = {key: value for key, value in result.items() if key != 'transcript'}
+        return results
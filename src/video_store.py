@@ -0,0 +1,208 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from .transcript import CompactTranscript, as_compact
+
+TranscriptLike = Union[CompactTranscript, List[Dict]]
+
+
+class VideoStore:
+    """
+    Single-file SQLite store for video details and transcripts.
+
+    Replaces the per-video {id}_details.json / {id}_transcript.json / {id}_processed.json
+    files: lookups by video ID hit the primary key index, bulk iteration streams
+    from one cursor, and every write is a single atomic upsert.
+    Transcripts are stored as CompactTranscript blobs and read back without parsing;
+    rows written as JSON by earlier versions are still readable.
+    Each thread gets its own connection, so readers never block each other.
+    """
+
+    def __init__(self, db_path: str = "data/videos.db"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            "video_id TEXT PRIMARY KEY, "
+            "details TEXT, "
+            "transcript TEXT, "
+            "processed_at TEXT, "
+            "updated_at REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def put_video(self, video_id: str, details: Optional[Dict] = None, transcript: Optional[TranscriptLike] = None):
+        """Insert or update a video; fields passed as None keep their stored value"""
+        self.put_videos([(video_id, details, transcript)])
+
+    def put_videos(self, videos: List[Tuple[str, Optional[Dict], Optional[TranscriptLike]]]):
+        """Insert or update many (video_id, details, transcript) tuples in one transaction"""
+        now = time.time()
+        rows = [
+            (
+                video_id,
+                None if details is None else json.dumps(details, ensure_ascii=False, separators=(',', ':')),
+                None if transcript is None else as_compact(transcript).to_bytes(),
+                now
+            )
+            for video_id, details, transcript in videos
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO videos (video_id, details, transcript, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (video_id) DO UPDATE SET "
+                "details = COALESCE(excluded.details, details), "
+                "transcript = COALESCE(excluded.transcript, transcript), "
+                "updated_at = excluded.updated_at",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def mark_processed(self, video_id: str) -> bool:
+        """
+        Record that a video's data has been processed
+        Returns False if the video has no stored details
+        """
+        cursor = self._conn().execute(
+            "UPDATE videos SET processed_at = ? WHERE video_id = ? AND details IS NOT NULL",
+            (time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime()), video_id)
+        )
+        return cursor.rowcount == 1
+
+    def has_video(self, video_id: str) -> bool:
+        """Whether details are stored for a video"""
+        row = self._conn().execute(
+            "SELECT 1 FROM videos WHERE video_id = ? AND details IS NOT NULL", (video_id,)
+        ).fetchone()
+        return row is not None
+
+    def existing(self, video_ids: List[str], with_transcript: bool = False) -> Set[str]:
+        """The given video IDs whose details (and, if asked, transcript) are stored"""
+        condition = "details IS NOT NULL" + (" AND transcript IS NOT NULL" if with_transcript else "")
+        found = set()
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT video_id FROM videos WHERE {condition} AND video_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+
+    def get_details(self, video_id: str) -> Optional[Dict]:
+        row = self._conn().execute("SELECT details FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def get_transcript(self, video_id: str) -> Optional[CompactTranscript]:
+        row = self._conn().execute("SELECT transcript FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return self._decode_transcript(row[0]) if row else None
+
+    @staticmethod
+    def _decode_transcript(value) -> Optional[CompactTranscript]:
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return CompactTranscript.from_buffer(value)
+        # JSON text written before transcripts were stored compactly
+        return CompactTranscript.from_segments(json.loads(value))
+
+    def get_video(self, video_id: str) -> Optional[Dict]:
+        """Return details, transcript and processing time of a video"""
+        row = self._conn().execute(
+            "SELECT details, transcript, processed_at FROM videos WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {
+            'video_id': video_id,
+            'details': json.loads(row[0]),
+            'transcript': self._decode_transcript(row[1]),
+            'processed_at': row[2]
+        }
+
+    def iter_video_ids(self, with_transcript: bool = False, batch_size: int = 1000) -> Iterator[str]:
+        """Stream the IDs of stored videos in key order"""
+        condition = "transcript IS NOT NULL" if with_transcript else "details IS NOT NULL"
+        last_id = ''
+        while True:
+            # Keyset pagination keeps no cursor open between batches
+            rows = self._conn().execute(
+                f"SELECT video_id FROM videos WHERE video_id > ? AND {condition} ORDER BY video_id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            for (video_id,) in rows:
+                yield video_id
+            last_id = rows[-1][0]
+
+    def iter_videos(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream all stored videos with their details and transcript"""
+        for video_id in self.iter_video_ids(batch_size=batch_size):
+            video = self.get_video(video_id)
+            if video is not None:
+                yield video
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM videos WHERE details IS NOT NULL").fetchone()[0]
+
+    def migrate_from_dir(self, raw_data_dir: str = "data/raw", batch_size: int = 500) -> int:
+        """
+        One-time import of {id}_details.json / {id}_transcript.json files
+        Returns:
+            Number of videos imported
+        """
+        imported = 0
+        batch = []
+        with os.scandir(raw_data_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('_details.json'):
+                    continue
+                video_id = entry.name[:-len('_details.json')]
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        details = json.load(f)
+                    transcript = None
+                    transcript_file = os.path.join(raw_data_dir, f"{video_id}_transcript.json")
+                    if os.path.exists(transcript_file):
+                        with open(transcript_file, 'r', encoding='utf-8') as f:
+                            transcript = json.load(f)
+                except Exception as e:
+                    print(f"Error migrating video {video_id}: {str(e)}")
+                    continue
+                batch.append((video_id, details, transcript))
+                if len(batch) >= batch_size:
+                    self.put_videos(batch)
+                    imported += len(batch)
+                    batch = []
+        if batch:
+            self.put_videos(batch)
+            imported += len(batch)
+        return imported
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
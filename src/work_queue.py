@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+STAGES = ('collect', 'process', 'analyze')
+
+
+class WorkQueue:
+    """
+    Durable SQLite-backed queue driving each video through the pipeline stages.
+
+    There is one row per video. Its stage advances in place, which makes enqueueing
+    idempotent by video ID while the video is in the pipeline; enqueueing a done or
+    failed video starts it over. Workers lease rows in batches; a lease that is not
+    completed, failed or extended before it expires makes the row visible again,
+    so work held by a crashed process resumes without manual recovery. Expired
+    leases count as attempts too, so a job that keeps crashing its worker fails.
+    """
+
+    def __init__(self, db_path: str = "data/queue.db", max_attempts: int = 5):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, "
+            "video_id TEXT NOT NULL UNIQUE, "
+            "stage TEXT NOT NULL, "
+            "status TEXT NOT NULL, "  # pending | leased | done | failed
+            "payload TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "available_at REAL NOT NULL, "  # pending: not before; leased: lease expiry
+            "lease_owner TEXT, "
+            "last_error TEXT, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (stage, status, available_at)")
+
+    def enqueue(self, video_id: str, payload: Any = None, stage: str = 'collect', force: bool = False) -> bool:
+        """
+        Add a video to the pipeline
+        Args:
+            video_id: YouTube video ID
+            payload: JSON-serializable data for the first stage
+            stage: Stage to start at
+            force: Restart the video at stage even if it is already queued
+        Returns:
+            True if the video was added or restarted, False if it was already queued
+        """
+        return self.enqueue_many([video_id], [payload], stage=stage, force=force) == 1
+
+    def enqueue_many(self, video_ids: Iterable[str], payloads: Optional[Iterable[Any]] = None,
+                     stage: str = 'collect', force: bool = False) -> int:
+        """
+        Add many videos in one transaction. Videos that are done or failed start over
+        at stage, e.g. when a new notification arrives for a re-uploaded or edited video.
+        Returns:
+            Number of videos added or restarted
+        """
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+        video_ids = list(video_ids)
+        payloads = list(payloads) if payloads is not None else [None] * len(video_ids)
+        now = time.time()
+        rows = [
+            (video_id, stage, None if payload is None else json.dumps(payload), now, now)
+            for video_id, payload in zip(video_ids, payloads)
+        ]
+        # Without force, videos still pending or leased are left as they are
+        sql = ("INSERT INTO jobs (video_id, stage, status, payload, available_at, updated_at) "
+               "VALUES (?, ?, 'pending', ?, ?, ?) "
+               "ON CONFLICT (video_id) DO UPDATE SET stage = excluded.stage, status = 'pending', "
+               "payload = excluded.payload, attempts = 0, available_at = excluded.available_at, "
+               "lease_owner = NULL, last_error = NULL, updated_at = excluded.updated_at")
+        if not force:
+            sql += " WHERE jobs.status IN ('done', 'failed')"
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def dequeue(self, stage: str, owner: str, batch_size: int = 1, lease_seconds: float = 300.0) -> List[Dict]:
+        """
+        Lease up to batch_size ready jobs of a stage
+        Args:
+            stage: Pipeline stage to take work from
+            owner: Worker identity, required to complete or fail the jobs
+            batch_size: Maximum number of jobs to lease
+            lease_seconds: Visibility timeout before the jobs are handed out again
+        Returns:
+            Leased jobs with id, video_id, stage, payload and attempts
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An expired lease on the last attempt means the worker died; don't hand it out again
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', lease_owner = NULL, "
+                    "last_error = COALESCE(last_error, 'lease expired'), updated_at = ? "
+                    "WHERE stage = ? AND status = 'leased' AND available_at <= ? AND attempts >= ?",
+                    (now, stage, now, self.max_attempts)
+                )
+                rows = self._conn.execute(
+                    "SELECT id, video_id, stage, payload, attempts FROM jobs "
+                    "WHERE stage = ? AND status IN ('pending', 'leased') AND available_at <= ? "
+                    "ORDER BY available_at LIMIT ?",
+                    (stage, now, batch_size)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE jobs SET status = 'leased', lease_owner = ?, available_at = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        [(owner, now + lease_seconds, now, row['id']) for row in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {
+                'id': row['id'],
+                'video_id': row['video_id'],
+                'stage': row['stage'],
+                'payload': json.loads(row['payload']) if row['payload'] else None,
+                'attempts': row['attempts'] + 1
+            }
+            for row in rows
+        ]
+
+    def complete(self, job_id: int, owner: str, next_stage: Optional[str] = None) -> bool:
+        """
+        Finish the current stage of a leased job, moving it to next_stage or marking it done
+        Returns:
+            False if the lease was lost to another worker
+        """
+        now = time.time()
+        if next_stage is None:
+            sql, params = ("UPDATE jobs SET status = 'done', lease_owner = NULL, updated_at = ? "
+                           "WHERE id = ? AND status = 'leased' AND lease_owner = ?", (now, job_id, owner))
+        else:
+            sql, params = ("UPDATE jobs SET stage = ?, status = 'pending', payload = NULL, attempts = 0, "
+                           "available_at = ?, lease_owner = NULL, last_error = NULL, updated_at = ? "
+                           "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                           (next_stage, now, now, job_id, owner))
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount == 1
+
+    def fail(self, job_id: int, owner: str, error: str, retry_delay: float = 0.0) -> bool:
+        """
+        Record a failed attempt; the job is retried after retry_delay until max_attempts is reached
+        Returns:
+            False if the lease was lost to another worker
+        """
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "available_at = ?, lease_owner = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, now + retry_delay, error, now, job_id, owner)
+            ).rowcount == 1
+
+    def extend_lease(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        """Keep a long-running job leased"""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + lease_seconds, now, job_id, owner)
+            ).rowcount == 1
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Return the pipeline state of a video"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, stage, status, attempts, last_error, updated_at FROM jobs WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return job counts per stage and status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status").fetchall()
+        counts = {}
+        for stage, status, count in rows:
+            counts.setdefault(stage, {})[status] = count
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
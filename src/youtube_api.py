@@ -1,75 +1,210 @@
 from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi
+import httplib2
 import os
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import json
+from .fetch_cache import DETAILS, NO_TRANSCRIPT, NOT_FOUND, OK, TRANSCRIPT, FetchCache
+from .transcript_fetcher import FAILED, FETCHED, UNAVAILABLE, TranscriptFetcher
+from .video_store import VideoStore
+
+# videos().list accepts up to 50 IDs per call, for the same quota as one
+MAX_IDS_PER_REQUEST = 50
+
+# Discovery clients are shared by every YouTubeAPI with the same key and endpoint
+_clients = {}
+_clients_lock = threading.Lock()
+# httplib2 connections are not thread-safe, so each thread keeps its own persistent one
+_local = threading.local()
+
+def _client(api_key: Optional[str], endpoint: Optional[str]):
+    key = (api_key, endpoint)
+    with _clients_lock:
+        if key not in _clients:
+            client_options = {'api_endpoint': endpoint} if endpoint else None
+            _clients[key] = build('youtube', 'v3', developerKey=api_key, client_options=client_options)
+        return _clients[key]
+
+def _http() -> httplib2.Http:
+    if not hasattr(_local, 'http'):
+        _local.http = httplib2.Http(timeout=30)
+    return _local.http
 
 class YouTubeAPI:
-    def __init__(self):
+    def __init__(self, store: Optional[VideoStore] = None, fetch_cache: Optional[FetchCache] = None):
         self.api_key = os.getenv('YOUTUBE_API_KEY')
-        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        # YOUTUBE_API_ENDPOINT points the client at another server, e.g. a local stand-in
+        self.youtube = _client(self.api_key, os.getenv('YOUTUBE_API_ENDPOINT'))
+        self.store = store or VideoStore()
+        self.transcript_fetcher = TranscriptFetcher(
+            store=self.store,
+            max_workers=int(os.getenv('TRANSCRIPT_FETCH_WORKERS', '16')),
+            max_per_host=int(os.getenv('TRANSCRIPT_FETCH_PER_HOST', '8'))
+        )
+        # Optional: skip refetching what was fetched within its TTL, including negative results
+        self.fetch_cache = fetch_cache
 
     def get_video_details(self, video_id: str) -> Optional[Dict]:
         """
         Fetch video details including title, description, and other metadata
         """
-        try:
-            request = self.youtube.videos().list(
-                part="snippet,contentDetails",
-                id=video_id
-            )
-            response = request.execute()
+        return self.get_video_details_many([video_id]).get(video_id)
+
+    def get_video_details_many(self, video_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Fetch details for many videos, 50 per API call
+        Args:
+            video_ids: YouTube video IDs
+        Returns:
+            Details keyed by video ID. Videos the API does not return (deleted,
+            private or invalid IDs) map to None; IDs in a call that failed are left
+            out, so callers can retry them
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        details = self._cached_details(video_ids)
+        details.update(self._fetch_details([video_id for video_id in video_ids if video_id not in details]))
+        return details
+
+    def _cached_details(self, video_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Details fetched within the cache TTL, read from the store; None for cached 'not found'"""
+        if self.fetch_cache is None:
+            return {}
+        details = {}
+        for video_id, outcome in self.fetch_cache.lookup_many(DETAILS, video_ids).items():
+            if outcome == NOT_FOUND:
+                details[video_id] = None
+            else:
+                stored = self.store.get_details(video_id)
+                if stored is not None:
+                    details[video_id] = stored
+        return details
+
+    def _fetch_details(self, video_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        details = {}
+        for i in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+            chunk = video_ids[i:i + MAX_IDS_PER_REQUEST]
+            try:
+                request = self.youtube.videos().list(
+                    part="snippet,contentDetails",
+                    id=','.join(chunk),
+                    maxResults=MAX_IDS_PER_REQUEST
+                )
+                response = request.execute(http=_http())
+            except Exception as e:
+                print(f"Error fetching video details for {', '.join(chunk)}: {str(e)}")
+                continue
             
-            if not response['items']:
-                return None
-                
-            video_data = response['items'][0]
-            return {
-                'video_id': video_id,
-                'title': video_data['snippet']['title'],
-                'description': video_data['snippet']['description'],
-                'published_at': video_data['snippet']['publishedAt'],
-                'channel_id': video_data['snippet']['channelId'],
-                'channel_title': video_data['snippet']['channelTitle'],
-                'duration': video_data['contentDetails']['duration']
-            }
-        except Exception as e:
-            print(f"Error fetching video details for {video_id}: {str(e)}")
-            return None
+            details.update(dict.fromkeys(chunk))
+            for video_data in response.get('items', []):
+                if video_data['id'] in details:
+                    details[video_data['id']] = self._format_details(video_data)
+        if self.fetch_cache is not None:
+            self.fetch_cache.record_many(
+                DETAILS, {video_id: OK if video_details else NOT_FOUND for video_id, video_details in details.items()}
+            )
+        return details
+
+    def get_uploads_playlist_id(self, channel_id: str) -> Optional[str]:
+        """
+        ID of the playlist holding all of a channel's uploads
+        Returns None if the channel does not exist; API errors are raised
+        """
+        response = self.youtube.channels().list(part="contentDetails", id=channel_id).execute(http=_http())
+        items = response.get('items', [])
+        return items[0]['contentDetails']['relatedPlaylists']['uploads'] if items else None
+
+    def get_playlist_page(self, playlist_id: str, page_token: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        One page of up to 50 video IDs from a playlist, newest first for uploads playlists
+        Returns:
+            The video IDs and the token of the next page (None on the last page); API errors are raised
+        """
+        response = self.youtube.playlistItems().list(
+            part="contentDetails",
+            playlistId=playlist_id,
+            maxResults=MAX_IDS_PER_REQUEST,
+            pageToken=page_token
+        ).execute(http=_http())
+        video_ids = [item['contentDetails']['videoId'] for item in response.get('items', [])]
+        return video_ids, response.get('nextPageToken')
+
+    @staticmethod
+    def _format_details(video_data: Dict) -> Dict:
+        return {
+            'video_id': video_data['id'],
+            'title': video_data['snippet']['title'],
+            'description': video_data['snippet']['description'],
+            'published_at': video_data['snippet']['publishedAt'],
+            'channel_id': video_data['snippet']['channelId'],
+            'channel_title': video_data['snippet']['channelTitle'],
+            'duration': video_data['contentDetails']['duration']
+        }
 
     def get_video_transcript(self, video_id: str) -> Optional[List[Dict]]:
         """
-        Fetch video transcript using YouTube Transcript API
+        Fetch video transcript using YouTube Transcript API, retrying transient errors
+        A fetched transcript is saved to the store, where the fetch cache expects it.
         """
-        try:
-            transcript = YouTubeTranscriptApi.get_transcript(video_id)
-            return transcript
-        except Exception as e:
-            print(f"Error fetching transcript for {video_id}: {str(e)}")
+        if self.fetch_cache is not None:
+            outcome = self.fetch_cache.lookup_many(TRANSCRIPT, [video_id]).get(video_id)
+            if outcome == NO_TRANSCRIPT:
+                return None
+            transcript = self.store.get_transcript(video_id) if outcome == OK else None
+            if transcript is not None:
+                return transcript.to_segments()
+        
+        result = self.transcript_fetcher.fetch(video_id)
+        if result['status'] == FETCHED:
+            self.store.put_video(video_id, transcript=result['transcript'])
+        self._record_transcripts({video_id: result})
+        if result['status'] != FETCHED:
+            print(f"Error fetching transcript for {video_id}: {result['error']}")
             return None
+        return result['transcript']
 
-    def save_video_data(self, video_id: str, data_dir: str = "data/raw"):
+    def fetch_transcripts(self, video_ids: List[str]) -> Dict[str, Dict]:
         """
-        Save video details and transcript to JSON files
+        Fetch transcripts concurrently into the store, skipping those fetched within the cache TTL
+        Returns:
+            Fetch results keyed by video ID, for the videos that were fetched
         """
-        # Create data directory if it doesn't exist
-        os.makedirs(data_dir, exist_ok=True)
-        
-        # Get video details
-        video_details = self.get_video_details(video_id)
-        if video_details:
-            # Save video details
-            details_file = os.path.join(data_dir, f"{video_id}_details.json")
-            with open(details_file, 'w', encoding='utf-8') as f:
-                json.dump(video_details, f, ensure_ascii=False, indent=2)
-            
-            # Get and save transcript
-            transcript = self.get_video_transcript(video_id)
-            if transcript:
-                transcript_file = os.path.join(data_dir, f"{video_id}_transcript.json")
-                with open(transcript_file, 'w', encoding='utf-8') as f:
-                    json.dump(transcript, f, ensure_ascii=False, indent=2)
-            
-            return True
-        return False
\ No newline at end of file
+        if self.fetch_cache is not None:
+            fresh = self.fetch_cache.lookup_many(TRANSCRIPT, video_ids)
+            video_ids = [video_id for video_id in video_ids if video_id not in fresh]
+        results = self.transcript_fetcher.fetch_to_store(video_ids)
+        self._record_transcripts(results)
+        return results
+
+    def _record_transcripts(self, results: Dict[str, Dict]):
+        # Transient failures are not recorded, so the next request retries them
+        if self.fetch_cache is not None:
+            outcomes = {FETCHED: OK, UNAVAILABLE: NO_TRANSCRIPT}
+            self.fetch_cache.record_many(TRANSCRIPT, {
+                video_id: outcomes[result['status']] for video_id, result in results.items()
+                if result['status'] in outcomes
+            })
+
+    def save_video_data(self, video_id: str) -> bool:
+        """
+        Fetch video details and transcript and save them to the video store
+        """
+        return self.save_video_data_many([video_id])[video_id]
+
+    def save_video_data_many(self, video_ids: List[str]) -> Dict[str, bool]:
+        """
+        Fetch details in bulk and transcripts concurrently for many videos
+        Details are saved in one store write; each transcript is saved as soon as it arrives.
+        Anything fetched within the cache TTL is not fetched again.
+        Returns:
+            Whether each video was saved; False for missing videos, failed detail calls and
+            transcripts that failed after every retry. A video with no transcript counts as saved.
+        """
+        unique_ids = list(dict.fromkeys(video_ids))
+        details = self._cached_details(unique_ids)
+        fetched = self._fetch_details([video_id for video_id in unique_ids if video_id not in details])
+        self.store.put_videos([(video_id, video_details, None) for video_id, video_details in fetched.items() if video_details])
+        details.update(fetched)
+        transcripts = self.fetch_transcripts([video_id for video_id in unique_ids if details.get(video_id)])
+        # Transient failures are reported, so the caller retries the video later
+        failed = {video_id for video_id, result in transcripts.items() if result['status'] == FAILED}
+        return {video_id: bool(details.get(video_id)) and video_id not in failed for video_id in video_ids}
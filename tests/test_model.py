@@ -0,0 +1,52 @@
+"""
+ModelTrainer.evaluate on validation sets that do not divide into full batches.
+"""
+import math
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+from transformers import DistilBertConfig
+
+from src.model import ModelTrainer, SponsorshipDetector
+
+
+def tiny_trainer(tmp_path) -> ModelTrainer:
+    # A small randomly initialised DistilBERT, so nothing is downloaded
+    config_dir = str(tmp_path / 'base_config')
+    DistilBertConfig(vocab_size=64, dim=32, hidden_dim=64, n_layers=1, n_heads=2,
+                     max_position_embeddings=32).save_pretrained(config_dir)
+    trainer = ModelTrainer.__new__(ModelTrainer)
+    trainer.device = torch.device('cpu')
+    torch.manual_seed(0)
+    trainer.model = SponsorshipDetector(config_dir, pretrained=False)
+    trainer.criterion = nn.BCELoss()
+    return trainer
+
+
+def window_loader(num_windows: int, batch_size: int) -> DataLoader:
+    generator = torch.Generator().manual_seed(0)
+    input_ids = torch.randint(5, 64, (num_windows, 16), generator=generator)
+    labels = torch.arange(num_windows) % 2
+    dataset = TensorDataset(input_ids, torch.ones_like(input_ids), labels)
+    return DataLoader(dataset, batch_size=batch_size, collate_fn=lambda rows: {
+        'input_ids': torch.stack([row[0] for row in rows]),
+        'attention_mask': torch.stack([row[1] for row in rows]),
+        'labels': torch.stack([row[2] for row in rows]),
+    })
+
+
+def test_evaluate_handles_a_final_batch_of_one(tmp_path):
+    trainer = tiny_trainer(tmp_path)
+    # 17 windows in batches of 8 leave a last batch with a single window
+    val_loss, metrics = trainer.evaluate(window_loader(17, batch_size=8))
+    assert math.isfinite(val_loss)
+    assert set(metrics) == {'accuracy', 'precision', 'recall', 'f1'}
+    assert 0.0 <= metrics['accuracy'] <= 1.0
+
+
+def test_evaluate_on_an_empty_loader(tmp_path):
+    trainer = tiny_trainer(tmp_path)
+    val_loss, metrics = trainer.evaluate(window_loader(0, batch_size=8))
+    assert math.isnan(val_loss)
+    assert all(math.isnan(value) for value in metrics.values())
@@ -0,0 +1,76 @@
+"""
+The batch and fast-path text cleaning must match preprocess_text as originally written.
+"""
+import random
+import re
+
+import pytest
+
+from src.data_processor import DataProcessor, clean_text, clean_texts, preprocess_texts
+
+EDGE_CASES = [
+    "", " ", "\t\n\r\x0b\x0c", "Hello, World!", "ALL CAPS & symbols #1 @home",
+    "visit https://nordvpn.com/deal now", "http", "https", "www", "xhttp://a.b/c?d=1 y", "awwwb.com",
+    "HTTP://SHOUTING.COM", "ht.tp://split", "Www.Example.com", "(https://x.y)", "email me: a_b@c.de",
+    "snake_case_word", "über café naïve", "İstanbul", "K kelvin", "ß straße", "emoji 🎉 party 🎉",
+    "日本語のテキスト、句読点。", "tab\tseparated\tvalues", "non breaking spaces", "zero​width",
+    "digits 123 ４５６ ٧٨٩", "mixed—dashes–and…ellipsis", "url at end www.", "trailing   spaces   ",
+    "\x1c\x1d\x1e\x1f separators", "line separator", "combining é", "½ ² ³ fractions",
+]
+
+
+def reference_preprocess(text: str) -> str:
+    """preprocess_text as originally written"""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = ' '.join(text.split())
+    return text
+
+
+def fuzz_strings(count: int, seed: int = 0):
+    # Every other string is pure ASCII, which takes the translate fast path
+    rng = random.Random(seed)
+    ascii_alphabet = ''.join(map(chr, range(128)))
+    unicode_alphabet = ("abcXYZ_09 \t\n.,:/?!#&-'\"()" + "äÖßİıΣς" + "  ​ " + "日本🎉٧½́")
+    pieces = ["http", "https://", "www.", "HTTP", "Www", "://"]
+    strings = []
+    for i in range(count):
+        alphabet = ascii_alphabet if i % 2 else unicode_alphabet
+        parts = [rng.choice(pieces) if rng.random() < 0.05 else rng.choice(alphabet)
+                 for _ in range(rng.randint(0, 40))]
+        strings.append(''.join(parts))
+    return strings
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_clean_text_matches_reference_on_edge_cases(text):
+    assert clean_text(text) == reference_preprocess(text)
+
+
+def test_clean_text_matches_reference_on_fuzzed_input():
+    texts = fuzz_strings(50000)
+    mismatches = [(text, clean_text(text)) for text in texts if clean_text(text) != reference_preprocess(text)]
+    assert mismatches == []
+
+
+def test_clean_texts_keeps_order():
+    texts = EDGE_CASES + fuzz_strings(1000, seed=1)
+    assert clean_texts(texts) == [reference_preprocess(text) for text in texts]
+
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+def test_preprocess_texts_matches_reference(num_workers):
+    texts = fuzz_strings(5000, seed=2) + EDGE_CASES
+    # Small chunks so the worker path splits the input
+    assert preprocess_texts(texts, num_workers=num_workers, chunk_size=1000) == [
+        reference_preprocess(text) for text in texts
+    ]
+
+
+def test_data_processor_methods_match_reference(tmp_path):
+    from src.video_store import VideoStore
+
+    processor = DataProcessor(store=VideoStore(str(tmp_path / 'videos.db')))
+    assert [processor.preprocess_text(text) for text in EDGE_CASES] == processor.preprocess_texts(EDGE_CASES)
+    assert processor.preprocess_texts(EDGE_CASES) == [reference_preprocess(text) for text in EDGE_CASES]
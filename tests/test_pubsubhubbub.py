@@ -0,0 +1,76 @@
+"""
+Bulk PubSubHubbub subscription against the local stand-in hub.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.bulk_subscribe import StandInHub
+from src.pubsubhubbub import PubSubHubbub
+
+INVALID, FLAKY, STALL = 0.1, 0.2, 0.1
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = StandInHub(latency_ms=5, flaky_fraction=FLAKY, stall_fraction=STALL, invalid_fraction=INVALID,
+                     stall_seconds=1.0).start()
+    monkeypatch.setenv('PUBSUB_HUB_URL', hub.url)
+    monkeypatch.setenv('CALLBACK_URL', 'https://example.com/webhook')
+    yield hub
+    hub.shutdown()
+
+
+def expected_failure(hub: StandInHub, channel_id: str) -> str:
+    """How the stand-in treats a channel's first attempt"""
+    bucket = hub._bucket(channel_id)
+    for kind, fraction in (('invalid', INVALID), ('flaky', FLAKY), ('stall', STALL)):
+        if bucket < fraction:
+            return kind
+        bucket -= fraction
+    return 'none'
+
+
+async def subscribe(channel_ids, **kwargs):
+    pubsub = PubSubHubbub(max_connections=8)
+    try:
+        return await pubsub.bulk_subscribe(channel_ids, **kwargs)
+    finally:
+        await pubsub.close()
+
+
+def test_bulk_subscribe_reports_each_channel(hub):
+    channel_ids = [f"UC{i:022d}" for i in range(60)]
+    kinds = {channel_id: expected_failure(hub, channel_id) for channel_id in channel_ids}
+    assert set(kinds.values()) == {'invalid', 'flaky', 'stall', 'none'}
+    reported = []
+
+    outcomes = asyncio.run(subscribe(channel_ids + channel_ids[:5], backoff_base=0.01, request_timeout=0.3,
+                                     progress=lambda channel_id, outcome: reported.append(channel_id)))
+
+    assert list(outcomes) == channel_ids
+    assert sorted(reported) == sorted(channel_ids)
+    for channel_id, outcome in outcomes.items():
+        kind = kinds[channel_id]
+        if kind == 'invalid':
+            # Client errors are not retried
+            assert outcome['ok'] is False
+            assert outcome['status'] == 400
+            assert outcome['attempts'] == 1
+            assert outcome['error']
+        else:
+            assert outcome['ok'] is True
+            assert outcome['status'] == 202
+            assert outcome['attempts'] == (1 if kind == 'none' else 2)
+    # One pooled session, not a connection per channel
+    assert hub.connections <= 8 + sum(kind == 'stall' for kind in kinds.values())
+
+
+def test_bulk_subscribe_gives_up_after_max_attempts(hub):
+    channel_id = next(f"UC{i:022d}" for i in range(1000) if expected_failure(hub, f"UC{i:022d}") == 'flaky')
+    outcomes = asyncio.run(subscribe([channel_id], max_attempts=1, backoff_base=0.01, request_timeout=0.3))
+
+    assert outcomes[channel_id]['ok'] is False
+    assert outcomes[channel_id]['status'] == 503
+    assert outcomes[channel_id]['attempts'] == 1
+    assert hub.attempts[channel_id] == 1
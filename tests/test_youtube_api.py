@@ -0,0 +1,67 @@
+"""
+YouTubeAPI's batched metadata fetching against the local stand-in API.
+"""
+import pytest
+
+from benchmarks.transcript_fetching import stand_in_fetch
+from benchmarks.youtube_stand_in import StandInYouTube
+from src import youtube_api
+from src.video_store import VideoStore
+from src.youtube_api import YouTubeAPI
+
+
+@pytest.fixture
+def server():
+    server = StandInYouTube(missing_fraction=0.1, flaky_fraction=0.1).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api(server, tmp_path, monkeypatch):
+    monkeypatch.setenv('YOUTUBE_API_KEY', 'stand-in')
+    monkeypatch.setenv('YOUTUBE_API_ENDPOINT', server.url)
+    api = YouTubeAPI(store=VideoStore(str(tmp_path / 'videos.db')))
+    api.transcript_fetcher.backoff_base = 0.01
+    api.transcript_fetcher._fetch_once = stand_in_fetch(api.transcript_fetcher, server)
+    return api
+
+
+def video_ids(count: int):
+    return [f"vid{i:08d}" for i in range(count)]
+
+
+def test_details_are_fetched_fifty_per_call(api, server):
+    ids = video_ids(120)
+    details = api.get_video_details_many(ids + ids[:10])
+
+    assert server.calls == {'videos': 3}
+    assert set(details) == set(ids)
+    missing = {video_id for video_id in ids if server.is_missing(video_id)}
+    assert missing, "the stand-in should hide some videos"
+    assert {video_id for video_id, value in details.items() if value is None} == missing
+    found = next(video_id for video_id in ids if video_id not in missing)
+    assert details[found] == YouTubeAPI._format_details(server.video(found))
+
+
+def test_failed_call_leaves_its_ids_out(api, server, monkeypatch):
+    # The stand-in rejects calls with more than 50 IDs, so the first chunk of 60 fails
+    monkeypatch.setattr(youtube_api, 'MAX_IDS_PER_REQUEST', 60)
+    ids = video_ids(70)
+    details = api.get_video_details_many(ids)
+
+    assert server.calls == {'videos': 2}
+    assert set(details) == set(ids[60:])
+
+
+def test_save_video_data_many_reports_each_video(api, server):
+    ids = video_ids(60)
+    saved = api.save_video_data_many(ids)
+
+    assert server.calls['videos'] == 2
+    for video_id in ids:
+        assert saved[video_id] == (not server.is_missing(video_id))
+    stored = api.store.existing(ids, with_transcript=True)
+    # Flaky transcripts are retried, so every video the API returns is stored in full
+    assert stored == {video_id for video_id in ids if saved[video_id]}